@@ -0,0 +1,124 @@
+# Author-Julian Pleines
+# Content addressed cache of generated keyboards. The key is a hash of every setting that changes the model, the
+# layout and the frame version. An entry holds the split and print plate plan and optionally the keyboard component
+# as Fusion archive, that is imported instead of building the keyboard again. The least recently used entries are
+# removed once the cache is larger than cacheLimit.
+
+import hashlib
+import io
+import json
+import os
+
+import adsk.core
+import adsk.fusion
+
+from . import Regeneration
+from .KeyboardData import KeyboardObject
+from .Progress import ProgressReporter
+from .SplitPlanner import SplitPlan
+from .Trace import logger, traced
+
+cachePath = os.path.dirname(__file__) + "/cache/"
+cacheLimit = 512 * 1024 * 1024
+# raise it whenever the same settings generate a different model
+cacheVersion = 1
+planExtension = ".json"
+archiveExtension = ".f3d"
+
+
+# the same key for the same model, the parameters are the ones regeneration compares, they include the layout digest
+def cacheKey(keyboardObject: KeyboardObject, joinOption: str) -> str:
+    frame = keyboardObject.frame
+    header = {"version": cacheVersion, "parameters": Regeneration.snapshot(keyboardObject), "layoutName": keyboardObject.layoutName,
+              "frame": [frame.filename, frame.filePath, frame.version] if frame is not None else None, "joinOption": joinOption}
+    return hashlib.sha1(json.dumps(header, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# the cached entry or None, "archive" is the archive file or None if only the plan is cached
+def lookup(key: str) -> dict:
+    planFile = cachePath + key + planExtension
+    try:
+        with io.open(planFile, "r", encoding="utf-8") as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if entry.get("version") != cacheVersion:
+        return None
+    # the mtime of the plan orders the entries for the eviction
+    try:
+        os.utime(planFile)
+    except OSError:
+        pass
+    archive = cachePath + key + archiveExtension
+    entry["archive"] = archive if os.path.isfile(archive) else None
+    return entry
+
+
+def splitPlan(entry: dict) -> SplitPlan:
+    return SplitPlan.fromDict(entry["split"]) if entry is not None and entry.get("split") is not None else None
+
+
+# stores the plan of the keyboard in the component and the component itself if withArchive is set
+@traced
+def store(progress: ProgressReporter, design: adsk.fusion.Design, component: adsk.fusion.Component, key: str, plan: SplitPlan, withArchive: bool):
+    progress.stage("cache", "Storing the Keyboard in the Build Cache")
+    try:
+        os.makedirs(cachePath, exist_ok=True)
+        if withArchive:
+            exportManager = design.exportManager
+            if not exportManager.execute(exportManager.createFusionArchiveExportOptions(cachePath + key + archiveExtension, component)):
+                logger.warning("unable to export %s into the build cache", component.name)
+        printPlates = component.attributes.itemByName(Regeneration.attributeGroup, "printPlates")
+        entry = {"version": cacheVersion, "component": component.name, "split": plan.toDict() if plan is not None else None,
+                 "printPlates": json.loads(printPlates.value) if printPlates is not None else None}
+        with io.open(cachePath + key + planExtension + ".tmp", "w", encoding="utf-8") as file:
+            file.write(json.dumps(entry, separators=(",", ":")))
+        os.replace(cachePath + key + planExtension + ".tmp", cachePath + key + planExtension)
+        evict(cacheLimit)
+    except OSError:
+        # a read only add-in folder only costs the speedup
+        logger.warning("unable to write the build cache %s", cachePath)
+    progress.step()
+
+
+# imports the cached component into the target, returns its occurrence or None if the import failed
+@traced
+def importArchive(progress: ProgressReporter, targetComponent: adsk.fusion.Component, key: str, entry: dict) -> adsk.fusion.Occurrence:
+    progress.stage("cache", "Importing the Keyboard from the Build Cache")
+    importManager = adsk.core.Application.get().importManager
+    occurrences = targetComponent.occurrences
+    count = occurrences.count
+    if not importManager.importToTarget(importManager.createFusionArchiveImportOptions(entry["archive"]), targetComponent) or occurrences.count == count:
+        logger.warning("unable to import %s from the build cache", entry["archive"])
+        return None
+    occ = occurrences.item(occurrences.count - 1)
+    attributes = occ.component.attributes
+    # the recorded stages belong to the timeline of the design the archive was exported from
+    recorded = attributes.itemByName(Regeneration.attributeGroup, "stages")
+    if recorded is not None:
+        recorded.deleteMe()
+    if entry.get("printPlates") is not None:
+        attributes.add(Regeneration.attributeGroup, "printPlates", json.dumps(entry["printPlates"], indent=1))
+    logger.debug("build cache hit %s", key)
+    progress.step()
+    return occ
+
+
+# removes the least recently used entries until the cache is not larger than limit bytes
+def evict(limit: int):
+    entries = {}
+    for filename in os.listdir(cachePath):
+        key, _, extension = filename.partition(".")
+        stat = os.stat(cachePath + filename)
+        entry = entries.setdefault(key, {"size": 0, "used": 0.0, "files": []})
+        entry["size"] += stat.st_size
+        entry["files"].append(filename)
+        if "." + extension == planExtension:
+            entry["used"] = stat.st_mtime
+    total = sum(entry["size"] for entry in entries.values())
+    for key in sorted(entries, key=lambda key: entries[key]["used"]):
+        if total <= limit:
+            break
+        for filename in entries[key]["files"]:
+            os.remove(cachePath + filename)
+        total -= entries[key]["size"]
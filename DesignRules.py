@@ -0,0 +1,114 @@
+# Author-Julian Pleines
+# Checks the plate for cutouts of different keys that overlap or leave bridges too thin to print and for cutouts
+# outside of the plate. This module must not use the Fusion API.
+
+import math
+from typing import Dict, List, Tuple
+
+from .Geometry import PlateGeometry, compilePlate
+from .KeyboardData import KeyboardObject
+
+OVERLAP = "overlap"
+BRIDGE = "bridge"
+OUTSIDE = "outside"
+
+epsilon = 1e-6
+
+
+class Violation:
+    def __init__(self, kind: str, keys: Tuple[int, ...], x: float, y: float, width: float = 0.0):
+        self.kind: str = kind
+        # the keys in reading order and the position of the problem in sketch space
+        self.keys: Tuple[int, ...] = keys
+        self.x: float = x
+        self.y: float = y
+        # the width of a thin bridge
+        self.width: float = width
+
+    def __repr__(self) -> str:
+        return "Violation({}, keys={}, x={:.3f}, y={:.3f}, width={:.3f})".format(self.kind, self.keys, self.x, self.y, self.width)
+
+
+# uniform grid over boxes (minX, minY, maxX, maxY), every box is stored in all cells it touches
+class SpatialGrid:
+    def __init__(self, cellSize: float):
+        self.cellSize: float = cellSize
+        self.boxes: List[Tuple[float, float, float, float]] = []
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    def _cells(self, minX: float, minY: float, maxX: float, maxY: float):
+        size = self.cellSize
+        for cellX in range(math.floor(minX / size), math.floor(maxX / size) + 1):
+            for cellY in range(math.floor(minY / size), math.floor(maxY / size) + 1):
+                yield (cellX, cellY)
+
+    def insert(self, box: Tuple[float, float, float, float]) -> int:
+        index = len(self.boxes)
+        self.boxes.append(box)
+        for cell in self._cells(*box):
+            self.cells.setdefault(cell, []).append(index)
+        return index
+
+    # indices of all boxes closer than distance to the box, candidates still have to be checked exactly
+    def query(self, box: Tuple[float, float, float, float], distance: float = 0.0) -> set:
+        found = set()
+        for cell in self._cells(box[0] - distance, box[1] - distance, box[2] + distance, box[3] + distance):
+            found.update(self.cells.get(cell, ()))
+        return found
+
+
+# returns the gaps between two boxes along x and y, both are negative if the boxes overlap
+def _gaps(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> Tuple[float, float]:
+    return (max(b[0] - a[2], a[0] - b[2]), max(b[1] - a[3], a[1] - b[3]))
+
+
+def checkPlate(plate: PlateGeometry, minBridgeWidth: float, cellSize: float) -> List[Violation]:
+    violations: List[Violation] = []
+    grid = SpatialGrid(cellSize)
+    keys: List[int] = []
+    for rectangleList in plate.throughCuts() + plate.pocketCuts():
+        for (x, y, width, height), key in zip(rectangleList, rectangleList.key):
+            box = (x, y, x + width, y + height)
+            if x < -epsilon or y < -epsilon or box[2] > plate.width + epsilon or box[3] > plate.height + epsilon:
+                violations.append(Violation(OUTSIDE, (key,), x + width / 2, y + height / 2))
+            grid.insert(box)
+            keys.append(key)
+
+    # every pair of boxes is looked at once, from the box with the smaller index
+    for i, box in enumerate(grid.boxes):
+        for j in grid.query(box, minBridgeWidth):
+            if j <= i or keys[i] == keys[j]:
+                continue
+            other = grid.boxes[j]
+            gapX, gapY = _gaps(box, other)
+            if gapX < -epsilon and gapY < -epsilon:
+                kind, width = OVERLAP, 0.0
+            else:
+                width = math.hypot(gapX, gapY) if gapX > 0 and gapY > 0 else max(gapX, gapY, 0.0)
+                if width >= minBridgeWidth - epsilon:
+                    continue
+                kind = BRIDGE
+            x = (max(box[0], other[0]) + min(box[2], other[2])) / 2
+            y = (max(box[1], other[1]) + min(box[3], other[3])) / 2
+            violations.append(Violation(kind, (min(keys[i], keys[j]), max(keys[i], keys[j])), x, y, width))
+    return violations
+
+
+# checks the plate of the keyboard, the grid cells are one unit wide so every cutout touches only a few cells
+def checkDesignRules(keyboardObject: KeyboardObject) -> List[Violation]:
+    return checkPlate(compilePlate(keyboardObject), keyboardObject.minBridgeWidth, keyboardObject.unit)
+
+
+# one line per kind of violation, empty if the plate is fine
+def summary(violations: List[Violation], minBridgeWidth: float) -> str:
+    counts = {}
+    for violation in violations:
+        counts[violation.kind] = counts.get(violation.kind, 0) + 1
+    lines = []
+    if OVERLAP in counts:
+        lines.append("{} overlapping cutouts".format(counts[OVERLAP]))
+    if BRIDGE in counts:
+        lines.append("{} bridges thinner than {:.1f}mm".format(counts[BRIDGE], minBridgeWidth * 10))
+    if OUTSIDE in counts:
+        lines.append("{} cutouts outside of the plate".format(counts[OUTSIDE]))
+    return "\n".join(lines)
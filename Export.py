@@ -0,0 +1,63 @@
+# Author-Julian Pleines
+# Streams the layout plate as DXF or SVG for laser and CNC cutting, the entities are generated one by one straight
+# from the plate geometry so the drawing is never held in memory. Both formats are written in mm. This module must
+# not use the Fusion API.
+
+from typing import Iterator, List, TextIO, Tuple
+
+from .Geometry import PlateGeometry, RectangleList, compilePlate
+from .KeyboardData import KeyboardObject
+
+# sketch space is in cm
+scale = 10.0
+
+
+# (layer, rectangles) in drawing order, through cuts and pockets are on their own layers so the CAM can treat the
+# pockets differently (engrave them or leave them out)
+def plateLayers(plate: PlateGeometry) -> List[Tuple[str, RectangleList]]:
+    return [("OUTLINE", plate.outline), ("SWITCH_CUTOUTS", plate.cutouts), ("STABILIZER_CUTOUTS", plate.supportCutouts),
+            ("HOOK_POCKETS", plate.hooks), ("STABILIZER_POCKETS", plate.supportLips)]
+
+
+def dxfEntities(plate: PlateGeometry) -> Iterator[str]:
+    # R12 DXF in mm (INSUNITS 4, metric MEASUREMENT), every rectangle is a closed polyline
+    yield "0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n9\n$INSUNITS\n70\n4\n9\n$MEASUREMENT\n70\n1\n0\nENDSEC\n"
+    yield "0\nSECTION\n2\nTABLES\n0\nTABLE\n2\nLAYER\n70\n{}\n".format(len(plateLayers(plate)))
+    for color, (layer, rectangles) in enumerate(plateLayers(plate), 1):
+        yield "0\nLAYER\n2\n{}\n70\n0\n62\n{}\n6\nCONTINUOUS\n".format(layer, color)
+    yield "0\nENDTAB\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n"
+    for layer, rectangles in plateLayers(plate):
+        # the dummy point of the polyline is required by R12 readers
+        polyline = "0\nPOLYLINE\n8\n" + layer + "\n66\n1\n10\n0\n20\n0\n30\n0\n70\n1\n"
+        vertex = "0\nVERTEX\n8\n" + layer + "\n10\n{:.4f}\n20\n{:.4f}\n"
+        for x, y, width, height in rectangles:
+            minX, minY, maxX, maxY = x * scale, y * scale, (x + width) * scale, (y + height) * scale
+            yield polyline + vertex.format(minX, minY) + vertex.format(maxX, minY) + vertex.format(maxX, maxY) + vertex.format(minX, maxY) + "0\nSEQEND\n"
+    yield "0\nENDSEC\n0\nEOF\n"
+
+
+def svgElements(plate: PlateGeometry) -> Iterator[str]:
+    width, height = plate.width * scale, plate.height * scale
+    yield '<svg xmlns="http://www.w3.org/2000/svg" width="{0:.4f}mm" height="{1:.4f}mm" viewBox="0 0 {0:.4f} {1:.4f}">\n'.format(width, height)
+    for layer, rectangles in plateLayers(plate):
+        yield '<g id="{}" fill="none" stroke="black" stroke-width="0.1">\n'.format(layer)
+        # the y axis points down in SVG
+        for x, y, w, h in rectangles:
+            yield '<rect x="{:.4f}" y="{:.4f}" width="{:.4f}" height="{:.4f}"/>\n'.format(x * scale, height - (y + h) * scale, w * scale, h * scale)
+        yield "</g>\n"
+    yield "</svg>\n"
+
+
+def writeDxf(keyboardObject: KeyboardObject, file: TextIO):
+    file.writelines(dxfEntities(compilePlate(keyboardObject)))
+
+
+def writeSvg(keyboardObject: KeyboardObject, file: TextIO):
+    file.writelines(svgElements(compilePlate(keyboardObject)))
+
+
+# writes the plate as .dxf or .svg, depending on the file extension
+def exportPlate(keyboardObject: KeyboardObject, filename: str):
+    writer = writeSvg if filename.lower().endswith(".svg") else writeDxf
+    with open(filename, "w", newline="\n") as file:
+        writer(keyboardObject, file)
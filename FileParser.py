@@ -1,19 +1,35 @@
 # Author-Julian Pleines
 # Parses LayoutFiles (json) for any keyboard Layout and config files for frames
 
+import codecs
+import hashlib
 import io
 import json
+import mmap
 import os
+import struct
+import sys
 import traceback
+from array import array
 
 import adsk.cam
 import adsk.core
 import adsk.fusion
 
-from typing import List
-
 from .KeyboardData import KeyboardObject
-from .Types import KeyboardKey
+from .Trace import logger
+from .Types import LayoutArray
+
+layoutIndexFilename = ".layoutIndex.json"
+layoutIndexVersion = 1
+# the catalogs read or written during this session, reopening the dialog only stats the layout files again
+layoutCatalogs: dict = {}
+compiledLayoutExtension = ".ukcl"
+compiledLayoutMagic = b"UKCL"
+compiledLayoutVersion = 1
+compiledLayoutBigEndian = 1
+# magic, version, flags, keys, rows, keyboardHeightInUnits, source size, source mtime, name length, author length
+compiledLayoutHeader = struct.Struct("<4sHHIIdqdHH")
 
 
 # gets all files from the defaultLayouts folder to populate the Dropdown
@@ -28,29 +44,149 @@ def getCustomLayouts():
 
 def getLayouts(dirPath: str) -> dict:
     layouts: dict = {}
-    for filename in os.listdir(dirPath):
-        if filename.endswith(".json") or filename.endswith(".JSON"):
-            with io.open(dirPath + filename, "r", encoding="utf-8-sig") as file:
-                data = file.read()
-                rawLayoutData = json.loads(data)
-                if isinstance(rawLayoutData, list):
-                    if isinstance(rawLayoutData[0], dict):
-                        for key in rawLayoutData[0]:
-                            if key == "name":
-                                layouts[rawLayoutData[0][key]] = dirPath + filename
+    if not os.access(dirPath, os.W_OK):
+        # without an index only the leading metadata object of every file is read
+        if os.path.isdir(dirPath):
+            for filename in sorted(os.listdir(dirPath)):
+                if isLayoutFilename(filename):
+                    header = readLayoutHeader(dirPath + filename)
+                    if header is not None and header.get("name") is not None:
+                        layouts[header["name"]] = dirPath + filename
+        return layouts
+
+    catalog = updateLayoutCatalog(dirPath)
+    for filename in sorted(catalog):
+        entry = catalog[filename]
+        if entry["name"] is not None:
+            layouts[entry["name"]] = entry["path"]
 
     return layouts
 
 
+# the catalog index holds name, author, key count, path, size, mtime and content hash of every layout in a folder,
+# only files that are new or changed since the last call are read again
+def updateLayoutCatalog(dirPath: str) -> dict:
+    if not os.path.isdir(dirPath):
+        return {}
+    indexPath = dirPath + layoutIndexFilename
+    catalog: dict = layoutCatalogs.get(dirPath)
+    if catalog is None:
+        try:
+            with io.open(indexPath, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            catalog = index["layouts"] if index.get("version") == layoutIndexVersion else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            catalog = {}
+        layoutCatalogs[dirPath] = catalog
+
+    changed = False
+    filenames = [filename for filename in os.listdir(dirPath) if isLayoutFilename(filename)]
+    for filename in filenames:
+        stat = os.stat(dirPath + filename)
+        entry = catalog.get(filename)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            continue
+        with io.open(dirPath + filename, "rb") as file:
+            data = file.read()
+        contentHash = hashlib.sha1(data).hexdigest()
+        if entry is None or entry["hash"] != contentHash:
+            entry = readLayoutEntry(data)
+            entry["hash"] = contentHash
+        entry["path"] = dirPath + filename
+        entry["size"] = stat.st_size
+        entry["mtime"] = stat.st_mtime
+        catalog[filename] = entry
+        changed = True
+    for filename in [filename for filename in catalog if filename not in filenames]:
+        del catalog[filename]
+        changed = True
+
+    if changed:
+        try:
+            with io.open(indexPath + ".tmp", "w", encoding="utf-8") as file:
+                # compact, the indented dump does not use the C encoder
+                file.write(json.dumps({"version": layoutIndexVersion, "layouts": catalog}, separators=(",", ":")))
+            os.replace(indexPath + ".tmp", indexPath)
+        except OSError:
+            # read only layout folders are fine, the catalog is just built again next time
+            logger.warning("unable to write the layout index %s", indexPath)
+    return catalog
+
+
+# the index and other dot files lie next to the layouts but are no layouts
+def isLayoutFilename(filename: str) -> bool:
+    return not filename.startswith(".") and (filename.endswith(".json") or filename.endswith(".JSON"))
+
+
+# reads the catalog entry of a layout file, files that are no KLE layout get None as name
+def readLayoutEntry(data: bytes) -> dict:
+    entry = {"name": None, "author": "", "keys": 0}
+    try:
+        rawLayoutData = json.loads(data.decode("utf-8-sig"))
+    except ValueError:
+        return entry
+    if isinstance(rawLayoutData, list) and len(rawLayoutData) > 0:
+        if isinstance(rawLayoutData[0], dict):
+            entry["name"] = rawLayoutData[0].get("name")
+            entry["author"] = rawLayoutData[0].get("author", "")
+        for row in rawLayoutData:
+            if isinstance(row, list):
+                entry["keys"] += sum(1 for key in row if isinstance(key, str))
+    return entry
+
+
+# reads only the leading metadata object of a KLE layout ([{"name": ..., "author": ...}, [...], ...]), the file is
+# decoded in small chunks and reading stops as soon as the object is complete, the key rows are never read.
+# Returns None if the file isn't a KLE layout and an empty dict if the layout has no metadata.
+def readLayoutHeader(filename: str, chunkSize: int = 256):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    jsonDecoder = json.JSONDecoder()
+    text = ""
+    found = False
+    with io.open(filename, "rb") as file:
+        while True:
+            chunk = file.read(chunkSize)
+            text += decoder.decode(chunk, final=not chunk)
+            if not found:
+                stripped = text.lstrip()
+                if not stripped:
+                    if not chunk:
+                        return None
+                    continue
+                if stripped[0] != "[":
+                    return None
+                rest = stripped[1:].lstrip()
+                if not rest:
+                    if not chunk:
+                        return None
+                    continue
+                if rest[0] != "{":
+                    return {}
+                text = rest
+                found = True
+            try:
+                return jsonDecoder.raw_decode(text)[0]
+            except ValueError:
+                # the object isn't complete yet, the next chunks are larger to keep this linear
+                if not chunk:
+                    return None
+                chunkSize *= 2
+
+
 def parseLayoutFile(filename: str, keyboardObject: KeyboardObject):
     # Code to react to the event.
     try:
         app = adsk.core.Application.get()
         ui = app.userInterface
 
+        # the compiled layout is used as long as it is newer than the json file
+        compiledFilename = getCompiledLayoutFilename(filename)
+        if loadCompiledLayout(compiledFilename, filename, keyboardObject):
+            return
+
         with io.open(filename, 'r', encoding='utf-8-sig') as file:
             data = file.read()
-            layout: List[List[KeyboardKey]] = []
+            layout = LayoutArray()
             rawLayoutData = json.loads(data)
             rowPosition = 0.0
             columnPosition = 0.0
@@ -69,11 +205,10 @@ def parseLayoutFile(filename: str, keyboardObject: KeyboardObject):
                             if key == "author":
                                 keyboardObject.author = row[key]
                     elif isinstance(row, list):
-                        layoutRow: List[KeyboardKey] = []
                         columnPosition = 0.0
                         for entry in row:
                             if isinstance(entry, str):
-                                layoutRow.append(KeyboardKey.create(columnPosition + (width / 2), rowPosition + heightOffset, width, height))
+                                layout.append(columnPosition + (width / 2), rowPosition + heightOffset, width, height)
                                 keys += 1
                                 columnPosition += width
                                 width = 1.0
@@ -85,30 +220,31 @@ def parseLayoutFile(filename: str, keyboardObject: KeyboardObject):
                                         width = entry[key]
                                     if key == "w2":
                                         # rowPosition += entry["y"]
-                                        print("w2 argument not handled")
+                                        logger.debug("w2 argument not handled")
                                     if key == "x":
                                         columnPosition += entry[key]
                                     if key == "x2":
                                         # columnPosition += entry["x"]
-                                        print("x2 argument not handled")
+                                        logger.debug("x2 argument not handled")
                                     if key == "y":
                                         rowPosition += entry[key]
                                     if key == "y2":
                                         # rowPosition += entry["y"]
-                                        print("y2 argument not handled")
+                                        logger.debug("y2 argument not handled")
                                     if key == "h":
                                         heightOffset = (entry[key] - 1.0) / 2.0
                                         height = entry[key]
                                     if key == "h2":
                                         # rowPosition += entry["y"]
-                                        print("h2 argument not handled")
+                                        logger.debug("h2 argument not handled")
                             else:
-                                print("something unknown")
+                                logger.debug("something unknown")
                         rowPosition += 1
-                        layout.append(layoutRow)
+                        layout.endRow()
                     keyboardObject.keys = keys
-                    keyboardObject.layoutData = layout
+                    keyboardObject.layout = layout
                     keyboardObject.keyboardHeightInUnits = rowPosition
+                writeCompiledLayout(compiledFilename, filename, keyboardObject)
             else:
                 if ui:
                     ui.messageBox("Layout JSON not parsable!")
@@ -118,6 +254,82 @@ def parseLayoutFile(filename: str, keyboardObject: KeyboardObject):
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
+def getCompiledLayoutFilename(filename: str) -> str:
+    return filename.rpartition(".")[0] + compiledLayoutExtension
+
+
+# compiled layouts (.ukcl) are written next to the json file, the file starts with a fixed size header followed by
+# name and author (utf-8) and the key columns x, y, width, height (double), row (int32) and the row offsets (int32)
+def writeCompiledLayout(compiledFilename: str, sourceFilename: str, keyboardObject: KeyboardObject) -> bool:
+    layout = keyboardObject.layout
+    stat = os.stat(sourceFilename)
+    name = keyboardObject.layoutName.encode("utf-8")
+    author = keyboardObject.author.encode("utf-8")
+    flags = compiledLayoutBigEndian if sys.byteorder == "big" else 0
+    header = compiledLayoutHeader.pack(compiledLayoutMagic, compiledLayoutVersion, flags, len(layout), layout.rowCount,
+                                       keyboardObject.keyboardHeightInUnits, stat.st_size, stat.st_mtime, len(name), len(author))
+    strings = name + author
+    strings += bytes(-(len(header) + len(strings)) % 8)
+    try:
+        with io.open(compiledFilename + ".tmp", "wb") as file:
+            file.write(header)
+            file.write(strings)
+            for column in (layout.x, layout.y, layout.width, layout.height, layout.row, layout.rowOffsets):
+                column.tofile(file)
+        os.replace(compiledFilename + ".tmp", compiledFilename)
+    except OSError:
+        # layouts in read only folders are just parsed every time
+        return False
+    return True
+
+
+# memory-maps a compiled layout and copies the columns straight into the LayoutArray, returns False if the file is
+# missing, outdated or from another version so the json file has to be parsed
+def loadCompiledLayout(compiledFilename: str, sourceFilename: str, keyboardObject: KeyboardObject) -> bool:
+    try:
+        stat = os.stat(sourceFilename)
+        if os.stat(compiledFilename).st_mtime < stat.st_mtime:
+            return False
+        with io.open(compiledFilename, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if len(data) < compiledLayoutHeader.size:
+                    return False
+                magic, version, flags, keys, rows, heightInUnits, sourceSize, sourceMtime, nameLength, authorLength = compiledLayoutHeader.unpack_from(data, 0)
+                if magic != compiledLayoutMagic or version != compiledLayoutVersion or sourceSize != stat.st_size or sourceMtime != stat.st_mtime:
+                    return False
+                offset = compiledLayoutHeader.size
+                name = data[offset:offset + nameLength].decode("utf-8")
+                author = data[offset + nameLength:offset + nameLength + authorLength].decode("utf-8")
+                offset += nameLength + authorLength
+                offset += -offset % 8
+
+                layout = LayoutArray()
+                columns = [(layout.x, keys), (layout.y, keys), (layout.width, keys), (layout.height, keys), (layout.row, keys)]
+                layout.rowOffsets = array("i")
+                columns.append((layout.rowOffsets, rows + 1))
+                if len(data) != offset + sum(column.itemsize * length for column, length in columns):
+                    return False
+                for column, length in columns:
+                    column.frombytes(data[offset:offset + column.itemsize * length])
+                    if bool(flags & compiledLayoutBigEndian) != (sys.byteorder == "big"):
+                        column.byteswap()
+                    offset += column.itemsize * length
+    except (OSError, ValueError):
+        return False
+
+    # the per key flags are set by updateLayoutData
+    layout.support = array("b", bytes(keys))
+    layout.multiSwitch = array("b", bytes(keys))
+    layout.switchOffsets = array("i", [0]) * (keys + 1)
+    layout.supportOffsets = array("i", [0]) * (keys + 1)
+    keyboardObject.layout = layout
+    keyboardObject.layoutName = name if name else sourceFilename.rpartition("/")[2].rpartition(".")[0]
+    keyboardObject.author = author
+    keyboardObject.keys = keys
+    keyboardObject.keyboardHeightInUnits = heightInUnits
+    return True
+
+
 def parseConfigFile():
     # TODO add the config file system
     return None
@@ -1,14 +1,56 @@
 # Author-Julian Pleines
-# Creates the FitChecker Body for the Keyboard switches
+# Creates the FitChecker Body for the Keyboard switches, a coupon with a column of switch pockets per tolerance step
+
+import math
 
 import adsk.fusion
 import adsk.core
 
-from .Sketch import createPlateBorder, switchCutout, switchHookCutouts, createSwtichPocket
+from .Sketch import createPlateBorder, rectangle
 from .KeyboardData import KeyboardObject
+from .Progress import ProgressReporter
+from .Trace import logger, traced
+
+# room below the pockets for the tolerance labels and the depth they are engraved with
+labelHeight = 0.6
+labelTextHeight = 0.3
+labelDepth = 0.04
+# material between two columns of pockets and at the sides of the coupon
+wall = 0.3
+
+
+# the tolerances added to the switch cutout, from fitCheckerToleranceFrom to fitCheckerToleranceTo in steps
+def tolerances(keyboardObject: KeyboardObject) -> list:
+    start, end, step = keyboardObject.fitCheckerToleranceFrom, keyboardObject.fitCheckerToleranceTo, keyboardObject.fitCheckerToleranceStep
+    if step <= 0 or end < start:
+        return [start]
+    return [start + i * step for i in range(int(round((end - start) / step)) + 1)]
+
+
+# the labels are in mm like the tolerances in the dialog
+def toleranceLabel(tolerance: float) -> str:
+    value = round(tolerance * 10, 2)
+    return "{:+.2f}".format(value) if value != 0 else "0.00"
+
+
+# the distance between two columns, the widest pocket plus a wall
+def columnPitch(keyboardObject: KeyboardObject) -> float:
+    return keyboardObject.switchWidth + max(0.0, max(tolerances(keyboardObject))) + wall
+
 
+# the columns of one line of the coupon, the tolerances wrap into more lines if they don't fit the printer width
+def columnsPerLine(keyboardObject: KeyboardObject) -> int:
+    fitting = int((keyboardObject.printerWidth - wall) // columnPitch(keyboardObject))
+    return max(1, min(len(tolerances(keyboardObject)), fitting))
 
-def create(progressDialog: adsk.core.ProgressDialog, rootComponent: adsk.fusion.Component, keyboardObject: KeyboardObject):
+
+# progress steps of create: the sketches, one pocket per tolerance, the cuts, the labels and the pattern
+def progressSteps(keyboardObject: KeyboardObject) -> int:
+    return 1 + len(tolerances(keyboardObject)) + 3
+
+
+@traced
+def create(progress: ProgressReporter, rootComponent: adsk.fusion.Component, keyboardObject: KeyboardObject):
     trans = adsk.core.Matrix3D.create()
     occ = rootComponent.occurrences.addNewComponent(trans)
 
@@ -18,18 +60,21 @@ def create(progressDialog: adsk.core.ProgressDialog, rootComponent: adsk.fusion.
 
     sketches = comp.sketches
     xyPlane = comp.xYConstructionPlane
+    steps = tolerances(keyboardObject)
+    rows = max(1, keyboardObject.fitCheckerRows)
+    pitch = columnPitch(keyboardObject)
+    columns = columnsPerLine(keyboardObject)
+    # every line of columns has its labels below the pockets
+    lineHeight = labelHeight + rows * keyboardObject.unit
+    width = columns * pitch + wall
+    depth = math.ceil(len(steps) / columns) * lineHeight
+    if width > keyboardObject.printerWidth or depth > keyboardObject.printerDepth:
+        logger.warning("the FitChecker (%.1f x %.1f mm) is larger than the printer", width * 10, depth * 10)
 
     # --------------------------- FITCHECKER SKETCH CREATION --------------------------------------
 
-    progressDialog.message = "Creating the FitChecker sketch"
-    progressDialog.progressValue += 1
-    fitChecker = sketches.add(xyPlane)
-    fitChecker.name = "FitChecker"
-    fitChecker.isLightBulbOn = False
-    fitChecker.isComputeDeferred = True
-    createFitCheckerSketch(fitChecker, keyboardObject)
-    fitChecker.isComputeDeferred = False
-
+    progress.stage("fitchecker", "Creating the FitChecker sketch")
+    progress.step()
     frameSketch = sketches.add(xyPlane)
     frameSketch.name = "Frame"
     frameSketch.isLightBulbOn = False
@@ -39,76 +84,89 @@ def create(progressDialog: adsk.core.ProgressDialog, rootComponent: adsk.fusion.
     hooksSketch = sketches.add(xyPlane)
     hooksSketch.name = "Hooks"
     hooksSketch.isLightBulbOn = False
+    labelSketch = sketches.add(xyPlane)
+    labelSketch.name = "Labels"
+    labelSketch.isLightBulbOn = False
     frameSketch.isComputeDeferred = True
     cutoutSketch.isComputeDeferred = True
     hooksSketch.isComputeDeferred = True
-    createFitCheckerSketches(frameSketch, cutoutSketch, hooksSketch, progressDialog, keyboardObject)
+    # only the first row of every line is sketched, the other rows are patterned
+    createPlateBorder(frameSketch, width, depth, keyboardObject)
+    for i, tolerance in enumerate(steps):
+        line, column = divmod(i, columns)
+        x = wall / 2 + (column + 0.5) * pitch
+        tolerancePocket(cutoutSketch, hooksSketch, x, line * lineHeight + labelHeight + keyboardObject.unit / 2, tolerance, keyboardObject)
+        toleranceText(labelSketch, x, line * lineHeight, pitch, tolerance)
+        progress.step()
     cutoutSketch.isComputeDeferred = False
     hooksSketch.isComputeDeferred = False
     frameSketch.isComputeDeferred = False
 
     # --------------------------- FITCHECKER EXTRUDE ----------------------------------------------
 
-    # create the basic frame
-    frameProfile = frameSketch.profiles.item(0)
-
-    extInput = comp.features.extrudeFeatures.createInput(frameProfile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-    distance = adsk.core.ValueInput.createByReal(keyboardObject.plateThickness)
-    extInput.setDistanceExtent(False, distance)
-    extrude = comp.features.extrudeFeatures.add(extInput)
+    extrudes = comp.features.extrudeFeatures
+    extInput = extrudes.createInput(frameSketch.profiles.item(0), adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extInput.setDistanceExtent(False, adsk.core.ValueInput.createByReal(keyboardObject.plateThickness))
+    extrude = extrudes.add(extInput)
     extrude.bodies.item(0).name = "FitChecker"
 
-    cutouts = cutoutSketch.profiles
-
-    # finding the outer loop thus the profile responsible for the overall shape
+    progress.step()
     collection = adsk.core.ObjectCollection.create()
-    for prof in cutouts:
-        profile = adsk.fusion.Profile.cast(prof)
-        progressDialog.progressValue += 1
+    for profile in cutoutSketch.profiles:
         collection.add(profile)
+    extInput = extrudes.createInput(collection, adsk.fusion.FeatureOperations.CutFeatureOperation)
+    extInput.setDistanceExtent(False, adsk.core.ValueInput.createByReal(keyboardObject.plateThickness))
+    cutouts = extrudes.add(extInput)
 
-    extInput = comp.features.extrudeFeatures.createInput(collection, adsk.fusion.FeatureOperations.CutFeatureOperation)
-    distance = adsk.core.ValueInput.createByReal(keyboardObject.plateThickness)
-    extInput.setDistanceExtent(False, distance)
-    extrude = comp.features.extrudeFeatures.add(extInput)
-
-    hooks = hooksSketch.profiles
-    collection.clear()
-    for prof in hooks:
-        progressDialog.progressValue += 1
-        profile = adsk.fusion.Profile.cast(prof)
+    collection = adsk.core.ObjectCollection.create()
+    for profile in hooksSketch.profiles:
         collection.add(profile)
+    extInput = extrudes.createInput(collection, adsk.fusion.FeatureOperations.CutFeatureOperation)
+    extInput.setDistanceExtent(False, adsk.core.ValueInput.createByReal(keyboardObject.plateThickness - keyboardObject.switchHookHeight))
+    hooks = extrudes.add(extInput)
 
-    extInput = comp.features.extrudeFeatures.createInput(collection, adsk.fusion.FeatureOperations.CutFeatureOperation)
-    distance = adsk.core.ValueInput.createByReal(keyboardObject.plateThickness - keyboardObject.switchHookHeight)
-    extInput.setDistanceExtent(False, distance)
-    extrude = comp.features.extrudeFeatures.add(extInput)
+    # the labels are engraved into the top of the coupon
+    progress.step()
+    collection = adsk.core.ObjectCollection.create()
+    for text in labelSketch.sketchTexts:
+        collection.add(text)
+    extInput = extrudes.createInput(collection, adsk.fusion.FeatureOperations.CutFeatureOperation)
+    extInput.setOneSideExtent(adsk.fusion.DistanceExtentDefinition.create(adsk.core.ValueInput.createByReal(-labelDepth)),
+                              adsk.fusion.ExtentDirections.PositiveExtentDirection)
+    extInput.startExtent = adsk.fusion.FromEntityStartDefinition.create(xyPlane, adsk.core.ValueInput.createByReal(keyboardObject.plateThickness))
+    extrudes.add(extInput)
+
+    # one pattern copies the pockets of all tolerances onto the other rows of their line
+    progress.step()
+    if rows > 1:
+        features = adsk.core.ObjectCollection.create()
+        features.add(cutouts)
+        features.add(hooks)
+        patterns = comp.features.rectangularPatternFeatures
+        patternInput = patterns.createInput(features, comp.yConstructionAxis, adsk.core.ValueInput.createByReal(rows),
+                                            adsk.core.ValueInput.createByReal(keyboardObject.unit), adsk.fusion.PatternDistanceType.SpacingPatternDistanceType)
+        # all copies cut the same body, there is no need to compute every copy on its own
+        patternInput.patternComputeOption = adsk.fusion.PatternComputeOptions.IdenticalPatternCompute
+        patterns.add(patternInput)
 
     occ.isLightBulbOn = False
 
 
-def createFitCheckerSketch(sketch: adsk.fusion.Sketch, keyboardObject: KeyboardObject):
-    createPlateBorder(sketch, 0.505 + (3.75 * keyboardObject.unit),
-                      0.505 + keyboardObject.switchHookDepth + (3 * keyboardObject.unit), keyboardObject)
-    offset = 0.0
-    for y in range(3):
-        for x in range(3):
-            createSwtichPocket(sketch, 0.505 + (x + offset) * keyboardObject.unit, -(1 + y) * keyboardObject.unit, keyboardObject)
-        if offset == 0:
-            offset = 0.5
-        elif offset == 0.5:
-            offset = 0.75
-
-
-def createFitCheckerSketches(frameSketch: adsk.fusion.Sketch, cutoutSketch: adsk.fusion.Sketch, hooksSketch: adsk.fusion.Sketch, progressDialog: adsk.core.ProgressDialog, keyboardObject: KeyboardObject):
-    createPlateBorder(frameSketch, 0.505 + (3.75 * keyboardObject.unit), 0.505 + keyboardObject.switchHookDepth + (3 * keyboardObject.unit), keyboardObject)
-    offset = 0.75
-    for y in range(3):
-        for x in range(3):
-            switchCutout(cutoutSketch, 0.505 + (x + offset) * keyboardObject.unit, (1 + y) * keyboardObject.unit, keyboardObject)
-            switchHookCutouts(hooksSketch, 0.505 + (x + offset) * keyboardObject.unit, (1 + y) * keyboardObject.unit, keyboardObject)
-            progressDialog.progressValue += 1
-        if offset == 0.5:
-            offset = 0
-        elif offset == 0.75:
-            offset = 0.5
+# the switch cutout grown by the tolerance and the hook cutouts on its top and bottom edge
+def tolerancePocket(cutoutSketch: adsk.fusion.Sketch, hooksSketch: adsk.fusion.Sketch, x: float, y: float, tolerance: float, keyboardObject: KeyboardObject):
+    width = keyboardObject.switchWidth + tolerance
+    depth = keyboardObject.switchDepth + tolerance
+    rectangle(cutoutSketch, x - width / 2, y - depth / 2, width, depth, keyboardObject)
+    rectangle(hooksSketch, x - keyboardObject.switchHookWidth / 2, y - depth / 2 - keyboardObject.switchHookDepth,
+              keyboardObject.switchHookWidth, keyboardObject.switchHookDepth, keyboardObject)
+    rectangle(hooksSketch, x - keyboardObject.switchHookWidth / 2, y + depth / 2,
+              keyboardObject.switchHookWidth, keyboardObject.switchHookDepth, keyboardObject)
+
+
+# the tolerance centered below the column of its pockets, y is the bottom of the line
+def toleranceText(sketch: adsk.fusion.Sketch, x: float, y: float, width: float, tolerance: float):
+    texts = sketch.sketchTexts
+    textInput = texts.createInput2(toleranceLabel(tolerance), labelTextHeight)
+    textInput.setAsMultiLine(adsk.core.Point3D.create(x - width / 2, y, 0), adsk.core.Point3D.create(x + width / 2, y + labelHeight, 0),
+                             adsk.core.HorizontalAlignments.CenterHorizontalAlignment, adsk.core.VerticalAlignments.MiddleVerticalAlignment, 0)
+    texts.add(textInput)
@@ -1,7 +1,12 @@
 # Author-Julian Pleines
 # Creates the Frame Body for the Keyboard
 
-from typing import Tuple
+from typing import List, Tuple
+import ast
+import hashlib
+import importlib
+import io
+import json
 import os
 
 import adsk.core
@@ -9,51 +14,158 @@ import adsk.fusion
 
 from .Types import Frame
 from .KeyboardData import KeyboardObject
+from .Trace import logger
 
+framesPath = os.path.dirname(__file__) + "/modules/frames/"
+modelsPath = os.path.dirname(__file__) + "/resources/models/frames/"
+frameIndexFilename = ".frameIndex.json"
+frameIndexVersion = 1
+# the catalogs read or written during this session by frames folder
+frameCatalogs: dict = {}
+# join options of frames that don't name their own
+defaultJoinOptions = ["M3x10 ISO 4762", "M4x10 ISO 4762", "#6-32 3/8\"", "Other", "Glue"]
 
+
+# the manifest of a frame module is read from its source without importing it: the class is named like the file (or
+# Frame for files ending with _) and may set joinOptions as a literal list
+def readFrameManifest(filename: str, data: bytes) -> dict:
+    module = filename.rpartition(".")[0]
+    className = "Frame" if module.endswith("_") else module
+    entry = {"name": module.replace("_", " "), "isModule": True, "module": module, "className": className, "joinOptions": None, "configPath": ""}
+    try:
+        tree = ast.parse(data)
+    except (SyntaxError, ValueError):
+        # listed anyway, the error shows up once the module is imported
+        return entry
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == className:
+            for statement in node.body:
+                if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+                    target, value = statement.targets[0], statement.value
+                elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+                    target, value = statement.target, statement.value
+                else:
+                    continue
+                if isinstance(target, ast.Name) and target.id == "joinOptions":
+                    try:
+                        entry["joinOptions"] = [str(option) for option in ast.literal_eval(value)]
+                    except ValueError:
+                        entry["joinOptions"] = None
+    return entry
+
+
+def _frameFiles() -> List[Tuple[str, str]]:
+    # (key, path) of every frame module and frame model, folders that don't exist have no frames
+    files = []
+    if os.path.isdir(framesPath):
+        for filename in sorted(os.listdir(framesPath)):
+            if filename.endswith(".py") and filename != "AbstractFrame.py" and not filename.startswith(("_", ".")):
+                files.append(("modules/frames/" + filename, framesPath + filename))
+    if os.path.isdir(modelsPath):
+        for dirName in sorted(os.listdir(modelsPath)):
+            if not os.path.isdir(modelsPath + dirName):
+                continue
+            for filename in sorted(os.listdir(modelsPath + dirName)):
+                if filename.endswith(".f3d"):
+                    files.append(("resources/models/frames/" + dirName + "/" + filename, modelsPath + dirName + "/" + filename))
+    return files
+
+
+# the catalog holds the manifest, size, mtime and content hash of every frame, like the layout catalog only new or
+# changed files are read again. The hash is the version of the frame.
+def updateFrameCatalog() -> dict:
+    indexPath = framesPath + frameIndexFilename
+    catalog: dict = frameCatalogs.get(framesPath)
+    if catalog is None:
+        try:
+            with io.open(indexPath, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            catalog = index["frames"] if index.get("version") == frameIndexVersion else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            catalog = {}
+        frameCatalogs[framesPath] = catalog
+
+    changed = False
+    files = _frameFiles()
+    for key, path in files:
+        stat = os.stat(path)
+        entry = catalog.get(key)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            continue
+        with io.open(path, "rb") as file:
+            data = file.read()
+        contentHash = hashlib.sha1(data).hexdigest()
+        if entry is None or entry["hash"] != contentHash:
+            dirName, _, filename = key.rpartition("/")
+            if key.startswith("modules/"):
+                entry = readFrameManifest(filename, data)
+            else:
+                modelDir = dirName.rpartition("/")[2]
+                config = modelDir + "/config.json"
+                entry = {"name": filename.rpartition(".")[0].replace("_", " "), "isModule": False, "filename": filename,
+                         "filePath": modelDir + "/" + filename, "joinOptions": None,
+                         "configPath": config if os.path.isfile(modelsPath + config) else ""}
+            entry["hash"] = contentHash
+        entry["size"] = stat.st_size
+        entry["mtime"] = stat.st_mtime
+        catalog[key] = entry
+        changed = True
+    keys = set(key for key, path in files)
+    for key in [key for key in catalog if key not in keys]:
+        del catalog[key]
+        changed = True
+
+    if changed:
+        try:
+            with io.open(indexPath + ".tmp", "w", encoding="utf-8") as file:
+                file.write(json.dumps({"version": frameIndexVersion, "frames": catalog}, separators=(",", ":")))
+            os.replace(indexPath + ".tmp", indexPath)
+        except OSError:
+            # a read only add-in folder is fine, the catalog is just built again next time
+            logger.warning("unable to write the frame index %s", indexPath)
+    return catalog
+
+
+# all frames by name, nothing is imported, the modules are loaded once a frame is used
 def getFrames() -> dict:
-    dirPath = os.path.dirname(__file__) + "/modules/frames"
     frames: dict = {}
-    for filename in os.listdir(dirPath):
-        if filename.endswith(".py") and filename != "AbstractFrame.py":
-            name = filename.rpartition(".")[0].replace("_", " ")
-            frame = Frame()
-            frame.isModule = True
-            frame.filename = filename.replace(".py", "")
-            frames[name] = frame
-    
-    dirPath = os.path.dirname(__file__) + "/resources/models/frames"
-    for dirName in os.listdir(dirPath):
-        print(dirName)
-        for filename in os.listdir(dirPath + "/" + dirName):
-            if filename == "config.json":
-                # parseConfigFile
-                print("config file found")
-            if filename.endswith(".f3d"):
-                name = filename.rpartition(".")[0].replace("_", " ")
-                frame = Frame()
-                frame.isModule = False
-                frame.filename = filename
-                frame.filePath = dirName + "/" + filename
-                frames[name] = frame
+    for key, entry in sorted(updateFrameCatalog().items()):
+        frame = Frame()
+        frame.isModule = entry["isModule"]
+        frame.filename = entry["module"] if frame.isModule else entry["filename"]
+        frame.filePath = entry.get("filePath", "")
+        frame.className = entry.get("className", "")
+        frame.joinOptions = entry["joinOptions"]
+        frame.configPath = entry["configPath"]
+        frame.configAvailable = bool(frame.configPath)
+        frame.version = entry["hash"]
+        frames[entry["name"]] = frame
     return frames
 
 
-# returns a tuple with width and height as entries
-def getKeyboardPlateSize(keyboardObject: KeyboardObject, component: adsk.fusion.Component) -> Tuple[float, float]:
-    points = component.sketches.itemByName("Plate").sketchPoints
-    x = 0.0
-    y = 0.0
-    point: adsk.fusion.SketchPoint
-    for point in points:
-        if point.geometry.x > x:
-            x = point.geometry.x
-        if point.geometry.y > y:
-            y = point.geometry.y
-    # create points
-    return (x, y)
-
-
-def getPossibleSupportLocations() -> list:
-    print("finding possible support locations based on the layout")
-    return None
+# the join options from the manifest, modules that don't list them in their class have to be imported
+def getJoinOptions(frame: Frame) -> list:
+    if frame.joinOptions is not None:
+        return frame.joinOptions
+    if frame.isModule:
+        return frameClass(frame)().getSupportedJoinOptions()
+    return defaultJoinOptions
+
+
+# imports the module of a frame, only done when the frame is used
+def frameClass(frame: Frame) -> type:
+    className = frame.className or ("Frame" if frame.filename.endswith("_") else frame.filename)
+    return getattr(importlib.import_module(".modules.frames." + frame.filename, __package__), className)
+
+
+# returns a tuple with width and height as entries, kept for frame modules that don't use keyboardObject.plateSize
+def getKeyboardPlateSize(keyboardObject: KeyboardObject, component: adsk.fusion.Component = None) -> Tuple[float, float]:
+    return keyboardObject.plateSize()
+
+
+# centers (x, y) of round plate supports in sketch space, they keep the radius away from all cutouts and the spacing
+# to each other
+def getPossibleSupportLocations(keyboardObject: KeyboardObject, radius: float, spacing: float) -> list:
+    from .Occupancy import supportLocations
+
+    return supportLocations(keyboardObject, radius, spacing)
@@ -0,0 +1,204 @@
+# Author-Julian Pleines
+# Compiles the keyboard layout into flat plate geometry, this module must not use the Fusion API
+
+from array import array
+from typing import Iterator, List, Tuple
+
+from .KeyboardData import KeyboardObject
+from .Types import SupportDirection, SupportType
+
+# (width, height) of the through cut and of the lip for a horizontal support, vertical supports are rotated by 90°
+supportFootprints = {SupportType.CHERRYMX: ((0.33, 1.4), (0.5, 1.7))}
+
+
+# flat list of axis aligned rectangles (x, y is the lower left corner), every rectangle remembers its key
+class RectangleList:
+    def __init__(self):
+        self.x = array("d")
+        self.y = array("d")
+        self.width = array("d")
+        self.height = array("d")
+        self.key = array("i")
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, float, float]]:
+        return zip(self.x, self.y, self.width, self.height)
+
+    def item(self, index: int) -> Tuple[float, float, float, float]:
+        return (self.x[index], self.y[index], self.width[index], self.height[index])
+
+    def add(self, x: float, y: float, width: float, height: float, key: int):
+        self.x.append(x)
+        self.y.append(y)
+        self.width.append(width)
+        self.height.append(height)
+        self.key.append(key)
+
+    # adds one rectangle of the given size for every center, all arguments are columns of the same length
+    def extend(self, centerX: array, centerY: array, width: array, height: array, key: array):
+        self.x.extend(array("d", [x - w / 2 for x, w in zip(centerX, width)]))
+        self.y.extend(array("d", [y - h / 2 for y, h in zip(centerY, height)]))
+        self.width.extend(width)
+        self.height.extend(height)
+        self.key.extend(key)
+
+
+# the complete plate in sketch space (cm), the layout plate is extruded from 0 to plateThickness, cutouts and
+# supportCutouts cut through the plate, hooks and supportLips cut plateThickness - switchHookHeight from below
+class PlateGeometry:
+    def __init__(self):
+        self.width: float = 0.0
+        self.height: float = 0.0
+        self.outline = RectangleList()
+        # switch and support centers, key is the index of the key in reading order
+        self.switchX = array("d")
+        self.switchY = array("d")
+        self.switchKey = array("i")
+        self.supportX = array("d")
+        self.supportY = array("d")
+        self.supportDirection = array("b")
+        self.supportKey = array("i")
+        self.cutouts = RectangleList()
+        self.hooks = RectangleList()
+        self.supportCutouts = RectangleList()
+        self.supportLips = RectangleList()
+
+    def throughCuts(self) -> List[RectangleList]:
+        return [self.cutouts, self.supportCutouts]
+
+    def pocketCuts(self) -> List[RectangleList]:
+        return [self.hooks, self.supportLips]
+
+
+# everything that is cut around one center, the rectangles are relative to the center. Keys sharing a footprint only
+# differ in their position, so the footprint is sketched once and stamped onto all of its centers
+class Footprint:
+    def __init__(self, name: str):
+        self.name: str = name
+        self.throughCuts = RectangleList()
+        self.pocketCuts = RectangleList()
+        self.centerX = array("d")
+        self.centerY = array("d")
+        self.key = array("i")
+
+    def __len__(self) -> int:
+        return len(self.centerX)
+
+
+# returns (minX, minY, maxX, maxY) of all rectangles
+def rectanglesExtent(rectangleLists: List[RectangleList]) -> Tuple[float, float, float, float]:
+    minX = min((min(rectangles.x) for rectangles in rectangleLists if len(rectangles) > 0), default=0.0)
+    minY = min((min(rectangles.y) for rectangles in rectangleLists if len(rectangles) > 0), default=0.0)
+    maxX = max((max(x + width for x, width in zip(rectangles.x, rectangles.width)) for rectangles in rectangleLists if len(rectangles) > 0), default=0.0)
+    maxY = max((max(y + height for y, height in zip(rectangles.y, rectangles.height)) for rectangles in rectangleLists if len(rectangles) > 0), default=0.0)
+    return (minX, minY, maxX, maxY)
+
+
+# renders the rectangles as SVG, one user unit is one cm of sketch space and the y axis is flipped because it points
+# down in SVG
+def rectanglesToSvg(rectangleLists: List[RectangleList], width: float, height: float) -> str:
+    lines = ['<svg xmlns="http://www.w3.org/2000/svg" width="{0:.6f}cm" height="{1:.6f}cm" viewBox="0 0 {0:.6f} {1:.6f}">'.format(width, height)]
+    for rectangles in rectangleLists:
+        for x, y, w, h in rectangles:
+            lines.append('<rect x="{:.6f}" y="{:.6f}" width="{:.6f}" height="{:.6f}" fill="none" stroke="black"/>'.format(x, height - y - h, w, h))
+    lines.append("</svg>")
+    return "\n".join(lines)
+
+
+# layout units are transformed into sketch space with x * unit + xOffset and (top - y) * unit + yOffset, the layout
+# y axis points down, the sketch y axis up
+def sketchTransform(keyboardObject: KeyboardObject) -> Tuple[float, float, float, float]:
+    unit = keyboardObject.unit
+    top = keyboardObject.keyboardHeightInUnits - 1
+    xOffset = (unit - keyboardObject.switchWidth) / 2
+    yOffset = (keyboardObject.switchDepth / 2) + (unit - keyboardObject.switchWidth)
+    return (unit, xOffset, top, yOffset)
+
+
+def compilePlate(keyboardObject: KeyboardObject) -> PlateGeometry:
+    plate = PlateGeometry()
+    unit, xOffset, top, yOffset = sketchTransform(keyboardObject)
+
+    # collecting all centers in layout units, multi switch keys use their switch positions instead of the center
+    layout = keyboardObject.layout
+    switchX: List[float] = []
+    switchY: List[float] = []
+    for key in range(len(layout)):
+        if layout.multiSwitch[key]:
+            start, end = layout.switchOffsets[key], layout.switchOffsets[key + 1]
+            switchX += layout.switchX[start:end]
+            switchY += layout.switchY[start:end]
+            plate.switchKey.extend(array("i", [key]) * (end - start))
+        else:
+            switchX.append(layout.x[key])
+            switchY.append(layout.y[key])
+            plate.switchKey.append(key)
+    supportX = layout.supportX
+    supportY = layout.supportY
+    for key in range(len(layout)):
+        supports = layout.supportOffsets[key + 1] - layout.supportOffsets[key]
+        plate.supportDirection.extend(array("b", [layout.support[key]]) * supports)
+        plate.supportKey.extend(array("i", [key]) * supports)
+
+    # transforming the centers into sketch space, the layout y axis points down, the sketch y axis up
+    plate.switchX = array("d", [x * unit + xOffset for x in switchX])
+    plate.switchY = array("d", [(top - y) * unit + yOffset for y in switchY])
+    plate.supportX = array("d", [x * unit + xOffset for x in supportX])
+    plate.supportY = array("d", [(top - y) * unit + yOffset for y in supportY])
+
+    plate.width, plate.height = keyboardObject.plateSize()
+    plate.outline.add(0.0, 0.0, plate.width, plate.height, -1)
+
+    # switch cutouts and the hooks above and below each cutout
+    switches = len(plate.switchX)
+    switchWidth = array("d", [keyboardObject.switchWidth]) * switches
+    switchDepth = array("d", [keyboardObject.switchDepth]) * switches
+    hookWidth = array("d", [keyboardObject.switchHookWidth]) * switches
+    hookDepth = array("d", [keyboardObject.switchHookDepth]) * switches
+    hookDistance = (keyboardObject.switchDepth + keyboardObject.switchHookDepth) / 2
+    plate.cutouts.extend(plate.switchX, plate.switchY, switchWidth, switchDepth, plate.switchKey)
+    plate.hooks.extend(plate.switchX, array("d", [y - hookDistance for y in plate.switchY]), hookWidth, hookDepth, plate.switchKey)
+    plate.hooks.extend(plate.switchX, array("d", [y + hookDistance for y in plate.switchY]), hookWidth, hookDepth, plate.switchKey)
+
+    # stabilizer cutouts, a horizontal support uses the footprint as is, a vertical one rotated
+    if keyboardObject.supportType in supportFootprints:
+        cut, lip = supportFootprints[keyboardObject.supportType]
+        horizontal = [direction == SupportDirection.HORIZONTAL.value for direction in plate.supportDirection]
+        plate.supportCutouts.extend(plate.supportX, plate.supportY,
+                                    array("d", [cut[0] if h else cut[1] for h in horizontal]),
+                                    array("d", [cut[1] if h else cut[0] for h in horizontal]), plate.supportKey)
+        plate.supportLips.extend(plate.supportX, plate.supportY,
+                                 array("d", [lip[0] if h else lip[1] for h in horizontal]),
+                                 array("d", [lip[1] if h else lip[0] for h in horizontal]), plate.supportKey)
+    return plate
+
+
+# groups the cutouts of the plate by footprint: the switch pocket and one stabilizer pocket per direction
+def compileFootprints(plate: PlateGeometry, keyboardObject: KeyboardObject) -> List[Footprint]:
+    switch = Footprint("Switch")
+    hookDistance = (keyboardObject.switchDepth + keyboardObject.switchHookDepth) / 2
+    switch.throughCuts.add(-keyboardObject.switchWidth / 2, -keyboardObject.switchDepth / 2, keyboardObject.switchWidth, keyboardObject.switchDepth, -1)
+    for y in (-hookDistance, hookDistance):
+        switch.pocketCuts.add(-keyboardObject.switchHookWidth / 2, y - keyboardObject.switchHookDepth / 2, keyboardObject.switchHookWidth,
+                              keyboardObject.switchHookDepth, -1)
+    switch.centerX = array("d", plate.switchX)
+    switch.centerY = array("d", plate.switchY)
+    switch.key = array("i", plate.switchKey)
+    footprints = [switch]
+
+    if keyboardObject.supportType in supportFootprints:
+        cut, lip = supportFootprints[keyboardObject.supportType]
+        for direction in (SupportDirection.HORIZONTAL, SupportDirection.VERTICAL):
+            support = Footprint(direction.name.capitalize() + " Support")
+            cutWidth, cutHeight = cut if direction is SupportDirection.HORIZONTAL else reversed(cut)
+            lipWidth, lipHeight = lip if direction is SupportDirection.HORIZONTAL else reversed(lip)
+            support.throughCuts.add(-cutWidth / 2, -cutHeight / 2, cutWidth, cutHeight, -1)
+            support.pocketCuts.add(-lipWidth / 2, -lipHeight / 2, lipWidth, lipHeight, -1)
+            indices = [i for i, value in enumerate(plate.supportDirection) if value == direction.value]
+            support.centerX = array("d", [plate.supportX[i] for i in indices])
+            support.centerY = array("d", [plate.supportY[i] for i in indices])
+            support.key = array("i", [plate.supportKey[i] for i in indices])
+            footprints.append(support)
+    return [footprint for footprint in footprints if len(footprint) > 0]
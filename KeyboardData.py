@@ -1,6 +1,10 @@
 # Keyboard Data
 
-from typing import List
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    from .modules.frames.AbstractFrame import AbstractFrame
+    from .Types import KeyboardKey
 
 
 microcontrollers = ["Arduino Pro Micro", "Arduino Micro", "Arduino Uno", "Arduino Leonardo", "Teensy 2.0", "Bluepill"]
@@ -9,15 +13,15 @@ microcontrollerPins = {"Arduino Pro Micro": 18, "Arduino Micro": 20, "Arduino Un
 
 class KeyboardObject:
     def __init__(self):
-        from .modules.frames.AbstractFrame import AbstractFrame
-        from .Types import Frame, KeyboardKey, SupportType
+        from .Types import Frame, GenerationMode, LayoutArray, SupportType
 
-        self.layoutData: List[List[KeyboardKey]] = []
+        self.layout: LayoutArray = LayoutArray()
         self.layoutName: str = "ANSI 104 (100%)"
         self.microcontroller: str = microcontrollers[0]
         self.frameName: str = ""
+        self.joinOption: str = ""
         self.frame: Frame = None
-        self.frameModule: AbstractFrame
+        self.frameModule: AbstractFrame = None
         self.author: str = ""
         self.keys: int = 104
         self.switchWidth: float = 1.4
@@ -39,5 +43,53 @@ class KeyboardObject:
         self.splitFair: bool = True     # split model to equaly sized parts
         self.splitCenteredBetweenSwitches: bool = False
         self.splitBottomStraight: bool = True       # use the same top split or not
+        self.partSpacing: float = 0.5       # distance between the parts on a print plate
+        self.minBridgeWidth: float = 0.1    # thinner plate bridges between cutouts are reported
         self.parametricModel: bool = False
         self.fixedSketch: bool = True
+        self.generationMode: GenerationMode = GenerationMode.SKETCH
+        self.importSketches: bool = True    # import the key sketches as SVG instead of sketching every line
+        self.fastSolid: bool = False        # build temporary bodies and add them as one base feature
+        self.buildCache: bool = False       # reuse keyboards generated with the same layout and settings
+        self.cacheArchive: bool = True      # cache the keyboard component as archive, not only its plan
+        self.fitCheckerToleranceFrom: float = -0.01     # the FitChecker sweeps the switch cutout from -0.1mm
+        self.fitCheckerToleranceTo: float = 0.01        # to +0.1mm
+        self.fitCheckerToleranceStep: float = 0.002     # in 0.02mm steps
+        self.fitCheckerRows: int = 3        # pockets per tolerance
+
+    # every parameter change drops the cached extents, changes inside of the layout need invalidateExtents
+    def __setattr__(self, name: str, value):
+        object.__setattr__(self, name, value)
+        if name != "_plateSize":
+            object.__setattr__(self, "_plateSize", None)
+
+    def invalidateExtents(self):
+        self._plateSize = None
+
+    # width and height of the layout plate, the plate goes from (0, 0) to (width, height) in sketch space
+    def plateSize(self) -> Tuple[float, float]:
+        if self._plateSize is None:
+            maxX = max((x + width / 2 for x, width in zip(self.layout.x, self.layout.width)), default=0.0)
+            border = self.unit - self.switchWidth
+            self._plateSize = (maxX * self.unit + border, self.keyboardHeightInUnits * self.unit + border)
+        return self._plateSize
+
+    # the box (minX, minY, maxX, maxY) of the plate with the frame of a frame module around it, frame modules without a
+    # declared border only count with the plate
+    def keyboardBox(self) -> Tuple[float, float, float, float]:
+        width, height = self.plateSize()
+        frameModule = getattr(self, "frameModule", None)
+        border = 0.0
+        if frameModule is not None and frameModule.frameBorder is not None and self.frame is not None and self.frame.isModule:
+            border = frameModule.frameBorder
+        return (-border, -border, width + border, height + border)
+
+    # rows of key views on the layout, assigning rows of keys replaces the layout
+    @property
+    def layoutData(self) -> List[List["KeyboardKey"]]:
+        return self.layout.rows()
+
+    @layoutData.setter
+    def layoutData(self, rows: List[List["KeyboardKey"]]):
+        from .Types import LayoutArray
+        self.layout = LayoutArray.fromRows(rows)
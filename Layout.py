@@ -2,24 +2,62 @@
 # Creates the Layout Body for the Keyboard
 
 # import math
+from typing import List, Tuple
 
 import adsk.fusion
 import adsk.core
 
-from .Sketch import switchCutout, switchHookCutouts, createPlateBorder, supportCutout
+from .Sketch import createPlateBorder, importLoops, importRectangles, polygon, rectangle
+from .Geometry import Footprint, PlateGeometry, compileFootprints, compilePlate
 from .KeyboardData import KeyboardObject
+from .Occupancy import voidInfill
+from .Polygons import Loop, plateLoops
+from .Progress import ProgressReporter
+from .Trace import traced
+from .Types import GenerationMode
 
 Point = adsk.core.Point3D.create
 
 
-def create(progressDialog: adsk.core.ProgressDialog, component: adsk.fusion.Component, keyboardObject: KeyboardObject):
+@traced
+def create(progress: ProgressReporter, component: adsk.fusion.Component, keyboardObject: KeyboardObject):
+    createSketches(progress, component, keyboardObject)
+    extrudeSketches(progress, component, keyboardObject)
+
+
+# the number of progress steps createSketches and extrudeSketches make in every stage
+def progressSteps(keyboardObject: KeyboardObject) -> dict:
+    plate = compilePlate(keyboardObject)
+    if keyboardObject.generationMode is GenerationMode.PATTERN:
+        footprints = compileFootprints(plate, keyboardObject)
+        return {"sketch": len(footprints), "recompute": 0, "extrude": sum(len(footprint) for footprint in footprints)}
+    loops = layoutLoops(plate, keyboardObject)
+    profiles = sum(len(level) for level in loops) if loops is not None else sum(len(rectangles) for rectangles in plate.throughCuts() + plate.pocketCuts())
+    return {"sketch": keyboardObject.keys, "recompute": 1, "extrude": profiles}
+
+
+# the unioned cut loops (through, pockets) or None if every rectangle has to be sketched on its own, parametric
+# models need the rectangles for their dimensions
+def layoutLoops(plate: PlateGeometry, keyboardObject: KeyboardObject) -> Tuple[List[Loop], List[Loop]]:
+    if keyboardObject.parametricModel:
+        return None
+    return plateLoops(plate)
+
+
+@traced
+def createSketches(progress: ProgressReporter, component: adsk.fusion.Component, keyboardObject: KeyboardObject):
     sketches = component.sketches
     xyPlane = component.xYConstructionPlane
+    progress.stage("sketch", "Sketching Keys")
 
     # ---------------------------- LAYOUT SKETCH --------------------------------------------------
     plateSketch = sketches.add(xyPlane)
     plateSketch.name = "Plate"
 
+    if keyboardObject.generationMode is GenerationMode.PATTERN:
+        createPatternSketches(plateSketch, component, progress, keyboardObject)
+        return
+
     cutoutSketch = sketches.add(xyPlane)
     cutoutSketch.name = "Cutout"
     cutoutSketch.isComputeDeferred = True
@@ -28,54 +66,67 @@ def create(progressDialog: adsk.core.ProgressDialog, component: adsk.fusion.Comp
     hooksSketch.name = "Hooks"
     hooksSketch.isComputeDeferred = True
 
-    createLayoutSketches(plateSketch, cutoutSketch, hooksSketch, progressDialog, keyboardObject)
+    createLayoutSketches(plateSketch, cutoutSketch, hooksSketch, progress, keyboardObject)
 
-    progressDialog.message = "Recomputing sketches"
+    progress.stage("recompute", "Recomputing sketches")
     plateSketch.isComputeDeferred = False
     cutoutSketch.isComputeDeferred = False
     hooksSketch.isComputeDeferred = False
+    progress.step()
+
+
+# extrudes the sketches created by createSketches
+@traced
+def extrudeSketches(progress: ProgressReporter, component: adsk.fusion.Component, keyboardObject: KeyboardObject):
+    plateSketch = component.sketches.itemByName("Plate")
+    cutoutSketch = component.sketches.itemByName("Cutout")
+    hooksSketch = component.sketches.itemByName("Hooks")
 
     # --------------------------- LAYOUT EXTRUDE --------------------------------------------------
 
     # create the basic frame
     plateProfile = plateSketch.profiles.item(0)
 
-    progressDialog.message = "Creating Extrusion 1/3"
+    progress.stage("extrude", "Creating Extrusion 1/3")
     extInput = component.features.extrudeFeatures.createInput(plateProfile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
     distance = adsk.core.ValueInput.createByReal(keyboardObject.plateThickness)
     extInput.setDistanceExtent(False, distance)
-    progressDialog.message = "Extruding 1/3"
+    progress.setMessage("Extruding 1/3")
     extrude = component.features.extrudeFeatures.add(extInput)
     extrude.bodies.item(0).name = "Layout Plate"
 
+    if keyboardObject.generationMode is GenerationMode.PATTERN:
+        extrudePatternSketches(progress, component, extrude.bodies.item(0), keyboardObject)
+        return
+
     cutouts = cutoutSketch.profiles
 
     # finding the outer loop thus the profile responsible for the overall shape
-    progressDialog.message = "Creating Extrusion 2/3"
+    progress.setMessage("Creating Extrusion 2/3")
     collection = adsk.core.ObjectCollection.create()
     for prof in cutouts:
-        progressDialog.progressValue += 1
+        progress.step()
         profile = adsk.fusion.Profile.cast(prof)
         collection.add(profile)
 
     extInput = component.features.extrudeFeatures.createInput(collection, adsk.fusion.FeatureOperations.CutFeatureOperation)
     distance = adsk.core.ValueInput.createByReal(keyboardObject.plateThickness)
     extInput.setDistanceExtent(False, distance)
-    progressDialog.message = "Extruding 2/3"
+    progress.setMessage("Extruding 2/3")
     extrude = component.features.extrudeFeatures.add(extInput)
 
-    progressDialog.message = "Creating Extrusion 3/3"
+    progress.setMessage("Creating Extrusion 3/3")
     hooks = hooksSketch.profiles
     collection.clear()
     for prof in hooks:
-        progressDialog.progressValue += 1
+        progress.step()
         profile = adsk.fusion.Profile.cast(prof)
         collection.add(profile)
 
     extInput = component.features.extrudeFeatures.createInput(collection, adsk.fusion.FeatureOperations.CutFeatureOperation)
     distance = adsk.core.ValueInput.createByReal(keyboardObject.plateThickness - keyboardObject.switchHookHeight)
     extInput.setDistanceExtent(False, distance)
-    progressDialog.message = "Extruding 3/3"
+    progress.setMessage("Extruding 3/3")
     extrude = component.features.extrudeFeatures.add(extInput)
 
     # plateSketch.isLightBulbOn = True
@@ -83,38 +134,187 @@ def create(progressDialog: adsk.core.ProgressDialog, component: adsk.fusion.Comp
     # hooksSketch.isLightBulbOn = True
 
 
-def createLayoutSketches(plateSketch: adsk.fusion.Sketch, cutoutSketch: adsk.fusion.Sketch, hooksSketch: adsk.fusion.Sketch, progressDialog: adsk.core.ProgressDialog, keyboardObject: KeyboardObject):
-    maxX = 0.0
-    maxY = 0.0
-    key = 1
-    xOffset = (keyboardObject.unit - keyboardObject.switchWidth) / 2
-    yOffset = (keyboardObject.switchDepth / 2) + (keyboardObject.unit - keyboardObject.switchWidth)
-    # creating the switch pockets
-    for row in keyboardObject.layoutData:
-        for entry in row:
-            progressDialog.progressValue += 1
-            progressDialog.message = "Sketching Keys (" + str(key) + "/" + str(keyboardObject.keys) + ")"
-            key += 1
-            if entry.isMultiSwitch:
-                for switch in entry.switches:
-                    switchCutout(cutoutSketch, (switch[0] * keyboardObject.unit) + xOffset, (((keyboardObject.keyboardHeightInUnits - 1) - switch[1]) * keyboardObject.unit) + yOffset, keyboardObject)
-                    switchHookCutouts(hooksSketch, (switch[0] * keyboardObject.unit) + xOffset, (((keyboardObject.keyboardHeightInUnits - 1) - switch[1]) * keyboardObject.unit) + yOffset, keyboardObject)
-                
-            else:
-                switchCutout(cutoutSketch, (entry.x * keyboardObject.unit) + xOffset, (((keyboardObject.keyboardHeightInUnits - 1) - entry.y) * keyboardObject.unit) + yOffset, keyboardObject)
-                switchHookCutouts(hooksSketch, (entry.x * keyboardObject.unit) + xOffset, (((keyboardObject.keyboardHeightInUnits - 1) - entry.y) * keyboardObject.unit) + yOffset, keyboardObject)
-            
-            if entry.support.isSupported():
-                for support in entry.supports:
-                    supportCutout(cutoutSketch, hooksSketch, (support[0] * keyboardObject.unit) + xOffset, (((keyboardObject.keyboardHeightInUnits - 1) - support[1]) * keyboardObject.unit) + yOffset, entry.support, keyboardObject)
-                print("creating Support")
-            
-            if entry.x + (entry.width / 2) > maxX:
-                maxX = entry.x + (entry.width / 2)
+def createLayoutSketches(plateSketch: adsk.fusion.Sketch, cutoutSketch: adsk.fusion.Sketch, hooksSketch: adsk.fusion.Sketch, progress: ProgressReporter, keyboardObject: KeyboardObject):
+    # all coordinates are computed upfront, the sketches only replay the plate geometry
+    plate = compilePlate(keyboardObject)
+
+    # overlapping and touching cutouts are merged first, every loop becomes a single profile
+    loops = layoutLoops(plate, keyboardObject)
+    if loops is not None:
+        createLoopSketches(cutoutSketch, hooksSketch, plate, loops, progress, keyboardObject)
+        createPlateBorder(plateSketch, plate.width, plate.height, keyboardObject)
+        return
+
+    # the cutouts and hooks are imported in one go, sketching every rectangle is the fallback and needed for
+    # parametric models
+    imported = keyboardObject.importSketches and not keyboardObject.parametricModel
+    if imported:
+        progress.setMessage("Importing Key Sketches")
+    if imported and importRectangles(cutoutSketch, plate.throughCuts(), plate.width, plate.height):
+        progress.step(keyboardObject.keys)
+    else:
+        # creating the switch pockets
+        lastKey = -1
+        for i in range(len(plate.cutouts)):
+            if plate.switchKey[i] != lastKey:
+                lastKey = plate.switchKey[i]
+                progress.step(1, "Sketching Keys ({}/{})", lastKey + 1, keyboardObject.keys)
+            x, y, width, height = plate.cutouts.item(i)
+            rectangle(cutoutSketch, x, y, width, height, keyboardObject)
+        # creating the support cutouts
+        for x, y, width, height in plate.supportCutouts:
+            rectangle(cutoutSketch, x, y, width, height, keyboardObject)
+    if not (imported and importRectangles(hooksSketch, plate.pocketCuts(), plate.width, plate.height)):
+        for x, y, width, height in plate.hooks:
+            rectangle(hooksSketch, x, y, width, height, keyboardObject)
+        for x, y, width, height in plate.supportLips:
+            rectangle(hooksSketch, x, y, width, height, keyboardObject)
+
     # creating the outer border
-    createPlateBorder(plateSketch, (maxX * keyboardObject.unit) + (keyboardObject.unit - keyboardObject.switchWidth), (keyboardObject.keyboardHeightInUnits * keyboardObject.unit) + (keyboardObject.unit - keyboardObject.switchWidth), keyboardObject)
+    createPlateBorder(plateSketch, plate.width, plate.height, keyboardObject)
+
+
+def createLoopSketches(cutoutSketch: adsk.fusion.Sketch, hooksSketch: adsk.fusion.Sketch, plate: PlateGeometry, loops: Tuple[List[Loop], List[Loop]],
+                       progress: ProgressReporter, keyboardObject: KeyboardObject):
+    through, pockets = loops
+    if keyboardObject.importSketches:
+        progress.setMessage("Importing Key Sketches")
+        if importLoops(cutoutSketch, through, plate.width, plate.height) and importLoops(hooksSketch, pockets, plate.width, plate.height):
+            progress.step(keyboardObject.keys)
+            return
+        # a failed import leaves nothing behind in its sketch, a successful one is cleared for the per line path
+        for sketch in (cutoutSketch, hooksSketch):
+            lines = adsk.core.ObjectCollection.create()
+            for line in sketch.sketchCurves.sketchLines:
+                lines.add(line)
+            for line in lines:
+                line.deleteMe()
+
+    # the progress runs over the keys, the loops are spread over them
+    total = len(through) + len(pockets)
+    for i, (sketch, loop) in enumerate([(cutoutSketch, loop) for loop in through] + [(hooksSketch, loop) for loop in pockets]):
+        polygon(sketch, loop, keyboardObject)
+        steps = keyboardObject.keys * (i + 1) // total - keyboardObject.keys * i // total
+        if steps:
+            progress.step(steps, "Sketching Keys ({}/{})", keyboardObject.keys * (i + 1) // total, keyboardObject.keys)
 
 
-def createVoidInfill(voidHeight: float):
-    # creates an extrusion for the part of the layout that is not used for keys
-    return None
+# sketches one pocket per footprint at the first center of the footprint, the sketch entities only depend on the
+# number of footprints, not on the number of keys
+def createPatternSketches(plateSketch: adsk.fusion.Sketch, component: adsk.fusion.Component, progress: ProgressReporter, keyboardObject: KeyboardObject):
+    plate = compilePlate(keyboardObject)
+    for footprint in compileFootprints(plate, keyboardObject):
+        progress.setMessage("Sketching {} Pocket", footprint.name)
+        sketch = component.sketches.add(component.xYConstructionPlane)
+        sketch.name = footprint.name + " Pocket"
+        sketch.isComputeDeferred = True
+        for rectangles in (footprint.throughCuts, footprint.pocketCuts):
+            for x, y, width, height in rectangles:
+                rectangle(sketch, footprint.centerX[0] + x, footprint.centerY[0] + y, width, height, keyboardObject)
+        sketch.isComputeDeferred = False
+        progress.step()
+    createPlateBorder(plateSketch, plate.width, plate.height, keyboardObject)
+
+
+# extrudes the pocket of every footprint into a tool body, stamps copies of it onto all other centers and cuts all of
+# them out of the layout plate with a single combine
+def extrudePatternSketches(progress: ProgressReporter, component: adsk.fusion.Component, plateBody: adsk.fusion.BRepBody, keyboardObject: KeyboardObject):
+    plate = compilePlate(keyboardObject)
+    toolBodies = adsk.core.ObjectCollection.create()
+    stampedBodies = []
+    for footprint in compileFootprints(plate, keyboardObject):
+        progress.setMessage("Extruding {} Pocket", footprint.name)
+        pocket = extrudeFootprint(component, component.sketches.itemByName(footprint.name + " Pocket"), footprint, keyboardObject)
+        toolBodies.add(pocket)
+        progress.setMessage("Stamping {} Pockets ({})", footprint.name, len(footprint))
+        stamped = stampFootprint(progress, pocket, footprint)
+        if stamped is not None:
+            stampedBodies.append(stamped)
+
+    # the stamped pockets are committed in one go, parametric designs need a base feature for that
+    if stampedBodies:
+        design = adsk.fusion.Design.cast(component.parentDesign)
+        baseFeature = None
+        if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+            baseFeature = component.features.baseFeatures.add()
+            baseFeature.startEdit()
+        for stamped in stampedBodies:
+            toolBodies.add(component.bRepBodies.add(stamped, baseFeature) if baseFeature is not None else component.bRepBodies.add(stamped))
+        if baseFeature is not None:
+            baseFeature.finishEdit()
+
+    progress.setMessage("Cutting Pockets")
+    combineInput = component.features.combineFeatures.createInput(plateBody, toolBodies)
+    combineInput.operation = adsk.fusion.FeatureOperations.CutFeatureOperation
+    combineInput.isKeepToolBodies = False
+    component.features.combineFeatures.add(combineInput)
+
+
+# the whole footprint is extruded to the pocket depth, the through cuts are then extruded to the full plate thickness
+def extrudeFootprint(component: adsk.fusion.Component, sketch: adsk.fusion.Sketch, footprint: Footprint, keyboardObject: KeyboardObject) -> adsk.fusion.BRepBody:
+    extrudes = component.features.extrudeFeatures
+    profiles = adsk.core.ObjectCollection.create()
+    throughProfiles = adsk.core.ObjectCollection.create()
+    for prof in sketch.profiles:
+        profile = adsk.fusion.Profile.cast(prof)
+        profiles.add(profile)
+        box = profile.boundingBox
+        for x, y, width, height in footprint.throughCuts:
+            x += footprint.centerX[0]
+            y += footprint.centerY[0]
+            if box.minPoint.x >= x - 1e-6 and box.minPoint.y >= y - 1e-6 and box.maxPoint.x <= x + width + 1e-6 and box.maxPoint.y <= y + height + 1e-6:
+                throughProfiles.add(profile)
+                break
+
+    extInput = extrudes.createInput(profiles, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extInput.setDistanceExtent(False, adsk.core.ValueInput.createByReal(keyboardObject.plateThickness - keyboardObject.switchHookHeight))
+    pocket = extrudes.add(extInput).bodies.item(0)
+    pocket.name = footprint.name + " Pocket"
+
+    extInput = extrudes.createInput(throughProfiles, adsk.fusion.FeatureOperations.JoinFeatureOperation)
+    extInput.setDistanceExtent(False, adsk.core.ValueInput.createByReal(keyboardObject.plateThickness))
+    extInput.participantBodies = [pocket]
+    extrudes.add(extInput)
+    return pocket
+
+
+# copies the pocket onto every other center of the footprint and unions the copies into one temporary body, returns
+# None if the footprint has only one center
+def stampFootprint(progress: ProgressReporter, pocket: adsk.fusion.BRepBody, footprint: Footprint) -> adsk.fusion.BRepBody:
+    temporaryBRep = adsk.fusion.TemporaryBRepManager.get()
+    stamped = None
+    progress.step()
+    for x, y in zip(footprint.centerX[1:], footprint.centerY[1:]):
+        copy = temporaryBRep.copy(pocket)
+        transform = adsk.core.Matrix3D.create()
+        transform.translation = adsk.core.Vector3D.create(x - footprint.centerX[0], y - footprint.centerY[0], 0)
+        temporaryBRep.transform(copy, transform)
+        if stamped is None:
+            stamped = copy
+        else:
+            temporaryBRep.booleanOperation(stamped, copy, adsk.fusion.BooleanTypes.UnionBooleanType)
+        progress.step()
+    return stamped
+
+
+# creates an extrusion below the layout plate for the parts of the plate that are not used for keys
+@traced
+def createVoidInfill(component: adsk.fusion.Component, keyboardObject: KeyboardObject, voidHeight: float):
+    rectangles = voidInfill(keyboardObject, keyboardObject.unit / 2)
+    if not rectangles:
+        return
+    infillSketch = component.sketches.add(component.xYConstructionPlane)
+    infillSketch.name = "Void Infill"
+    infillSketch.isComputeDeferred = True
+    for x, y, width, height in rectangles:
+        rectangle(infillSketch, x, y, width, height, keyboardObject)
+    infillSketch.isComputeDeferred = False
+
+    collection = adsk.core.ObjectCollection.create()
+    for profile in infillSketch.profiles:
+        collection.add(profile)
+    extInput = component.features.extrudeFeatures.createInput(collection, adsk.fusion.FeatureOperations.JoinFeatureOperation)
+    extInput.setDistanceExtent(False, adsk.core.ValueInput.createByReal(-voidHeight))
+    extInput.participantBodies = [component.bRepBodies.itemByName("Layout Plate")]
+    component.features.extrudeFeatures.add(extInput)
+    infillSketch.isLightBulbOn = False
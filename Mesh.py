@@ -0,0 +1,244 @@
+# Author-Julian Pleines
+# Meshes the layout plate without Fusion and writes it as binary STL or 3MF. The plate is raster into cells between
+# all rectangle edges, every cell is solid, a pocket (material from plateThickness - switchHookHeight up) or cut
+# through. Faces are merged into strips and split wherever another face has a vertex on their border, so the mesh is
+# closed without T-junctions. This module must not use the Fusion API.
+
+import struct
+import zipfile
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+from typing import BinaryIO, Dict, List, Tuple
+
+from .Export import scale
+from .Geometry import PlateGeometry, compilePlate
+from .KeyboardData import KeyboardObject
+
+THROUGH = 0
+POCKET = 1
+SOLID = 2
+
+Point = Tuple[float, float, float]
+
+
+class TriangleMesh:
+    def __init__(self):
+        # flat x, y, z per vertex and three vertex indices per triangle, counter clockwise seen from outside
+        self.vertices = array("d")
+        self.triangles = array("I")
+        self._indices: Dict[Point, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.triangles) // 3
+
+    def vertex(self, point: Point) -> int:
+        index = self._indices.get(point)
+        if index is None:
+            index = len(self.vertices) // 3
+            self._indices[point] = index
+            self.vertices.extend(point)
+        return index
+
+    def point(self, index: int) -> Point:
+        return (self.vertices[3 * index], self.vertices[3 * index + 1], self.vertices[3 * index + 2])
+
+    # every edge is used once in each direction if the mesh is closed and consistently oriented
+    def isWatertight(self) -> bool:
+        edges: Dict[Tuple[int, int], int] = {}
+        triangles = self.triangles
+        for i in range(0, len(triangles), 3):
+            a, b, c = triangles[i], triangles[i + 1], triangles[i + 2]
+            for edge in ((a, b), (b, c), (c, a)):
+                edges[edge] = edges.get(edge, 0) + 1
+        return all(edges.get((b, a), 0) == count for (a, b), count in edges.items())
+
+    def volume(self) -> float:
+        total = 0.0
+        for i in range(0, len(self.triangles), 3):
+            (ax, ay, az), (bx, by, bz), (cx, cy, cz) = (self.point(index) for index in self.triangles[i:i + 3])
+            total += ax * (by * cz - bz * cy) - ay * (bx * cz - bz * cx) + az * (bx * cy - by * cx)
+        return total / 6
+
+
+# the cells (first, end) between the edges a rectangle covers
+def _range(edges: array, low: float, high: float) -> Tuple[int, int]:
+    return (bisect_left(edges, low), bisect_left(edges, high))
+
+
+def plateCells(plate: PlateGeometry) -> Tuple[array, array, List[bytearray]]:
+    rectangleLists = plate.throughCuts() + plate.pocketCuts()
+    xEdges = array("d", sorted({0.0, plate.width} | {min(max(x, 0.0), plate.width) for rectangles in rectangleLists
+                                                      for x0, width in zip(rectangles.x, rectangles.width) for x in (x0, x0 + width)}))
+    yEdges = array("d", sorted({0.0, plate.height} | {min(max(y, 0.0), plate.height) for rectangles in rectangleLists
+                                                       for y0, height in zip(rectangles.y, rectangles.height) for y in (y0, y0 + height)}))
+    columns = len(xEdges) - 1
+    cells = [bytearray([SOLID]) * columns for row in range(len(yEdges) - 1)]
+    # pockets first, a through cut wins where both overlap
+    for state, rectangles in [(POCKET, rectangles) for rectangles in plate.pocketCuts()] + [(THROUGH, rectangles) for rectangles in plate.throughCuts()]:
+        for x, y, width, height in rectangles:
+            first, end = _range(xEdges, max(x, 0.0), min(x + width, plate.width))
+            if first >= end:
+                continue
+            fill = bytes([state]) * (end - first)
+            for row in range(*_range(yEdges, max(y, 0.0), min(y + height, plate.height))):
+                cells[row][first:end] = fill
+    return (xEdges, yEdges, cells)
+
+
+# runs (first, end, value) of equal values
+def _runs(values) -> List[Tuple[int, int, int]]:
+    runs = []
+    start = 0
+    for value, group in groupby(values):
+        length = sum(1 for _ in group)
+        runs.append((start, start + length, value))
+        start += length
+    return runs
+
+
+def meshPlate(plate: PlateGeometry, thickness: float, pocketDepth: float) -> TriangleMesh:
+    xEdges, yEdges, cells = plateCells(plate)
+    rows, columns = len(cells), len(xEdges) - 1
+    # the material of a cell goes from bottom[state] to the top of the plate
+    bottom = {SOLID: 0.0, POCKET: pocketDepth, THROUGH: thickness}
+    faces: List[List[Point]] = []
+
+    for row in range(rows):
+        y0, y1 = yEdges[row], yEdges[row + 1]
+        # top faces, bottom faces and pocket floors as strips along x
+        for first, end, material in _runs(state != THROUGH for state in cells[row]):
+            if material:
+                x0, x1 = xEdges[first], xEdges[end]
+                faces.append([(x0, y0, thickness), (x1, y0, thickness), (x1, y1, thickness), (x0, y1, thickness)])
+        for first, end, state in _runs(cells[row]):
+            if state != THROUGH:
+                x0, x1, z = xEdges[first], xEdges[end], bottom[state]
+                faces.append([(x0, y0, z), (x0, y1, z), (x1, y1, z), (x1, y0, z)])
+
+    # walls between neighbouring cells along x, the outside of the plate counts as cut through
+    outside = bytearray([THROUGH])
+    for row in range(rows):
+        y0, y1 = yEdges[row], yEdges[row + 1]
+        line = outside + cells[row] + outside
+        for column in range(columns + 1):
+            left, right = line[column], line[column + 1]
+            if left != right:
+                x = xEdges[column]
+                low, high = bottom[max(left, right)], bottom[min(left, right)]
+                if left > right:
+                    faces.append([(x, y0, low), (x, y1, low), (x, y1, high), (x, y0, high)])
+                else:
+                    faces.append([(x, y1, low), (x, y0, low), (x, y0, high), (x, y1, high)])
+    # walls along y, merged over the columns with the same pair of cells
+    empty = bytearray([THROUGH]) * columns
+    for row in range(rows + 1):
+        y = yEdges[row]
+        below = cells[row - 1] if row > 0 else empty
+        above = cells[row] if row < rows else empty
+        for first, end, (lower, upper) in _runs(zip(below, above)):
+            if lower != upper:
+                x0, x1 = xEdges[first], xEdges[end]
+                low, high = bottom[max(lower, upper)], bottom[min(lower, upper)]
+                if lower > upper:
+                    faces.append([(x1, y, low), (x0, y, low), (x0, y, high), (x1, y, high)])
+                else:
+                    faces.append([(x0, y, low), (x1, y, low), (x1, y, high), (x0, y, high)])
+    return _triangulate(faces)
+
+
+# splits every face border at the vertices of other faces on it and triangulates the faces
+def _triangulate(faces: List[List[Point]]) -> TriangleMesh:
+    mesh = TriangleMesh()
+    # vertices on every axis parallel line, keyed by the axis and the other two coordinates
+    lines: Dict[tuple, list] = {}
+    for face in faces:
+        for point in face:
+            mesh.vertex(point)
+    for x, y, z in mesh._indices:
+        lines.setdefault((0, y, z), []).append(x)
+        lines.setdefault((1, x, z), []).append(y)
+        lines.setdefault((2, x, y), []).append(z)
+    for positions in lines.values():
+        positions.sort()
+
+    triangles = mesh.triangles
+    for face in faces:
+        border: List[int] = []
+        for start, end in zip(face, face[1:] + face[:1]):
+            border.append(mesh.vertex(start))
+            axis = 0 if start[0] != end[0] else 1 if start[1] != end[1] else 2
+            key = (axis,) + tuple(value for i, value in enumerate(start) if i != axis)
+            positions = lines[key]
+            low, high = sorted((start[axis], end[axis]))
+            between = positions[bisect_right(positions, low):bisect_left(positions, high)]
+            if start[axis] > end[axis]:
+                between = between[::-1]
+            for position in between:
+                point = list(start)
+                point[axis] = position
+                border.append(mesh.vertex(tuple(point)))
+        if len(border) == 4:
+            triangles.extend((border[0], border[1], border[2], border[0], border[2], border[3]))
+        else:
+            # the faces are rectangles, a fan around the center never makes degenerated triangles
+            center = mesh.vertex(tuple(sum(point[i] for point in face) / 4 for i in range(3)))
+            for a, b in zip(border, border[1:] + border[:1]):
+                triangles.extend((center, a, b))
+    return mesh
+
+
+def keyboardMesh(keyboardObject: KeyboardObject) -> TriangleMesh:
+    return meshPlate(compilePlate(keyboardObject), keyboardObject.plateThickness,
+                     keyboardObject.plateThickness - keyboardObject.switchHookHeight)
+
+
+def writeStl(mesh: TriangleMesh, file: BinaryIO):
+    record = struct.Struct("<12fH")
+    file.write(b"UltimateKeyboardCreator plate".ljust(80, b" "))
+    file.write(struct.pack("<I", len(mesh)))
+    vertices, triangles = mesh.vertices, mesh.triangles
+    buffer = bytearray(record.size * len(mesh))
+    for i in range(len(mesh)):
+        a, b, c = 3 * triangles[3 * i], 3 * triangles[3 * i + 1], 3 * triangles[3 * i + 2]
+        ax, ay, az = vertices[a], vertices[a + 1], vertices[a + 2]
+        ux, uy, uz = vertices[b] - ax, vertices[b + 1] - ay, vertices[b + 2] - az
+        vx, vy, vz = vertices[c] - ax, vertices[c + 1] - ay, vertices[c + 2] - az
+        nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+        length = (nx * nx + ny * ny + nz * nz) ** 0.5 or 1.0
+        record.pack_into(buffer, i * record.size, nx / length, ny / length, nz / length,
+                         ax * scale, ay * scale, az * scale, vertices[b] * scale, vertices[b + 1] * scale, vertices[b + 2] * scale,
+                         vertices[c] * scale, vertices[c + 1] * scale, vertices[c + 2] * scale, 0)
+    file.write(buffer)
+
+
+def write3mf(mesh: TriangleMesh, filename: str):
+    vertices, triangles = mesh.vertices, mesh.triangles
+    model = ['<?xml version="1.0" encoding="UTF-8"?>\n<model unit="millimeter" xml:lang="en-US" '
+             'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n<resources>\n'
+             '<object id="1" type="model" name="Layout Plate">\n<mesh>\n<vertices>\n']
+    model += ['<vertex x="{:.4f}" y="{:.4f}" z="{:.4f}"/>\n'.format(vertices[i] * scale, vertices[i + 1] * scale, vertices[i + 2] * scale)
+              for i in range(0, len(vertices), 3)]
+    model.append("</vertices>\n<triangles>\n")
+    model += ['<triangle v1="{}" v2="{}" v3="{}"/>\n'.format(triangles[i], triangles[i + 1], triangles[i + 2]) for i in range(0, len(triangles), 3)]
+    model.append('</triangles>\n</mesh>\n</object>\n</resources>\n<build>\n<item objectid="1"/>\n</build>\n</model>\n')
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0" encoding="UTF-8"?>\n'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                         '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/></Types>')
+        archive.writestr("_rels/.rels", '<?xml version="1.0" encoding="UTF-8"?>\n'
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+                         'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/></Relationships>')
+        archive.writestr("3D/3dmodel.model", "".join(model))
+
+
+# writes the plate as .stl or .3mf, depending on the file extension
+def exportPlateMesh(keyboardObject: KeyboardObject, filename: str):
+    mesh = keyboardMesh(keyboardObject)
+    if filename.lower().endswith(".3mf"):
+        write3mf(mesh, filename)
+    else:
+        with open(filename, "wb") as file:
+            writeStl(mesh, file)
@@ -0,0 +1,217 @@
+# Author-Julian Pleines
+# Occupancy raster of the layout plate, every row of cells is one integer used as bit set so marking, growing and
+# inverting works on whole rows at once. Finds the empty areas of the plate for the void infill and the spots that
+# are free enough for plate supports. This module must not use the Fusion API.
+
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple
+
+from .Geometry import compilePlate, sketchTransform
+from .KeyboardData import KeyboardObject
+
+epsilon = 1e-6
+_runs = re.compile("1+")
+
+
+# cells between sorted edges, cell (column, row) spans xEdges[column]..xEdges[column + 1] and yEdges[row]..yEdges[row + 1]
+class OccupancyGrid:
+    def __init__(self, xEdges: List[float], yEdges: List[float]):
+        self.xEdges = array("d", xEdges)
+        self.yEdges = array("d", yEdges)
+        self.columns: int = len(xEdges) - 1
+        self.rows: int = len(yEdges) - 1
+        self.full: int = (1 << self.columns) - 1
+        # bit c of cells[r] is set if the cell is occupied
+        self.cells: List[int] = [0] * self.rows
+
+    @classmethod
+    def uniform(cls, width: float, height: float, resolution: float) -> "OccupancyGrid":
+        columns = max(math.ceil(width / resolution - epsilon), 1)
+        rows = max(math.ceil(height / resolution - epsilon), 1)
+        return cls([c * resolution for c in range(columns + 1)], [r * resolution for r in range(rows + 1)])
+
+    # the cells (first, end) an open interval overlaps
+    @staticmethod
+    def _range(edges: array, cells: int, low: float, high: float) -> Tuple[int, int]:
+        return (max(bisect_right(edges, low + epsilon) - 1, 0), min(bisect_left(edges, high - epsilon), cells))
+
+    def mark(self, minX: float, minY: float, maxX: float, maxY: float):
+        firstColumn, endColumn = self._range(self.xEdges, self.columns, minX, maxX)
+        firstRow, endRow = self._range(self.yEdges, self.rows, minY, maxY)
+        if firstColumn >= endColumn:
+            return
+        mask = ((1 << (endColumn - firstColumn)) - 1) << firstColumn
+        cells = self.cells
+        for row in range(firstRow, endRow):
+            cells[row] |= mask
+
+    # marks every cell closer than count cells to an occupied one
+    def grow(self, count: int):
+        cells = []
+        for row in self.cells:
+            grown, reach = row, 0
+            # doubling the reach with every shift, the last shift only adds what is still missing
+            while reach < count:
+                shift = min(reach + 1, count - reach)
+                grown |= (grown << shift) | (grown >> shift)
+                reach += shift
+            cells.append(grown & self.full)
+        for row in range(self.rows):
+            grown = 0
+            for other in range(max(row - count, 0), min(row + count + 1, self.rows)):
+                grown |= cells[other]
+            self.cells[row] = grown
+
+    def isFree(self, column: int, row: int) -> bool:
+        return not (self.cells[row] >> column) & 1
+
+    # runs of free cells (row, first, end) grouped into 4-connected components
+    def freeComponents(self) -> List[List[Tuple[int, int, int]]]:
+        runs: List[Tuple[int, int, int]] = []
+        rowStarts = [0]
+        for row, occupied in enumerate(self.cells):
+            bits = format(~occupied & self.full, "b")[::-1]
+            runs.extend((row, match.start(), match.end()) for match in _runs.finditer(bits))
+            rowStarts.append(len(runs))
+
+        parent = list(range(len(runs)))
+
+        def find(run: int) -> int:
+            while parent[run] != run:
+                parent[run] = parent[parent[run]]
+                run = parent[run]
+            return run
+
+        # runs of neighbouring rows that share a column belong together, both rows are sorted by their first column
+        for row in range(1, self.rows):
+            i, iEnd = rowStarts[row - 1], rowStarts[row]
+            j, jEnd = rowStarts[row], rowStarts[row + 1]
+            while i < iEnd and j < jEnd:
+                if runs[i][1] < runs[j][2] and runs[j][1] < runs[i][2]:
+                    parent[find(i)] = find(j)
+                if runs[i][2] < runs[j][2]:
+                    i += 1
+                else:
+                    j += 1
+
+        components = {}
+        for run in range(len(runs)):
+            components.setdefault(find(run), []).append(runs[run])
+        return list(components.values())
+
+    # the largest free rectangle (area, minX, minY, maxX, maxY) in sketch space, None if nothing is free
+    def largestFreeRectangle(self) -> Tuple[float, float, float, float, float]:
+        xEdges, yEdges = self.xEdges, self.yEdges
+        heights = [0.0] * (self.columns + 1)
+        best = None
+        for row in range(self.rows):
+            occupied = self.cells[row]
+            rowHeight = yEdges[row + 1] - yEdges[row]
+            for column in range(self.columns):
+                heights[column] = 0.0 if (occupied >> column) & 1 else heights[column] + rowHeight
+            # largest rectangle in the histogram, the columns have different widths
+            stack: List[Tuple[int, float]] = []
+            for column in range(self.columns + 1):
+                height = heights[column]
+                start = column
+                while stack and stack[-1][1] >= height:
+                    first, stackHeight = stack.pop()
+                    area = stackHeight * (xEdges[column] - xEdges[first])
+                    if area > epsilon and (best is None or area > best[0]):
+                        best = (area, xEdges[first], yEdges[row + 1] - stackHeight, xEdges[column], yEdges[row + 1])
+                    start = first
+                stack.append((start, height))
+        return best
+
+
+# the grid the key caps are raster into, the edges of every key are cell edges so the raster is exact
+def keyOccupancy(keyboardObject: KeyboardObject) -> OccupancyGrid:
+    layout = keyboardObject.layout
+    unit, xOffset, top, yOffset = sketchTransform(keyboardObject)
+    width, height = keyboardObject.plateSize()
+    boxes = []
+    for x, y, keyWidth, keyHeight in zip(layout.x, layout.y, layout.width, layout.height):
+        centerX = x * unit + xOffset
+        centerY = (top - y) * unit + yOffset
+        boxes.append((centerX - keyWidth * unit / 2, centerY - keyHeight * unit / 2, centerX + keyWidth * unit / 2, centerY + keyHeight * unit / 2))
+    xEdges = sorted({0.0, width} | {min(max(round(edge, 6), 0.0), width) for box in boxes for edge in (box[0], box[2])})
+    yEdges = sorted({0.0, height} | {min(max(round(edge, 6), 0.0), height) for box in boxes for edge in (box[1], box[3])})
+    grid = OccupancyGrid(xEdges, yEdges)
+    for box in boxes:
+        grid.mark(*box)
+    return grid
+
+
+# rectangles (x, y, width, height) that fill the plate where there are no keys, largest first. Rectangles narrower
+# than minSize are left out.
+def voidInfill(keyboardObject: KeyboardObject, minSize: float) -> List[Tuple[float, float, float, float]]:
+    grid = keyOccupancy(keyboardObject)
+    rectangles = []
+    while True:
+        best = grid.largestFreeRectangle()
+        if best is None:
+            break
+        area, minX, minY, maxX, maxY = best
+        # the largest rectangle may be a thin strip while a smaller but wider one is left, those are skipped as well
+        grid.mark(minX, minY, maxX, maxY)
+        if min(maxX - minX, maxY - minY) >= minSize - epsilon:
+            rectangles.append((minX, minY, maxX - minX, maxY - minY))
+    return rectangles
+
+
+# centers (x, y) of round plate supports with the radius, at least spacing apart. Supports keep the radius away from
+# every cutout and from the border of the plate.
+def supportLocations(keyboardObject: KeyboardObject, radius: float, spacing: float, resolution: float = 0.05) -> List[Tuple[float, float]]:
+    plate = compilePlate(keyboardObject)
+    grid = OccupancyGrid.uniform(plate.width, plate.height, resolution)
+    for rectangleList in plate.throughCuts() + plate.pocketCuts():
+        for x, y, width, height in rectangleList:
+            grid.mark(x, y, x + width, y + height)
+    # a free cell after growing is the center of a free square with the radius
+    cells = math.ceil(radius / resolution - epsilon)
+    for row in list(range(cells)) + list(range(grid.rows - cells, grid.rows)):
+        grid.cells[row] = grid.full
+    border = ((1 << cells) - 1) | (((1 << cells) - 1) << max(grid.columns - cells, 0))
+    grid.cells = [row | border for row in grid.cells]
+    grid.grow(cells)
+
+    # the free cell closest to the middle of every component, large components get a candidate per spacing
+    candidates = []
+    step = max(math.floor(spacing / resolution), 1)
+    for component in grid.freeComponents():
+        count = sum(end - first for row, first, end in component)
+        centerRow = sum(row * (end - first) for row, first, end in component) / count
+        centerColumn = sum((first + end - 1) / 2 * (end - first) for row, first, end in component) / count
+        targets = [(centerColumn, centerRow)]
+        minRow, maxRow = component[0][0], component[-1][0]
+        minColumn = min(first for row, first, end in component)
+        maxColumn = max(end for row, first, end in component)
+        if maxRow - minRow > step or maxColumn - minColumn > step:
+            targets += [(column, row) for row in range(minRow + step // 2, maxRow + 1, step) for column in range(minColumn + step // 2, maxColumn, step)]
+        rows = {}
+        for run in component:
+            rows.setdefault(run[0], []).append(run)
+        for targetColumn, targetRow in targets:
+            # rows are searched outwards from the target until they are further away than the nearest cell found
+            nearest = None
+            for row in sorted(rows, key=lambda row: abs(row - targetRow)):
+                if nearest is not None and (row - targetRow) ** 2 >= nearest[0]:
+                    break
+                for run, first, end in rows[row]:
+                    column = min(max(round(targetColumn), first), end - 1)
+                    distance = (column - targetColumn) ** 2 + (row - targetRow) ** 2
+                    if nearest is None or distance < nearest[0]:
+                        nearest = (distance, column, row)
+            candidates.append((count, nearest[1], nearest[2]))
+
+    # the supports of large free areas are placed first, all others keep the spacing to them
+    locations: List[Tuple[float, float]] = []
+    for count, column, row in sorted(candidates, key=lambda candidate: (-candidate[0], candidate[2], candidate[1])):
+        x = (grid.xEdges[column] + grid.xEdges[column + 1]) / 2
+        y = (grid.yEdges[row] + grid.yEdges[row + 1]) / 2
+        if all((x - otherX) ** 2 + (y - otherY) ** 2 >= spacing ** 2 for otherX, otherY in locations):
+            locations.append((x, y))
+    return locations
@@ -0,0 +1,134 @@
+# Author-Julian Pleines
+# Packs the split parts onto as few print plates as possible, MaxRects with the best short side fit and parts that may
+# be turned by 90°. This module must not use the Fusion API.
+
+import json
+from typing import List, Tuple
+
+epsilon = 1e-6
+
+
+class Placement:
+    def __init__(self, name: str, plate: int, x: float, y: float, width: float, depth: float, rotated: bool):
+        self.name: str = name
+        self.plate: int = plate
+        # lower left corner of the part on the plate and the size it takes up there
+        self.x: float = x
+        self.y: float = y
+        self.width: float = width
+        self.depth: float = depth
+        self.rotated: bool = rotated
+
+    def toDict(self) -> dict:
+        return {"name": self.name, "x": self.x, "y": self.y, "width": self.width, "depth": self.depth, "rotated": self.rotated}
+
+
+class PrintPlate:
+    def __init__(self, width: float, depth: float):
+        self.width: float = width
+        self.depth: float = depth
+        self.placements: List[Placement] = []
+        # maximal free rectangles (x, y, width, depth), they may overlap each other
+        self.free: List[Tuple[float, float, float, float]] = [(0.0, 0.0, width, depth)]
+
+    # the best free rectangle for a part of the given size as (shortSide, longSide, x, y) or None if it doesn't fit
+    def fit(self, width: float, depth: float) -> Tuple[float, float, float, float]:
+        best = None
+        for x, y, freeWidth, freeDepth in self.free:
+            if width <= freeWidth + epsilon and depth <= freeDepth + epsilon:
+                leftX = freeWidth - width
+                leftY = freeDepth - depth
+                score = (min(leftX, leftY), max(leftX, leftY), x, y)
+                if best is None or score < best:
+                    best = score
+        return best
+
+    def place(self, placement: Placement):
+        self.placements.append(placement)
+        usedX, usedY = placement.x, placement.y
+        usedMaxX, usedMaxY = usedX + placement.width, usedY + placement.depth
+        free = []
+        for x, y, width, depth in self.free:
+            maxX, maxY = x + width, y + depth
+            if usedX >= maxX - epsilon or usedMaxX <= x + epsilon or usedY >= maxY - epsilon or usedMaxY <= y + epsilon:
+                free.append((x, y, width, depth))
+                continue
+            # the parts of the free rectangle left, right, below and above of the used one
+            if usedX > x + epsilon:
+                free.append((x, y, usedX - x, depth))
+            if usedMaxX < maxX - epsilon:
+                free.append((usedMaxX, y, maxX - usedMaxX, depth))
+            if usedY > y + epsilon:
+                free.append((x, y, width, usedY - y))
+            if usedMaxY < maxY - epsilon:
+                free.append((x, usedMaxY, width, maxY - usedMaxY))
+        # rectangles inside of other free rectangles are never the best choice
+        self.free = [rectangle for i, rectangle in enumerate(free)
+                     if not any(j != i and _contains(other, rectangle) and (other != rectangle or j < i) for j, other in enumerate(free))]
+
+
+def _contains(outer: Tuple[float, float, float, float], inner: Tuple[float, float, float, float]) -> bool:
+    return (outer[0] <= inner[0] + epsilon and outer[1] <= inner[1] + epsilon
+            and inner[0] + inner[2] <= outer[0] + outer[2] + epsilon and inner[1] + inner[3] <= outer[1] + outer[3] + epsilon)
+
+
+class PackingPlan:
+    def __init__(self, printerWidth: float, printerDepth: float, spacing: float):
+        self.printerWidth: float = printerWidth
+        self.printerDepth: float = printerDepth
+        self.spacing: float = spacing
+        self.plates: List[PrintPlate] = []
+        # names of the parts that are larger than the printer in both orientations
+        self.unplaced: List[str] = []
+
+    def toDict(self) -> dict:
+        return {"printerWidth": self.printerWidth, "printerDepth": self.printerDepth, "spacing": self.spacing,
+                "plates": [[placement.toDict() for placement in plate.placements] for plate in self.plates],
+                "unplaced": self.unplaced}
+
+    def toJson(self) -> str:
+        return json.dumps(self.toDict(), indent=1)
+
+    def save(self, filename: str):
+        with open(filename, "w") as file:
+            file.write(self.toJson())
+
+
+# packs parts given as (name, width, depth) onto print plates with the spacing between the parts, the parts can come
+# from any number of keyboards.
+def packParts(parts: List[Tuple[str, float, float]], printerWidth: float, printerDepth: float, spacing: float = 0.0) -> PackingPlan:
+    plan = PackingPlan(printerWidth, printerDepth, spacing)
+    # every part is grown by the spacing on its right and upper side, so is the plate as the border needs none
+    usableWidth = printerWidth + spacing
+    usableDepth = printerDepth + spacing
+    order = sorted(parts, key=lambda part: (max(part[1], part[2]), part[1] * part[2]), reverse=True)
+    for name, width, depth in order:
+        width += spacing
+        depth += spacing
+        best = None
+        for index, plate in enumerate(plan.plates):
+            for rotated, (partWidth, partDepth) in ((False, (width, depth)), (True, (depth, width))):
+                fit = plate.fit(partWidth, partDepth)
+                if fit is not None and (best is None or fit[:2] < best[0][:2]):
+                    best = (fit, index, rotated, partWidth, partDepth)
+        if best is None:
+            # a new plate, the part goes in the orientation that leaves the longer free strip
+            plate = PrintPlate(usableWidth, usableDepth)
+            for rotated, (partWidth, partDepth) in ((False, (width, depth)), (True, (depth, width))):
+                fit = plate.fit(partWidth, partDepth)
+                if fit is not None and (best is None or fit[:2] > best[0][:2]):
+                    best = (fit, len(plan.plates), rotated, partWidth, partDepth)
+            if best is None:
+                plan.unplaced.append(name)
+                continue
+            plan.plates.append(plate)
+        (shortSide, longSide, x, y), index, rotated, partWidth, partDepth = best
+        plan.plates[index].place(Placement(name, index, x, y, partWidth, partDepth, rotated))
+
+    # the placements carry the spacing, the stored sizes are the ones of the part itself
+    for plate in plan.plates:
+        plate.width, plate.depth = printerWidth, printerDepth
+        for placement in plate.placements:
+            placement.width -= spacing
+            placement.depth -= spacing
+    return plan
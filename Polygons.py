@@ -0,0 +1,178 @@
+# Author-Julian Pleines
+# Unions the axis aligned cut rectangles of the plate into as few rectilinear polygons as possible, so the cutout,
+# hooks and stabilizer of a key (and touching keys) become one sketch loop per depth instead of one per rectangle.
+# This module must not use the Fusion API.
+
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from .Geometry import PlateGeometry, RectangleList
+
+epsilon = 1e-6
+
+Loop = List[Tuple[float, float]]
+
+
+# the loops are counter clockwise around material and clockwise around holes
+def signedArea(loop: Loop) -> float:
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(loop, loop[1:] + loop[:1])) / 2
+
+
+# pairs of rectangles (minX, minY, maxX, maxY) that overlap or share a piece of an edge, touching corners don't count
+def _touchingPairs(boxes: List[Tuple[float, float, float, float]]) -> List[Tuple[int, int]]:
+    pairs = []
+    # sweep along x, every box is compared with the boxes that are still open
+    order = sorted(range(len(boxes)), key=lambda box: boxes[box][0])
+    active: List[int] = []
+    for box in order:
+        minX, minY, maxX, maxY = boxes[box]
+        active = [other for other in active if boxes[other][2] >= minX - epsilon]
+        for other in active:
+            gapX = max(minX - boxes[other][2], boxes[other][0] - maxX)
+            gapY = max(minY - boxes[other][3], boxes[other][1] - maxY)
+            if max(gapX, gapY) <= epsilon and min(gapX, gapY) < -epsilon:
+                pairs.append((other, box))
+        active.append(box)
+    return pairs
+
+
+def _components(boxes: List[Tuple[float, float, float, float]]) -> List[List[int]]:
+    parent = list(range(len(boxes)))
+
+    def find(box: int) -> int:
+        while parent[box] != box:
+            parent[box] = parent[parent[box]]
+            box = parent[box]
+        return box
+
+    for box, other in _touchingPairs(boxes):
+        parent[find(box)] = find(other)
+    components: Dict[int, List[int]] = {}
+    for box in range(len(boxes)):
+        components.setdefault(find(box), []).append(box)
+    return list(components.values())
+
+
+# sorted edges with everything closer than epsilon snapped onto one value
+def _edges(values: List[float]) -> List[float]:
+    edges: List[float] = []
+    for value in sorted(values):
+        if not edges or value - edges[-1] > epsilon:
+            edges.append(value)
+    return edges
+
+
+def _traceComponent(boxes: List[Tuple[float, float, float, float]]) -> List[Loop]:
+    xEdges = _edges([x for box in boxes for x in (box[0], box[2])])
+    yEdges = _edges([y for box in boxes for y in (box[1], box[3])])
+    columns, rows = len(xEdges) - 1, len(yEdges) - 1
+    occupied = [[False] * columns for row in range(rows)]
+    for minX, minY, maxX, maxY in boxes:
+        firstColumn, endColumn = bisect_left(xEdges, minX - epsilon), bisect_left(xEdges, maxX - epsilon)
+        for row in range(bisect_left(yEdges, minY - epsilon), bisect_left(yEdges, maxY - epsilon)):
+            occupied[row][firstColumn:endColumn] = [True] * (endColumn - firstColumn)
+
+    def filled(column: int, row: int) -> bool:
+        return 0 <= column < columns and 0 <= row < rows and occupied[row][column]
+
+    # border edges between grid corners (column, row) with the material on their left
+    outgoing: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for row in range(rows):
+        for column in range(columns):
+            if not occupied[row][column]:
+                continue
+            if not filled(column, row - 1):
+                outgoing.setdefault((column, row), []).append((column + 1, row))
+            if not filled(column + 1, row):
+                outgoing.setdefault((column + 1, row), []).append((column + 1, row + 1))
+            if not filled(column, row + 1):
+                outgoing.setdefault((column + 1, row + 1), []).append((column, row + 1))
+            if not filled(column - 1, row):
+                outgoing.setdefault((column, row + 1), []).append((column, row))
+
+    loops: List[Loop] = []
+    for start in sorted(outgoing):
+        while outgoing[start]:
+            corners = [start]
+            current = outgoing[start].pop()
+            while current != start:
+                previous = corners[-1]
+                corners.append(current)
+                ends = outgoing[current]
+                if len(ends) > 1:
+                    # two cells that only share this corner, turning left keeps the loops apart
+                    direction = (current[0] - previous[0], current[1] - previous[1])
+                    left = (current[0] - direction[1], current[1] + direction[0])
+                    current = ends.pop(ends.index(left)) if left in ends else ends.pop()
+                else:
+                    current = ends.pop()
+            # only the corners where the direction changes are kept
+            loop = [corner for i, corner in enumerate(corners)
+                    if (corners[i - 1][0] - corner[0]) * (corners[(i + 1) % len(corners)][1] - corner[1])
+                    != (corners[i - 1][1] - corner[1]) * (corners[(i + 1) % len(corners)][0] - corner[0])]
+            loops.append([(xEdges[column], yEdges[row]) for column, row in loop])
+    return loops
+
+
+def _boxes(rectangleLists: List[RectangleList]) -> List[Tuple[float, float, float, float]]:
+    return [(x, y, x + width, y + height) for rectangles in rectangleLists for x, y, width, height in rectangles]
+
+
+# the outlines of the union of all boxes, outer loops are counter clockwise and holes clockwise
+def unionBoxes(boxes: List[Tuple[float, float, float, float]]) -> List[Loop]:
+    loops: List[Loop] = []
+    for component in sorted(_components(boxes)):
+        if len(component) == 1:
+            minX, minY, maxX, maxY = boxes[component[0]]
+            loops.append([(minX, minY), (maxX, minY), (maxX, maxY), (minX, maxY)])
+        else:
+            loops += _traceComponent([boxes[box] for box in component])
+    return loops
+
+
+def unionRectangles(rectangleLists: List[RectangleList]) -> List[Loop]:
+    return unionBoxes(_boxes(rectangleLists))
+
+
+# the area below a through cut is cut anyway, so a pocket that sits on the edge of a through cut may reach across it.
+# The hooks of a switch both grow across the switch cutout and become one rectangle.
+def _bridgePockets(pockets: List[Tuple[float, float, float, float]], through: List[Tuple[float, float, float, float]]) -> List[Tuple[float, float, float, float]]:
+    bridged = [list(box) for box in pockets]
+    for first, second in _touchingPairs(pockets + through):
+        if (first < len(pockets)) == (second < len(pockets)):
+            continue
+        pocket, cut = (first, second - len(pockets)) if first < len(pockets) else (second, first - len(pockets))
+        minX, minY, maxX, maxY = pockets[pocket]
+        cutMinX, cutMinY, cutMaxX, cutMaxY = through[cut]
+        box = bridged[pocket]
+        if cutMinX <= minX + epsilon and maxX <= cutMaxX + epsilon:
+            if abs(maxY - cutMinY) <= epsilon:
+                box[3] = max(box[3], cutMaxY)
+            elif abs(minY - cutMaxY) <= epsilon:
+                box[1] = min(box[1], cutMinY)
+        if cutMinY <= minY + epsilon and maxY <= cutMaxY + epsilon:
+            if abs(maxX - cutMinX) <= epsilon:
+                box[2] = max(box[2], cutMaxX)
+            elif abs(minX - cutMaxX) <= epsilon:
+                box[0] = min(box[0], cutMinX)
+    return [tuple(box) for box in bridged]
+
+
+# the loops cut through the plate and the loops cut to the hook depth. Returns None if a union has holes, their
+# islands would be cut as well.
+def plateLoops(plate: PlateGeometry) -> Tuple[List[Loop], List[Loop]]:
+    throughBoxes = _boxes(plate.throughCuts())
+    through = unionBoxes(throughBoxes)
+    pockets = unionBoxes(_bridgePockets(_boxes(plate.pocketCuts()), throughBoxes))
+    if any(signedArea(loop) < 0 for loop in through + pockets):
+        return None
+    return (through, pockets)
+
+
+# renders the loops as SVG paths, same coordinates as rectanglesToSvg
+def loopsToSvg(loops: List[Loop], width: float, height: float) -> str:
+    lines = ['<svg xmlns="http://www.w3.org/2000/svg" width="{0:.6f}cm" height="{1:.6f}cm" viewBox="0 0 {0:.6f} {1:.6f}">'.format(width, height)]
+    for loop in loops:
+        lines.append('<path d="M' + " L".join("{:.6f} {:.6f}".format(x, height - y) for x, y in loop) + ' Z" fill="none" stroke="black"/>')
+    lines.append("</svg>")
+    return "\n".join(lines)
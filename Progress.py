@@ -0,0 +1,99 @@
+# Author-Julian Pleines
+# Progress reporting for the keyboard generation, the dialog is only updated a few times per second and the time
+# spent in every stage is recorded
+
+import time
+from typing import Dict
+
+import adsk.core
+
+stageNames = ["parse", "fitchecker", "sketch", "recompute", "extrude", "frame", "split", "commit", "cache"]
+# the clock the dialog updates are throttled with, tools/benchmark.py replaces it to count the same updates every run
+updateClock = time.perf_counter
+
+
+class ProgressReporter:
+    def __init__(self, progressDialog: adsk.core.ProgressDialog, frameRate: float = 10.0):
+        self.progressDialog = progressDialog
+        self.interval: float = 1.0 / frameRate
+        self.plan: Dict[str, int] = {}
+        self.totalSteps: int = 0
+        self.value: int = 0
+        self.stageSeconds: Dict[str, float] = {}
+        self.stageSteps: Dict[str, int] = {}
+        self.currentStage: str = None
+        self.isShown: bool = False
+        self._stageStart: float = 0.0
+        self._nextUpdate: float = 0.0
+        self._message: str = ""
+        self._messageArgs: tuple = ()
+        self._shownValue: int = -1
+        self._shownMessage: str = None
+
+    # plan holds the number of steps of every stage that is going to run
+    def show(self, title: str, plan: Dict[str, int]):
+        self.plan = dict(plan)
+        self.totalSteps = max(sum(plan.values()), 1)
+        self.progressDialog.show(title, "Percentage: %p, Current Value: %v, Total steps: %m", 0, self.totalSteps, 1)
+        self.isShown = True
+        self._update(True)
+
+    # ends the current stage and starts the next one
+    def stage(self, name: str, message: str = "", *args):
+        now = time.perf_counter()
+        if self.currentStage is not None:
+            self.stageSeconds[self.currentStage] = self.stageSeconds.get(self.currentStage, 0.0) + now - self._stageStart
+        self.currentStage = name
+        self._stageStart = now
+        if message:
+            self.setMessage(message, *args)
+
+    # the message is only formatted if it is shown
+    def setMessage(self, message: str, *args):
+        self._message = message
+        self._messageArgs = args
+        self._update()
+
+    def step(self, count: int = 1, message: str = None, *args):
+        self.value += count
+        if self.currentStage is not None:
+            self.stageSteps[self.currentStage] = self.stageSteps.get(self.currentStage, 0) + count
+        if message is not None:
+            self._message = message
+            self._messageArgs = args
+        self._update()
+
+    def finish(self):
+        self.stage(None)
+        if self.isShown:
+            self._update(True)
+            self.progressDialog.hide()
+            self.isShown = False
+
+    @property
+    def totalSeconds(self) -> float:
+        return sum(self.stageSeconds.values())
+
+    def summary(self) -> str:
+        lines = []
+        for name in stageNames + [name for name in self.stageSeconds if name not in stageNames]:
+            if name in self.stageSeconds:
+                lines.append("{:<12}{:>10.1f}ms{:>8} steps".format(name, self.stageSeconds[name] * 1000, self.stageSteps.get(name, 0)))
+        lines.append("{:<12}{:>10.1f}ms{:>8} steps".format("total", self.totalSeconds * 1000, self.value))
+        return "\n".join(lines)
+
+    def _update(self, force: bool = False):
+        if not self.isShown:
+            return
+        now = updateClock()
+        if not force and now < self._nextUpdate:
+            return
+        self._nextUpdate = now + self.interval
+        value = min(self.value, self.totalSteps)
+        if value != self._shownValue:
+            self.progressDialog.progressValue = value
+            self._shownValue = value
+        message = self._message.format(*self._messageArgs) if self._messageArgs else self._message
+        if message != self._shownMessage:
+            self.progressDialog.message = message
+            self._shownMessage = message
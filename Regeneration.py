@@ -0,0 +1,158 @@
+# Author-Julian Pleines
+# Decides which stages of an existing keyboard have to be rebuilt when it is regenerated in place
+
+import json
+from enum import Enum
+
+import adsk.core
+import adsk.fusion
+
+from .KeyboardData import KeyboardObject
+
+attributeGroup = "UltimateKeyboardCreator"
+
+# every stage depends on all stages before it, rebuilding a stage rebuilds everything after it
+stages = ["layout", "sketches", "extrudes", "frame", "split"]
+
+# the first stage a parameter of the KeyboardObject affects, layoutDigest stands for the layout data itself
+parameterStages = {
+    "layoutDigest": "layout",
+    "doubleSwitchForSpace": "layout",
+    "supportKeySize": "layout",
+    "supportType": "layout",
+    "unit": "layout",
+    "switchWidth": "sketches",
+    "switchDepth": "sketches",
+    "switchHookWidth": "sketches",
+    "switchHookDepth": "sketches",
+    "fixedSketch": "sketches",
+    "parametricModel": "sketches",
+    "generationMode": "sketches",
+    "fastSolid": "sketches",
+    "plateThickness": "extrudes",
+    "switchHookHeight": "extrudes",
+    "frameName": "frame",
+    "frameOverPlateHeight": "frame",
+    "microcontroller": "frame",
+    "frameVersion": "frame",
+    "joinOption": "frame",
+    "makePrintable": "split",
+    "printerWidth": "split",
+    "printerDepth": "split",
+    "splitFair": "split",
+    "splitCenteredBetweenSwitches": "split",
+    "splitBottomStraight": "split",
+    "partSpacing": "split",
+}
+
+
+# the values of all parameters that influence the generated model
+def snapshot(keyboardObject: KeyboardObject) -> dict:
+    values = {}
+    for name in parameterStages:
+        if name == "layoutDigest":
+            values[name] = keyboardObject.layout.digest()
+        elif name == "frameVersion":
+            values[name] = keyboardObject.frame.version if keyboardObject.frame is not None else ""
+        else:
+            value = getattr(keyboardObject, name)
+            values[name] = value.name if isinstance(value, Enum) else value
+    return values
+
+
+def changedParameters(old: dict, new: dict) -> list:
+    return [name for name in parameterStages if old.get(name) != new.get(name)]
+
+
+# returns the first stage that has to be rebuilt or None if nothing changed
+def firstDirtyStage(old: dict, new: dict) -> str:
+    if old is None:
+        return stages[0]
+    changed = changedParameters(old, new)
+    if not changed:
+        return None
+    return stages[min(stages.index(parameterStages[name]) for name in changed)]
+
+
+def isDirty(firstDirty: str, stage: str) -> bool:
+    return firstDirty is not None and stages.index(stage) >= stages.index(firstDirty)
+
+
+# finds the last keyboard created by the UKC in the given component
+def findKeyboardOccurrence(rootComponent: adsk.fusion.Component) -> adsk.fusion.Occurrence:
+    found = None
+    occurrence: adsk.fusion.Occurrence
+    for occurrence in rootComponent.occurrences:
+        if occurrence.component.attributes.itemByName(attributeGroup, "parameters") is not None:
+            found = occurrence
+    return found
+
+
+def loadSnapshot(component: adsk.fusion.Component) -> dict:
+    attribute = component.attributes.itemByName(attributeGroup, "parameters")
+    return json.loads(attribute.value) if attribute is not None else None
+
+
+def storeSnapshot(component: adsk.fusion.Component, keyboardObject: KeyboardObject):
+    component.attributes.add(attributeGroup, "parameters", json.dumps(snapshot(keyboardObject)))
+
+
+# remembers where a stage starts in the timeline, called right before the stage creates anything
+def markStage(design: adsk.fusion.Design, component: adsk.fusion.Component, stage: str):
+    attribute = component.attributes.itemByName(attributeGroup, "timeline")
+    positions = json.loads(attribute.value) if attribute is not None else {}
+    positions[stage] = design.timeline.markerPosition
+    component.attributes.add(attributeGroup, "timeline", json.dumps(positions))
+
+
+# replaces the stage positions of this run with the entity tokens of everything the stages created, unlike the
+# positions the tokens stay valid when the user adds or removes something else in the timeline
+def recordStages(design: adsk.fusion.Design, component: adsk.fusion.Component):
+    attribute = component.attributes.itemByName(attributeGroup, "timeline")
+    if attribute is None:
+        return
+    positions = json.loads(attribute.value)
+    attribute.deleteMe()
+    recorded = component.attributes.itemByName(attributeGroup, "stages")
+    tokens = json.loads(recorded.value) if recorded is not None else {}
+    # the stages from the first rebuilt one on were rolled back, their entities are gone
+    for name in stages[min(stages.index(name) for name in positions):]:
+        tokens.pop(name, None)
+    timeline = design.timeline
+    marked = sorted(positions, key=lambda name: positions[name])
+    ends = [positions[name] for name in marked[1:]] + [timeline.markerPosition]
+    for name, end in zip(marked, ends):
+        tokens[name] = []
+        for index in range(positions[name], end):
+            entity = timeline.item(index).entity
+            if entity is not None:
+                tokens[name].append(entity.entityToken)
+    component.attributes.add(attributeGroup, "stages", json.dumps(tokens))
+
+
+# the component a recorded entity belongs to, occurrences have no parentComponent
+def _owner(entity) -> adsk.fusion.Component:
+    owner = getattr(entity, "parentComponent", None)
+    return owner if owner is not None else getattr(entity, "sourceComponent", None)
+
+
+# deletes what the given stage and all later stages created and nothing else, features the user or another keyboard
+# added stay. Returns False if the keyboard has no recorded stages or a recorded entity is gone or no longer part of
+# the component, the keyboard is built again then.
+def rollBack(design: adsk.fusion.Design, component: adsk.fusion.Component, stage: str) -> bool:
+    attribute = component.attributes.itemByName(attributeGroup, "stages")
+    if attribute is None:
+        return False
+    tokens = json.loads(attribute.value)
+    entities = []
+    # the layout stage doesn't create anything in the timeline, its results are the sketches
+    for name in stages[stages.index(stage):]:
+        for token in tokens.get(name, []):
+            found = design.findEntityByToken(token)
+            if len(found) != 1 or _owner(found[0]) != component:
+                return False
+            entities.append(found[0])
+    # the latest first, nothing is deleted before something that depends on it
+    for entity in reversed(entities):
+        entity.deleteMe()
+    return True
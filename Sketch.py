@@ -1,5 +1,6 @@
 import webbrowser
-import math
+import os
+import tempfile
 from typing import List
 
 import adsk.core
@@ -7,7 +8,11 @@ import adsk.fusion
 import adsk.cam
 
 from .KeyboardData import KeyboardObject
-from .Types import SupportType, SupportDirection
+from .Types import SupportDirection
+from .Trace import logger
+from .Geometry import RectangleList, rectanglesExtent, rectanglesToSvg, supportFootprints
+from .Polygons import Loop, loopsToSvg
+from .SplitPlanner import SplitBand, SplitPlan
 
 orientation = adsk.fusion.DimensionOrientations
 Point = adsk.core.Point3D.create
@@ -17,112 +22,50 @@ def createPlateBorder(sketch: adsk.fusion.Sketch, width: float, height: float, k
     rectangle(sketch, 0, 0, width, height, keyboardObject)
 
 
-def createSplit(sketch: adsk.fusion.Sketch, box: adsk.core.BoundingBox3D, keyboardObject: KeyboardObject):
-    # definitions for the split
-    minBridgeWidth = (keyboardObject.unit - keyboardObject.switchWidth) / 2
-    minBridgeHeight = (keyboardObject.unit - keyboardObject.switchDepth) / 2
-
-    width = box.maxPoint.x - box.minPoint.x
-    depth = box.maxPoint.y - box.minPoint.y
-    leftBorderWidth = - box.minPoint.x
-    lowerBorderWith = - box.minPoint.y
-    # TODO currently only able to split in half and only widthwise
-    # TODO handle key.switches and key.supports
-    if depth > keyboardObject.printerDepth and depth > keyboardObject.printerWidth:
-        # TODO check for the better dimension to split
-        print("Needs to split in 2 Dimensions...")
-    elif depth < keyboardObject.printerDepth and depth > keyboardObject.printerWidth:
-        print("use printer depth as Y axis")
-        dimensionX = keyboardObject.printerWidth
-        dimensionY = keyboardObject.printerDepth
-    elif depth > keyboardObject.printerDepth and depth < keyboardObject.printerWidth:
-        print("use printer width as Y axis")
-        dimensionX = keyboardObject.printerDepth
-        dimensionY = keyboardObject.printerWidth
-    elif depth < keyboardObject.printerDepth and depth < keyboardObject.printerWidth:
-        print("both dimensions are possible")
-        # TODO use the better one
-        dimensionX = keyboardObject.printerDepth
-        dimensionY = keyboardObject.printerWidth
-    else:
-        print("The splitted objects are exactly the printer size, treated as smaller printer. If the printer is a little bigger, change the value in the input")
-    
-    numberOfYSplits = math.ceil(width / dimensionX)
-    widthToSplit: float = width / numberOfYSplits if keyboardObject.splitFair else keyboardObject.printerWidth
-    print("Splitting this keyboard to " + str(widthToSplit * 10) + "mm parts")
-    splitXPosition = widthToSplit
-    splitPointsList: List[List[float]] = []
-    lowestX = width
-    done: bool = False
-    # TODO do this more advanced by checking for supports and key distances
-    while not done:
-        splitPoints: List[float] = []
-        for row in keyboardObject.layoutData:
-            # splitPoints.append(0.0)
-            matchingSwitchFound: bool = False
-            for entry in row:
-                pos = (entry.x + 0.5) * keyboardObject.unit + minBridgeWidth
-                if pos >= splitXPosition - leftBorderWidth:
-                    matchingSwitchFound = True
-                    if keyboardObject.splitCenteredBetweenSwitches:
-                        # TODO add this
-                        print("Do something here")
-                    else:
-                        if splitXPosition - leftBorderWidth > pos - keyboardObject.unit:
-                            splitPoints.append(pos - keyboardObject.unit)
-                        else:
-                            splitPoints.append(splitXPosition - leftBorderWidth)
-                    print(str((splitPoints[len(splitPoints) - 1] + leftBorderWidth) * 10) + "mm")
-                    lowestX = splitPoints[len(splitPoints) - 1] if lowestX > splitPoints[len(splitPoints) - 1] else lowestX
-                    break
-            if not matchingSwitchFound:
-                splitPoints.append(splitXPosition - leftBorderWidth)
-        splitPointsList.append(splitPoints)
-        if lowestX + widthToSplit > width:
-            done = True
-        else:
-            print("lowest x is: " + str(lowestX * 10) + "mm")
-            splitXPosition = lowestX + widthToSplit
-            lowestX = width
-
-    # lowest = width
-    # for point in splitPoints:
-    #     lowest = point if point < lowest else lowest
-    # # show user this message if splitting wasn't successful
-    # if width - lowest >= keyboardObject.printerWidth:
-    #     print("Shit, that does not fit on the printer")
-    #     app = adsk.core.Application.get()
-    #     ui = app.userInterface
-    #     text = "UKC was unable to slice the Keyboard to fit your printer.\nIf you think this should be possible, please try to recreate this error (using same inputs) and create an issue here: https://github.com/0xhexdec/UltimateKeyboardCreator/issues/\nPress OK to open this URL in your browser."
-    #     button = ui.messageBox(text, "Slicing Error", 1)
-    #     if button == adsk.core.DialogResults.DialogCancel:
-    #         print("canceled")
-    #     elif button == adsk.core.DialogResults.DialogOK:
-    #         webbrowser.open_new("https://github.com/0xhexdec/UltimateKeyboardCreator/issues/")
-
-    # create splitline
-    for splitPoints in splitPointsList:
-        i = len(splitPoints) * keyboardObject.unit + (keyboardObject.unit - keyboardObject.switchWidth) / 2
-        lastPoint: adsk.fusion.SketchPoint = None
-        for point in splitPoints:
-            if lastPoint is not None:
-                if lastPoint.geometry.x != point:
-                    line = sketch.sketchCurves.sketchLines.addByTwoPoints(lastPoint, Point(point, i, 0))
-                line = sketch.sketchCurves.sketchLines.addByTwoPoints(line.endSketchPoint, Point(point, i - keyboardObject.unit, 0))
-            else:
-                line = sketch.sketchCurves.sketchLines.addByTwoPoints(Point(point, i, 0), Point(point, i - keyboardObject.unit, 0))
-            lastPoint = line.endSketchPoint
-            i -= keyboardObject.unit
-    # sketch.isLightBulbOn = False
-
-
-def createSplitLine(sketch: adsk.fusion.Sketch, box: adsk.core.BoundingBox3D, keyboardObject: KeyboardObject):
-    width = box.maxPoint.x - box.minPoint.x
-    depth = box.maxPoint.y - box.minPoint.y
-    leftBorderWidth = - box.minPoint.x
-    lowerBorderWith = - box.minPoint.y
-    sketch.sketchCurves.sketchLines.addByTwoPoints(Point(width / 2 - leftBorderWidth, depth - lowerBorderWith, 0), Point(width / 2 - leftBorderWidth, -lowerBorderWith, 0))
-    sketch.isLightBulbOn = False
+# draws the straight cuts between the bands of the plan, every line splits everything it crosses
+def createHorizontalSplit(sketch: adsk.fusion.Sketch, plan: SplitPlan) -> List[adsk.fusion.SketchLine]:
+    lines = sketch.sketchCurves.sketchLines
+    return [lines.addByTwoPoints(Point(plan.minX, y, 0), Point(plan.maxX, y, 0)) for y in plan.horizontalCuts]
+
+
+# draws the stepped cuts of a band, every cut is returned as a collection of connected lines. The ends reach margin
+# over the band so the cut goes all the way through the bodies of the band.
+def createSplit(sketch: adsk.fusion.Sketch, band: SplitBand, margin: float) -> List[adsk.core.ObjectCollection]:
+    lines = sketch.sketchCurves.sketchLines
+    cuts = []
+    for i in range(len(band.cuts)):
+        points = band.polyline(i)
+        points[0] = (points[0][0], points[0][1] + margin)
+        points[-1] = (points[-1][0], points[-1][1] - margin)
+        cut = adsk.core.ObjectCollection.create()
+        lastPoint = Point(points[0][0], points[0][1], 0)
+        for (lastX, lastY), (x, y) in zip(points, points[1:]):
+            if lastX != x or lastY != y:
+                line = lines.addByTwoPoints(lastPoint, Point(x, y, 0))
+                cut.add(line)
+                lastPoint = line.endSketchPoint
+        cuts.append(cut)
+    return cuts
+
+
+# extrudes the connected lines of a cut into a surface reaching height above and below the sketch plane, the split
+# body feature takes a single body as splitting tool
+def createSplitSurface(component: adsk.fusion.Component, curves, height: float) -> adsk.fusion.BRepBody:
+    extrudes = component.features.extrudeFeatures
+    extrudeInput = extrudes.createInput(component.createOpenProfile(curves, False), adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extrudeInput.isSolid = False
+    extrudeInput.setSymmetricExtent(adsk.core.ValueInput.createByReal(height), False)
+    surface = extrudes.add(extrudeInput).bodies.item(0)
+    surface.name = "Split Surface"
+    surface.isLightBulbOn = False
+    return surface
+
+
+# draws a straight cut for every stepped cut of a band, used if the bottom is split straight
+def createSplitLine(sketch: adsk.fusion.Sketch, band: SplitBand, margin: float) -> List[adsk.fusion.SketchLine]:
+    lines = sketch.sketchCurves.sketchLines
+    return [lines.addByTwoPoints(Point(band.straightCut(i), band.maxY + margin, 0), Point(band.straightCut(i), band.minY - margin, 0))
+            for i in range(len(band.cuts))]
 
 
 # only usabe for "user readable" sketches, not used by the UKC for generating bodies
@@ -202,15 +145,16 @@ def switchHookCutouts(sketch: adsk.fusion.Sketch, x: float, y: float, keyboardOb
 
 
 def supportCutout(cutThroughSketch: adsk.fusion.Sketch, cutLipSketch: adsk.fusion.Sketch, x: float, y: float, supportDirection: SupportDirection, keyboardObject: KeyboardObject):
-    if keyboardObject.supportType == SupportType.CHERRYMX:
+    if keyboardObject.supportType in supportFootprints:
+        cut, lip = supportFootprints[keyboardObject.supportType]
         if supportDirection is SupportDirection.HORIZONTAL:
-            rectangle(cutThroughSketch, x - 0.165, y - 0.7, 0.33, 1.4, keyboardObject)
-            rectangle(cutLipSketch, x - 0.25, y - 0.85, 0.5, 1.7, keyboardObject)
+            rectangle(cutThroughSketch, x - cut[0] / 2, y - cut[1] / 2, cut[0], cut[1], keyboardObject)
+            rectangle(cutLipSketch, x - lip[0] / 2, y - lip[1] / 2, lip[0], lip[1], keyboardObject)
         elif supportDirection is SupportDirection.VERTICAL:
-            rectangle(cutThroughSketch, x - 0.7, y - 0.165, 1.4, 0.33, keyboardObject)
-            rectangle(cutLipSketch, x - 0.85, y - 0.25, 1.7, 0.5, keyboardObject)
+            rectangle(cutThroughSketch, x - cut[1] / 2, y - cut[0] / 2, cut[1], cut[0], keyboardObject)
+            rectangle(cutLipSketch, x - lip[1] / 2, y - lip[0] / 2, lip[1], lip[0], keyboardObject)
         else:
-            print("Direction Unknown")
+            logger.debug("Direction Unknown")
 
 
 def rectangle(sketch: adsk.fusion.Sketch, x: float, y: float, width: float, height: float, keyboardObject: KeyboardObject):
@@ -241,3 +185,70 @@ def rectangle(sketch: adsk.fusion.Sketch, x: float, y: float, width: float, heig
         geo.addVertical(rectangle.item(3))
 
     return rectangle
+
+
+# draws a closed rectilinear polygon, the lines share their end points
+def polygon(sketch: adsk.fusion.Sketch, loop: Loop, keyboardObject: KeyboardObject):
+    if len(loop) == 4:
+        (minX, minY), (maxX, maxY) = min(loop), max(loop)
+        return rectangle(sketch, minX, minY, maxX - minX, maxY - minY, keyboardObject)
+    lines = sketch.sketchCurves.sketchLines
+    first = previous = sketch.sketchPoints.add(Point(loop[0][0], loop[0][1], 0))
+    for x, y in loop[1:]:
+        line = lines.addByTwoPoints(previous, Point(x, y, 0))
+        previous = line.endSketchPoint
+        if keyboardObject.fixedSketch:
+            line.isFixed = True
+    line = lines.addByTwoPoints(previous, first)
+    if keyboardObject.fixedSketch:
+        line.isFixed = True
+
+
+# draws all rectangles with a single SVG import instead of one call per line, returns False if the import failed and
+# nothing was drawn so the rectangles have to be sketched one by one. Imported lines are neither fixed nor dimensioned.
+def importRectangles(sketch: adsk.fusion.Sketch, rectangleLists: List[RectangleList], width: float, height: float) -> bool:
+    if sum(len(rectangles) for rectangles in rectangleLists) == 0:
+        return True
+    return importSvg(sketch, rectanglesToSvg(rectangleLists, width, height), rectanglesExtent(rectangleLists))
+
+
+# draws all loops with a single SVG import, like importRectangles
+def importLoops(sketch: adsk.fusion.Sketch, loops: List[Loop], width: float, height: float) -> bool:
+    if not loops:
+        return True
+    extent = (min(x for loop in loops for x, y in loop), min(y for loop in loops for x, y in loop),
+              max(x for loop in loops for x, y in loop), max(y for loop in loops for x, y in loop))
+    return importSvg(sketch, loopsToSvg(loops, width, height), extent)
+
+
+# imports the SVG and checks that its content with the extent (minX, minY, maxX, maxY) ended up at the right place
+def importSvg(sketch: adsk.fusion.Sketch, svg: str, extent: tuple) -> bool:
+    handle, filename = tempfile.mkstemp(".svg")
+    try:
+        with os.fdopen(handle, "w") as file:
+            file.write(svg)
+        if not sketch.importSVG(filename, 0, 0, 1):
+            return False
+    except RuntimeError:
+        return False
+    finally:
+        os.remove(filename)
+
+    # the SVG is placed by its own bounding box, the imported lines are moved if they ended up somewhere else
+    minX, minY, maxX, maxY = extent
+    box = sketch.boundingBox
+    lines = adsk.core.ObjectCollection.create()
+    if abs((box.maxPoint.x - box.minPoint.x) - (maxX - minX)) > 1e-4 or abs((box.maxPoint.y - box.minPoint.y) - (maxY - minY)) > 1e-4:
+        # wrong scale, the per entity path is used instead
+        for line in sketch.sketchCurves.sketchLines:
+            lines.add(line)
+        for line in lines:
+            line.deleteMe()
+        return False
+    if abs(box.minPoint.x - minX) > 1e-4 or abs(box.minPoint.y - minY) > 1e-4:
+        for line in sketch.sketchCurves.sketchLines:
+            lines.add(line)
+        transform = adsk.core.Matrix3D.create()
+        transform.translation = adsk.core.Vector3D.create(minX - box.minPoint.x, minY - box.minPoint.y, 0)
+        sketch.move(lines, transform)
+    return True
@@ -0,0 +1,135 @@
+# Author-Julian Pleines
+# Builds the layout plate, the frame and the split parts as temporary bodies straight from the layout data. Only the
+# final bodies are added to the design, all of them in one base feature, so there are no sketches, extrudes or splits
+# in the timeline that Fusion has to recompute.
+
+from typing import Dict, List, Tuple
+
+import adsk.core
+import adsk.fusion
+
+from .Geometry import PlateGeometry
+from .KeyboardData import KeyboardObject
+from .SplitPlanner import SplitBand, SplitPlan
+
+# cutting tools reach this far over the bodies they cut, split tools reach this far up and down
+overlap = 0.1
+reach = 100.0
+
+
+def box(minX: float, minY: float, minZ: float, maxX: float, maxY: float, maxZ: float) -> adsk.fusion.BRepBody:
+    center = adsk.core.Point3D.create((minX + maxX) / 2, (minY + maxY) / 2, (minZ + maxZ) / 2)
+    orientedBox = adsk.core.OrientedBoundingBox3D.create(center, adsk.core.Vector3D.create(1, 0, 0), adsk.core.Vector3D.create(0, 1, 0),
+                                                         maxX - minX, maxY - minY, maxZ - minZ)
+    return adsk.fusion.TemporaryBRepManager.get().createBox(orientedBox)
+
+
+def cylinder(x: float, y: float, minZ: float, maxZ: float, radius: float) -> adsk.fusion.BRepBody:
+    return adsk.fusion.TemporaryBRepManager.get().createCylinderOrCone(adsk.core.Point3D.create(x, y, minZ), radius,
+                                                                       adsk.core.Point3D.create(x, y, maxZ), radius)
+
+
+# one body of all given bodies, None if there are none
+def union(bodies: List[adsk.fusion.BRepBody]) -> adsk.fusion.BRepBody:
+    temporaryBRep = adsk.fusion.TemporaryBRepManager.get()
+    result = None
+    for body in bodies:
+        if result is None:
+            result = body
+        else:
+            temporaryBRep.booleanOperation(result, body, adsk.fusion.BooleanTypes.UnionBooleanType)
+    return result
+
+
+def subtract(target: adsk.fusion.BRepBody, tool: adsk.fusion.BRepBody) -> adsk.fusion.BRepBody:
+    if tool is not None:
+        adsk.fusion.TemporaryBRepManager.get().booleanOperation(target, tool, adsk.fusion.BooleanTypes.DifferenceBooleanType)
+    return target
+
+
+# a box with rounded vertical edges, like an extruded rectangle with filleted corners
+def roundedBox(minX: float, minY: float, minZ: float, maxX: float, maxY: float, maxZ: float, radius: float) -> adsk.fusion.BRepBody:
+    if radius <= 0:
+        return box(minX, minY, minZ, maxX, maxY, maxZ)
+    return union([box(minX + radius, minY, minZ, maxX - radius, maxY, maxZ), box(minX, minY + radius, minZ, maxX, maxY - radius, maxZ)] +
+                 [cylinder(x, y, minZ, maxZ, radius) for x in (minX + radius, maxX - radius) for y in (minY + radius, maxY - radius)])
+
+
+def _rectangleBoxes(rectangleLists: list, minZ: float, maxZ: float) -> List[adsk.fusion.BRepBody]:
+    return [box(x, y, minZ, x + width, y + height, maxZ) for rectangles in rectangleLists for x, y, width, height in rectangles]
+
+
+# the plate with all cutouts, the hook and stabilizer pockets are cut from below like the extrudes of the layout do
+def plateBody(plate: PlateGeometry, keyboardObject: KeyboardObject) -> adsk.fusion.BRepBody:
+    thickness = keyboardObject.plateThickness
+    body = union(_rectangleBoxes([plate.outline], 0, thickness))
+    subtract(body, union(_rectangleBoxes(plate.throughCuts(), -overlap, thickness + overlap)))
+    subtract(body, union(_rectangleBoxes(plate.pocketCuts(), -overlap, thickness - keyboardObject.switchHookHeight)))
+    return body
+
+
+# the slabs (minX, minY, maxX, maxY) between two cuts of a band, a cut is one x per segment of the band. The first and
+# last band reach over the keyboard box so no body is cut off.
+def _bandSlabs(plan: SplitPlan, band: SplitBand, left: list, right: list) -> List[Tuple[float, float, float, float]]:
+    top = band.maxY + overlap if band.maxY >= max(other.maxY for other in plan.bands) else band.maxY
+    bottom = band.minY - overlap if band.minY <= min(other.minY for other in plan.bands) else band.minY
+    slabs = []
+    for i, (low, high) in enumerate(band.segments):
+        maxY = top if i == 0 else band.segments[i - 1][0]
+        minY = bottom if i == len(band.segments) - 1 else low
+        if left[i] < right[i] and minY < maxY:
+            slabs.append((left[i], minY, right[i], maxY))
+    return slabs
+
+
+# the regions of all parts from left to right and band by band, straight parts are cut at the straight cuts
+def partRegions(plan: SplitPlan, straight: bool) -> List[List[Tuple[float, float, float, float]]]:
+    regions = []
+    for band in plan.bands:
+        count = len(band.segments)
+        if straight:
+            cuts = [[band.straightCut(cut)] * count for cut in range(len(band.cuts))]
+        else:
+            cuts = [list(cut) for cut in band.cuts]
+        edges = [[plan.minX - overlap] * count] + cuts + [[plan.maxX + overlap] * count]
+        for left, right in zip(edges, edges[1:]):
+            regions.append(_bandSlabs(plan, band, left, right))
+    return regions
+
+
+# the part of the body inside of the region, the body itself is not changed
+def cutRegion(body: adsk.fusion.BRepBody, region: List[Tuple[float, float, float, float]]) -> adsk.fusion.BRepBody:
+    temporaryBRep = adsk.fusion.TemporaryBRepManager.get()
+    part = temporaryBRep.copy(body)
+    tool = union([box(minX, minY, -reach, maxX, maxY, reach) for minX, minY, maxX, maxY in region])
+    temporaryBRep.booleanOperation(part, tool, adsk.fusion.BooleanTypes.IntersectionBooleanType)
+    return part
+
+
+# splits the top and bottom body into the parts of the plan, named like the split of the timeline names them
+def splitBodies(plan: SplitPlan, bodies: Dict[str, adsk.fusion.BRepBody], keyboardObject: KeyboardObject) -> Dict[str, adsk.fusion.BRepBody]:
+    if not plan.needsSplit:
+        return dict(bodies)
+    parts = {}
+    for name, body in bodies.items():
+        straight = name == "Bottom Frame" and keyboardObject.splitBottomStraight
+        for i, region in enumerate(partRegions(plan, straight)):
+            parts["{} (Part {})".format(name, i + 1)] = cutRegion(body, region)
+    return parts
+
+
+# adds the temporary bodies to the component, parametric designs get them in one base feature
+def commitBodies(component: adsk.fusion.Component, bodies: Dict[str, adsk.fusion.BRepBody]) -> List[adsk.fusion.BRepBody]:
+    baseFeature = None
+    if component.parentDesign.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        baseFeature = component.features.baseFeatures.add()
+        baseFeature.name = "Keyboard"
+        baseFeature.startEdit()
+    committed = []
+    for name, body in bodies.items():
+        added = component.bRepBodies.add(body, baseFeature) if baseFeature is not None else component.bRepBodies.add(body)
+        added.name = name
+        committed.append(added)
+    if baseFeature is not None:
+        baseFeature.finishEdit()
+    return committed
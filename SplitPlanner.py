@@ -0,0 +1,249 @@
+# Author-Julian Pleines
+# Plans how the keyboard is split into printable parts, the plan is plain data and computed before anything is
+# sketched. This module must not use the Fusion API.
+
+import math
+from array import array
+from bisect import bisect_left
+from typing import List, Tuple
+
+from .Geometry import RectangleList, compilePlate, sketchTransform
+from .KeyboardData import KeyboardObject
+
+epsilon = 1e-6
+
+
+# sorted, merged intervals a cut must not go through, a cut exactly on the border of an interval is allowed
+class IntervalIndex:
+    def __init__(self, intervals: List[Tuple[float, float]]):
+        self.starts = array("d")
+        self.ends = array("d")
+        for start, end in sorted(intervals):
+            if len(self.ends) > 0 and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    # the largest legal position that is not larger than position
+    def legalAtOrBelow(self, position: float) -> float:
+        i = bisect_left(self.starts, position) - 1
+        if i >= 0 and position < self.ends[i]:
+            return self.starts[i]
+        return position
+
+    # the free gap (low, high) around a legal position, unbounded sides are None
+    def gap(self, position: float) -> Tuple[float, float]:
+        i = bisect_left(self.starts, position) - 1
+        low = self.ends[i] if i >= 0 else None
+        high = self.starts[i + 1] if i + 1 < len(self.starts) else None
+        return (low, high)
+
+
+# a horizontal strip of the keyboard between two straight cuts, the vertical cuts through it step at the row borders.
+# Every cut has one x per segment, segments are ordered from top to bottom.
+class SplitBand:
+    def __init__(self, minY: float, maxY: float):
+        self.minY: float = minY
+        self.maxY: float = maxY
+        self.segments: List[Tuple[float, float]] = []
+        self.cuts: List[array] = []
+
+    # the cut as connected points from the top to the bottom of the band
+    def polyline(self, cut: int) -> List[Tuple[float, float]]:
+        points = []
+        for (low, high), x in zip(self.segments, self.cuts[cut]):
+            points.append((x, high))
+            points.append((x, low))
+        return points
+
+    # a straight cut that keeps every part of the band printable
+    def straightCut(self, cut: int) -> float:
+        return min(self.cuts[cut])
+
+
+class SplitPlan:
+    def __init__(self, box: Tuple[float, float, float, float], partWidth: float, partDepth: float, rotated: bool):
+        self.minX, self.minY, self.maxX, self.maxY = box
+        # the part size the plan was made for, rotated parts are printed turned by 90°
+        self.partWidth: float = partWidth
+        self.partDepth: float = partDepth
+        self.rotated: bool = rotated
+        # straight cuts through the whole keyboard along x, from bottom to top
+        self.horizontalCuts = array("d")
+        self.bands: List[SplitBand] = []
+        self.warnings: List[str] = []
+
+    @property
+    def partCount(self) -> int:
+        return sum(len(band.cuts) + 1 for band in self.bands)
+
+    @property
+    def needsSplit(self) -> bool:
+        return self.partCount > 1
+
+    def toDict(self) -> dict:
+        return {"box": [self.minX, self.minY, self.maxX, self.maxY], "partWidth": self.partWidth, "partDepth": self.partDepth,
+                "rotated": self.rotated, "horizontalCuts": list(self.horizontalCuts), "warnings": self.warnings,
+                "bands": [{"minY": band.minY, "maxY": band.maxY, "segments": band.segments, "cuts": [list(cut) for cut in band.cuts]}
+                          for band in self.bands]}
+
+    @classmethod
+    def fromDict(cls, data: dict) -> "SplitPlan":
+        plan = cls(tuple(data["box"]), data["partWidth"], data["partDepth"], data["rotated"])
+        plan.horizontalCuts = array("d", data["horizontalCuts"])
+        plan.warnings = list(data["warnings"])
+        for bandData in data["bands"]:
+            band = SplitBand(bandData["minY"], bandData["maxY"])
+            band.segments = [tuple(segment) for segment in bandData["segments"]]
+            band.cuts = [array("d", cut) for cut in bandData["cuts"]]
+            plan.bands.append(band)
+        return plan
+
+    # the bounding rectangle (minX, minY, maxX, maxY) of every part, band by band from left to right
+    def parts(self) -> List[Tuple[float, float, float, float]]:
+        parts = []
+        for band in self.bands:
+            left = self.minX
+            for cut in band.cuts:
+                parts.append((left, band.minY, max(cut), band.maxY))
+                left = min(cut)
+            parts.append((left, band.minY, self.maxX, band.maxY))
+        return parts
+
+
+# every cut rectangle as (minX, minY, maxX, maxY), the clearance only widens them, rows are assigned by their real height
+def _forbidden(rectangles: List[RectangleList], clearance: float) -> List[Tuple[float, float, float, float]]:
+    return [(x - clearance, y, x + w + clearance, y + h) for rectangleList in rectangles for x, y, w, h in rectangleList]
+
+
+# cuts positions from start towards end so no part gets larger than size, returns the cuts and the number of forced
+# cuts that go through a forbidden interval
+def _cutPositions(index: IntervalIndex, start: float, end: float, size: float, fair: bool, centered: bool) -> Tuple[array, int]:
+    cuts = array("d")
+    forced = 0
+    step = (end - start) / math.ceil((end - start) / size - epsilon) if fair else size
+    previous = start
+    while end - previous > size + epsilon:
+        target = previous + step
+        cut = index.legalAtOrBelow(target)
+        if cut <= previous + epsilon:
+            cut = target
+            forced += 1
+        elif centered:
+            low, high = index.gap(cut)
+            if low is not None and high is not None and previous + epsilon < (low + high) / 2 <= cut:
+                cut = (low + high) / 2
+        cuts.append(cut)
+        previous = cut
+    return (cuts, forced)
+
+
+# rows of the layout as (top, bottom) segments in sketch space, ordered from top to bottom
+def _rowSegments(keyboardObject: KeyboardObject, minY: float, maxY: float) -> List[Tuple[float, float]]:
+    layout = keyboardObject.layout
+    unit, xOffset, top, yOffset = sketchTransform(keyboardObject)
+    centers = set()
+    for r in range(layout.rowCount):
+        start, end = layout.rowOffsets[r], layout.rowOffsets[r + 1]
+        if end > start:
+            rowPosition = min(layout.y[i] - (layout.height[i] - 1) / 2 for i in range(start, end))
+            centers.add(round((top - rowPosition) * unit + yOffset, 6))
+    centers = sorted(centers, reverse=True)
+    borders = [maxY] + [(upper + lower) / 2 for upper, lower in zip(centers, centers[1:])] + [minY]
+    return [(high, low) for high, low in zip(borders, borders[1:]) if high > low]
+
+
+def _planBand(band: SplitBand, rowSegments: List[Tuple[float, float]], forbidden: list, plan: SplitPlan, fair: bool, centered: bool) -> int:
+    # the row segments inside the band, each with its own index of forbidden x intervals
+    for high, low in rowSegments:
+        high = min(high, band.maxY)
+        low = max(low, band.minY)
+        if high > low + epsilon:
+            band.segments.append((low, high))
+    if not band.segments:
+        band.segments.append((band.minY, band.maxY))
+    segmentLows = array("d", [low for low, high in reversed(band.segments)])
+    intervals: List[list] = [[] for segment in band.segments]
+    for minX, minY, maxX, maxY in forbidden:
+        if maxY <= band.minY or minY >= band.maxY:
+            continue
+        # segments are sorted from top to bottom, segmentLows from bottom to top
+        first = max(bisect_left(segmentLows, minY) - 1, 0)
+        for j in range(first, len(segmentLows)):
+            low, high = band.segments[len(band.segments) - 1 - j]
+            if low >= maxY:
+                break
+            if high > minY:
+                intervals[len(band.segments) - 1 - j].append((minX, maxX))
+    indices = [IntervalIndex(rowIntervals) for rowIntervals in intervals]
+
+    # every cut is measured from the leftmost point of the previous cut, so the part between them fits the printer
+    forced = 0
+    step = (plan.maxX - plan.minX) / math.ceil((plan.maxX - plan.minX) / plan.partWidth - epsilon) if fair else plan.partWidth
+    previous = array("d", [plan.minX]) * len(band.segments)
+    while plan.maxX - min(previous) > plan.partWidth + epsilon:
+        target = min(previous) + step
+        limit = min(previous) + plan.partWidth
+        cut = array("d")
+        for index, last in zip(indices, previous):
+            x = index.legalAtOrBelow(target)
+            if x <= last + epsilon:
+                # the previous cut of this row is already past the target, anything up to the limit still fits
+                x = index.legalAtOrBelow(limit)
+            if x <= last + epsilon:
+                x = target if target > last + epsilon else (last + max(limit, last + step)) / 2
+                forced += 1
+            elif centered:
+                low, high = index.gap(x)
+                if low is not None and high is not None and last + epsilon < (low + high) / 2 <= x:
+                    x = (low + high) / 2
+            cut.append(x)
+        band.cuts.append(cut)
+        previous = cut
+    return forced
+
+
+def _plan(keyboardObject: KeyboardObject, box: Tuple[float, float, float, float], forbidden: list, clearanceY: float, rowSegments: list,
+          partWidth: float, partDepth: float, rotated: bool) -> SplitPlan:
+    plan = SplitPlan(box, partWidth, partDepth, rotated)
+    fair = keyboardObject.splitFair
+    centered = keyboardObject.splitCenteredBetweenSwitches
+
+    # straight cuts between the rows, they may not cut any pocket of any key
+    yIndex = IntervalIndex([(minY - clearanceY, maxY + clearanceY) for minX, minY, maxX, maxY in forbidden])
+    plan.horizontalCuts, forced = _cutPositions(yIndex, plan.minY, plan.maxY, partDepth, fair, centered)
+    if forced:
+        plan.warnings.append(str(forced) + " horizontal cuts go through keys")
+
+    borders = [plan.minY] + list(plan.horizontalCuts) + [plan.maxY]
+    forced = 0
+    for low, high in zip(borders, borders[1:]):
+        band = SplitBand(low, high)
+        forced += _planBand(band, rowSegments, forbidden, plan, fair, centered)
+        plan.bands.append(band)
+    # bands are stored from top to bottom like the rows
+    plan.bands.reverse()
+    if forced:
+        plan.warnings.append(str(forced) + " cut segments go through keys")
+    return plan
+
+
+# plans the split of the keyboard with the outline box (minX, minY, maxX, maxY) in sketch space. Both printer
+# orientations are tried and the one with fewer parts wins.
+def planSplit(keyboardObject: KeyboardObject, box: Tuple[float, float, float, float]) -> SplitPlan:
+    plate = compilePlate(keyboardObject)
+    clearanceX = (keyboardObject.unit - keyboardObject.switchWidth) / 4
+    clearanceY = max(keyboardObject.unit - keyboardObject.switchDepth - 2 * keyboardObject.switchHookDepth, 0.0) / 4
+    forbidden = _forbidden(plate.throughCuts() + plate.pocketCuts(), clearanceX)
+    rowSegments = _rowSegments(keyboardObject, box[1], box[3])
+
+    best = None
+    orientations = [(keyboardObject.printerWidth, keyboardObject.printerDepth, False)]
+    if keyboardObject.printerWidth != keyboardObject.printerDepth:
+        orientations.append((keyboardObject.printerDepth, keyboardObject.printerWidth, True))
+    for partWidth, partDepth, rotated in orientations:
+        plan = _plan(keyboardObject, box, forbidden, clearanceY, rowSegments, partWidth, partDepth, rotated)
+        if best is None or (plan.partCount, len(plan.warnings)) < (best.partCount, len(best.warnings)):
+            best = plan
+    return best
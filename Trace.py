@@ -0,0 +1,128 @@
+# Author-Julian Pleines
+# Opt-in profiling of the keyboard generation, writes Chrome trace events (chrome://tracing or ui.perfetto.dev)
+# with nested spans, the Fusion API calls made in every span and the Python memory. Set UKC_TRACE to the file the
+# trace should be written to. Everything here is a no-op while no trace is running.
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# debug messages of hot loops go through this logger, they cost a level check while logging is disabled
+logger = logging.getLogger("UKC")
+
+tracer: "Tracer" = None
+_disabled = contextlib.nullcontext()
+
+
+def _isApiModule(name) -> bool:
+    return isinstance(name, str) and (name.startswith("adsk.") or name.startswith("adsk._"))
+
+
+class Tracer:
+    def __init__(self, filename: str):
+        self.filename: str = filename
+        self.events: list = []
+        self.apiCalls: int = 0
+        self.pid: int = os.getpid()
+        self.tid: int = threading.get_ident()
+        self.start: float = time.perf_counter()
+        self.depth: int = 0
+        self._startedTracemalloc: bool = False
+
+    def begin(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._startedTracemalloc = True
+        sys.setprofile(self._profile)
+
+    def end(self) -> dict:
+        sys.setprofile(None)
+        current, peak = tracemalloc.get_traced_memory()
+        if self._startedTracemalloc:
+            tracemalloc.stop()
+        trace = {"traceEvents": self.events, "displayTimeUnit": "ms",
+                 "otherData": {"apiCalls": self.apiCalls, "peakMemory": peak, "spans": sum(1 for event in self.events if event["ph"] == "X")}}
+        with open(self.filename, "w") as file:
+            json.dump(trace, file)
+        return trace
+
+    # counts every call into the adsk modules that doesn't come from the adsk modules themselves
+    def _profile(self, frame, event: str, arg):
+        if event == "call":
+            if _isApiModule(frame.f_globals.get("__name__")) and (frame.f_back is None or not _isApiModule(frame.f_back.f_globals.get("__name__"))):
+                self.apiCalls += 1
+        elif event == "c_call":
+            owner = getattr(arg, "__self__", None)
+            if _isApiModule(getattr(arg, "__module__", None)) or _isApiModule(getattr(owner, "__name__", None)):
+                if not _isApiModule(frame.f_globals.get("__name__")):
+                    self.apiCalls += 1
+
+    def _timestamp(self) -> float:
+        return (time.perf_counter() - self.start) * 1e6
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args):
+        start = self._timestamp()
+        apiCalls = self.apiCalls
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            end = self._timestamp()
+            current, peak = tracemalloc.get_traced_memory()
+            args.update(apiCalls=self.apiCalls - apiCalls, memory=current, peakMemory=peak)
+            self.events.append({"name": name, "cat": "ukc", "ph": "X", "ts": start, "dur": end - start, "pid": self.pid, "tid": self.tid, "args": args})
+            self.events.append({"name": "memory", "ph": "C", "ts": end, "pid": self.pid, "tid": self.tid, "args": {"current": current, "peak": peak}})
+
+
+# starts a trace if UKC_TRACE is set, returns True if a trace was started
+def startFromEnvironment() -> bool:
+    filename = os.environ.get("UKC_TRACE")
+    if not filename or tracer is not None:
+        return False
+    start(filename)
+    return True
+
+
+def start(filename: str):
+    global tracer
+    tracer = Tracer(filename)
+    tracer.begin()
+
+
+# stops the running trace and writes it, returns the written trace
+def stop() -> dict:
+    global tracer
+    if tracer is None:
+        return None
+    finished = tracer
+    tracer = None
+    trace = finished.end()
+    logger.info("trace written to %s (%d api calls, peak memory %d bytes)", finished.filename, finished.apiCalls, trace["otherData"]["peakMemory"])
+    return trace
+
+
+def span(name: str, **args):
+    if tracer is None:
+        return _disabled
+    return tracer.span(name, **args)
+
+
+# decorator that puts every call of the function into its own span
+def traced(function):
+    name = function.__module__.rpartition(".")[2] + "." + function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if tracer is None:
+            return function(*args, **kwargs)
+        with tracer.span(name):
+            return function(*args, **kwargs)
+    return wrapper
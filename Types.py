@@ -1,3 +1,5 @@
+import hashlib
+from array import array
 from enum import Enum, unique
 from typing import List, Tuple
 
@@ -24,26 +26,138 @@ class SupportDirection(Enum):
         return True if self is SupportDirection.HORIZONTAL or self is SupportDirection.VERTICAL else False
 
 
+@unique
+class GenerationMode(Enum):
+    SKETCH = 1      # every pocket is sketched
+    PATTERN = 2     # one pocket per footprint is sketched and stamped onto all centers
+
+
 class Frame:
     def __init__(self):
         self.isModule: bool = False
         self.configAvailable: bool = False
         self.filename: str = ""
         self.filePath: str = ""
+        # from the frame catalog, modules are only imported once the frame is used
+        self.className: str = ""
+        self.joinOptions: list = None
+        self.configPath: str = ""
+        self.version: str = ""
+
+
+# all keys of a layout as columns, keys are stored row by row, the keys of row r are rowOffsets[r]:rowOffsets[r + 1].
+# The switch positions of key i are switchX/switchY[switchOffsets[i]:switchOffsets[i + 1]], the support positions
+# are stored the same way, both are only filled for multi switch and supported keys by Utils.updateLayoutData
+class LayoutArray:
+    def __init__(self):
+        self.x = array("d")
+        self.y = array("d")
+        self.width = array("d")
+        self.height = array("d")
+        self.row = array("i")
+        self.support = array("b")
+        self.multiSwitch = array("b")
+        self.rowOffsets = array("i", [0])
+        self.switchOffsets = array("i", [0])
+        self.switchX = array("d")
+        self.switchY = array("d")
+        self.supportOffsets = array("i", [0])
+        self.supportX = array("d")
+        self.supportY = array("d")
+
+    def __len__(self) -> int:
+        return len(self.x)
 
+    # hash of every column, all of them feed the plate
+    def digest(self) -> str:
+        digest = hashlib.sha1()
+        for name in sorted(vars(self)):
+            digest.update(name.encode("utf-8"))
+            digest.update(getattr(self, name).tobytes())
+        return digest.hexdigest()
+
+    @property
+    def rowCount(self) -> int:
+        return len(self.rowOffsets) - 1
+
+    def append(self, x: float, y: float, width: float, height: float) -> int:
+        self.x.append(x)
+        self.y.append(y)
+        self.width.append(width)
+        self.height.append(height)
+        self.row.append(self.rowCount)
+        self.support.append(SupportDirection.NONE.value)
+        self.multiSwitch.append(0)
+        self.switchOffsets.append(self.switchOffsets[-1])
+        self.supportOffsets.append(self.supportOffsets[-1])
+        return len(self.x) - 1
+
+    # closes the current row, the next appended key starts a new one
+    def endRow(self):
+        self.rowOffsets.append(len(self.x))
+
+    def rows(self) -> List[List["KeyboardKey"]]:
+        return [[KeyboardKey(self, i) for i in range(self.rowOffsets[r], self.rowOffsets[r + 1])] for r in range(self.rowCount)]
+
+    @classmethod
+    def fromRows(cls, rows: List[List["KeyboardKey"]]):
+        layout = cls()
+        for row in rows:
+            for key in row:
+                layout.append(key.x, key.y, key.width, key.height)
+            layout.endRow()
+        return layout
 
+
+# view on a single key of a LayoutArray
 class KeyboardKey:
-    def __init__(self, x: float, y: float, width: float, height: float, isMultiSwitch: bool, support: SupportDirection, switches: List[Tuple[float, float]], supports: List[Tuple[float, float]]):
-        self.x: float = x
-        self.y: float = y
-        self.width: float = width
-        self.height: float = height
-        self.isMultiSwitch: bool = isMultiSwitch
-        self.support: SupportDirection = support
-        self.switches: List[Tuple[float, float]] = switches
-        self.supports: List[Tuple[float, float]] = supports
-    
+    __slots__ = ("layout", "index")
+
+    def __init__(self, layout: LayoutArray, index: int):
+        self.layout: LayoutArray = layout
+        self.index: int = index
+
+    @property
+    def x(self) -> float:
+        return self.layout.x[self.index]
+
+    @property
+    def y(self) -> float:
+        return self.layout.y[self.index]
+
+    @property
+    def width(self) -> float:
+        return self.layout.width[self.index]
+
+    @property
+    def height(self) -> float:
+        return self.layout.height[self.index]
+
+    @property
+    def row(self) -> int:
+        return self.layout.row[self.index]
+
+    @property
+    def isMultiSwitch(self) -> bool:
+        return self.layout.multiSwitch[self.index] != 0
+
+    @property
+    def support(self) -> SupportDirection:
+        return SupportDirection(self.layout.support[self.index])
+
+    @property
+    def switches(self) -> List[Tuple[float, float]]:
+        layout = self.layout
+        return list(zip(layout.switchX[layout.switchOffsets[self.index]:layout.switchOffsets[self.index + 1]],
+                        layout.switchY[layout.switchOffsets[self.index]:layout.switchOffsets[self.index + 1]]))
+
+    @property
+    def supports(self) -> List[Tuple[float, float]]:
+        layout = self.layout
+        return list(zip(layout.supportX[layout.supportOffsets[self.index]:layout.supportOffsets[self.index + 1]],
+                        layout.supportY[layout.supportOffsets[self.index]:layout.supportOffsets[self.index + 1]]))
+
     @classmethod
     def create(self, x: float, y: float, width: float, height: float):
-        return self(x, y, width, height, False, SupportDirection.NONE, [], [])
-        
\ No newline at end of file
+        layout = LayoutArray()
+        return self(layout, layout.append(x, y, width, height))
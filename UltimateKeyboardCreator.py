@@ -2,29 +2,34 @@
 # Description-Simple Script to create a 3D-Printable Keyboard
 
 import traceback
-import importlib
-import importlib.util
 import math
 import os
+from typing import TYPE_CHECKING
 
 import adsk.cam
 import adsk.core
 import adsk.fusion
 
 from .Utils import updateLayoutData
+from . import Regeneration
+from . import Trace
+from . import DesignRules
 from .FileParser import parseLayoutFile, getDefaultLayouts
-from . import FitChecker
-from . import Layout
 from .KeyboardData import KeyboardObject, microcontrollers, microcontrollerPins
-from .Frame import getFrames, getKeyboardPlateSize
-from .Sketch import createSplit, createSplitLine
+from .Frame import frameClass, getFrames, getJoinOptions
+from .Progress import ProgressReporter
+from .Types import GenerationMode
 
-from .modules.frames.AbstractFrame import AbstractFrame
+# the generation modules are imported when the keyboard is created, the dialog only needs the layout and frame lists
+if TYPE_CHECKING:
+    from .SplitPlanner import SplitBand, SplitPlan
+    from .modules.frames.AbstractFrame import AbstractFrame
 
 
 # Global list to keep all event handlers in scope.
 handlers = []
-progressSteps = 0
+# progress and stage times of the last generation
+lastProgress: ProgressReporter = None
 keyboardObject: KeyboardObject = KeyboardObject()
 # holds all layouts in the layouts folder
 layouts: dict = {}
@@ -96,6 +101,13 @@ class KCCommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
         perspectiveCamerBox.tooltip = "After the Keyboard is created, a perspective camera is used, otherwise an orthographic camera"
         perspectiveCamerBox.tooltipDescription = "The default camera in CAD software is often the orthographic camera. While easier to model with, it doesn't look like the Model you would hold in your hands. The perspective camera is what you expect."
 
+        regenerateBox = generalChildren.addBoolValueInput("regenerateBox", "Regenerate in place", True, "", False)
+        regenerateBox.tooltip = "Updates the last generated keyboard instead of creating a new one"
+        regenerateBox.tooltipDescription = "Only the parts of the keyboard that depend on changed settings are rebuilt. Changing the printer size only redoes the split, changing the switch size redoes the sketches and everything after them."
+
+        designRuleText = generalChildren.addTextBoxCommandInput("designRuleText", "", "", 2, True)
+        designRuleText.isVisible = False
+
         advancedSettingsBox = generalChildren.addBoolValueInput("advancedSettingsBox", "Advanced Settings", True, "", False)
         advancedSettingsBox.tooltip = "Enables the advanced settings"
         advancedSettingsBox.tooltipDescription = "USE WITH CAUTION! \nThe advanced settings are for finetuning dimensions for the switches you are using, the spacing between switches (to create non-standard Keyboards) and other advanced values."
@@ -115,13 +127,39 @@ class KCCommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
         fixedSketchBox.tooltip = "Makes all sketch lines fixed"
         fixedSketchBox.tooltipDescription = "Generates the Sketches with parametric values, editable in the parameters Window. This makes it Easy to tweak some settings, not needed if the general fit is good and you only want to create your own Frame"
         
+        generationModeDropDown = advancedSettingsGroup.addDropDownCommandInput("generationModeDropDown", "Pocket Generation", adsk.core.DropDownStyles.LabeledIconDropDownStyle)
+        generationModeDropDown.listItems.add("Sketch every Pocket", True, "")
+        generationModeDropDown.listItems.add("Pattern Pockets", False, "")
+        generationModeDropDown.tooltip = "Selects how the switch and stabilizer pockets are created"
+        generationModeDropDown.tooltipDescription = "'Sketch every Pocket' sketches each pocket on its own, 'Pattern Pockets' sketches one pocket per switch and stabilizer type and copies it onto all keys. Patterning is a lot faster for big layouts, but only the first pocket of every type is editable in the sketches."
+
+        buildCacheBox = advancedSettingsGroup.addBoolValueInput("buildCacheBox", "Build Cache", True, "", False)
+        buildCacheBox.tooltip = "Imports a keyboard that was generated with the same layout and settings before"
+        buildCacheBox.tooltipDescription = "Every generated keyboard is exported into a local cache. Generating the same layout with the same switch, plate, printer and frame settings again imports the cached keyboard instead of building it. The oldest keyboards are removed once the cache gets too big."
+        cacheArchiveBox = advancedSettingsGroup.addBoolValueInput("cacheArchiveBox", "Cache the Keyboard", True, "", keyboardObject.cacheArchive)
+        cacheArchiveBox.tooltip = "Stores the whole keyboard in the cache, not only its split and print plate plan"
+        cacheArchiveBox.tooltipDescription = "With the keyboard in the cache it is imported instead of generated again. Without it only the split and print plate plan is cached, the keyboard is generated again but doesn't have to be planned, and the cache stays a lot smaller."
+        cacheArchiveBox.isVisible = False
+
+        fastSolidBox = advancedSettingsGroup.addBoolValueInput("fastSolidBox", "Fast Solid (no History)", True, "", False)
+        fastSolidBox.tooltip = "Builds the plate, frame and parts in memory and adds only the final bodies"
+        fastSolidBox.tooltipDescription = "The bodies are built from the layout data without sketches and features and are added to the design in one base feature. This is a lot faster and the file gets smaller, but nothing can be edited in the timeline. Frame models and frame modules without solid support are still built in the timeline."
+
         frameBox = advancedSettingsGroup.addBoolValueInput("createFrameBox", "Create Frame", True, "", True)
         frameBox.tooltip = "Creates the frame for the Keyboard"
         frameBox.tooltipDescription = "If you ditch the frame creation, only the layout plate will be generated so it's easy to create your own frame."
 
         fitCheckerBox = advancedSettingsGroup.addBoolValueInput("fitCheckerBox", "Generate FitChecker", True, "", True)
         fitCheckerBox.tooltip = "Generates a small helper part to check the fit of the Switches"
-        fitCheckerBox.tooltipDescription = ""
+        fitCheckerBox.tooltipDescription = "The FitChecker has a column of switch pockets for every tolerance step, the tolerance is engraved below the column. Print it, find the column your switches fit best and set the switch size accordingly."
+        valueInput = advancedSettingsGroup.addValueInput("fitCheckerFromValue", "Tolerance from", "mm", adsk.core.ValueInput.createByReal(keyboardObject.fitCheckerToleranceFrom))
+        valueInput.tooltip = "The smallest tolerance added to the switch cutout of the FitChecker"
+        valueInput = advancedSettingsGroup.addValueInput("fitCheckerToValue", "Tolerance to", "mm", adsk.core.ValueInput.createByReal(keyboardObject.fitCheckerToleranceTo))
+        valueInput.tooltip = "The biggest tolerance added to the switch cutout of the FitChecker"
+        valueInput = advancedSettingsGroup.addValueInput("fitCheckerStepValue", "Tolerance step", "mm", adsk.core.ValueInput.createByReal(keyboardObject.fitCheckerToleranceStep))
+        valueInput.tooltip = "The tolerance grows by this value from column to column"
+        valueInput = advancedSettingsGroup.addValueInput("fitCheckerRowsValue", "Pockets per Tolerance", "", adsk.core.ValueInput.createByReal(keyboardObject.fitCheckerRows))
+        valueInput.tooltip = "The number of switch pockets in every column of the FitChecker"
 
         # ---------------------------------- 3D PRINTER TAB ----------------------------------------
         printerTab = cmdInputs.addTabCommandInput("printerTab", "3D Printer")
@@ -208,9 +246,9 @@ class KCCommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
         
         keyboardObject.frameName = frameDropDown.selectedItem.name
         keyboardObject.frame = frames[keyboardObject.frameName]
-        loadFrameModule(keyboardObject)
+        keyboardObject.frameModule = None
 
-        screwList = keyboardObject.frameModule.getSupportedJoinOptions()
+        screwList = getJoinOptions(keyboardObject.frame)
         joiningDropDown = frameChildren.addDropDownCommandInput("joiningDropDown", "Join with", adsk.core.DropDownStyles.LabeledIconDropDownStyle)
         # TODO make visible again if the feature exits
         joiningDropDown.isVisible = False
@@ -238,6 +276,8 @@ class KCCommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
         else:
             controllerWarningText.isVisible = False
 
+        updateDesignRules(cmdInputs)
+
         # ---------------------------------- KEYCAPS TAB -------------------------------------------
         # keycapsTab = cmdInputs.addTabCommandInput("keycapsTab", "Keycaps")
         # keycapsChildren = keycapsTab.children
@@ -313,7 +353,21 @@ class KCCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
             selectedItem = dropdown.selectedItem
             keyboardObject.frameName = selectedItem.name
             keyboardObject.frame = frames[selectedItem.name]
-            loadFrameModule(keyboardObject)
+            # the module is imported when the keyboard is built, the join options come from the catalog
+            keyboardObject.frameModule = None
+            joiningDropDown = adsk.core.DropDownCommandInput.cast(inputs.itemById("joiningDropDown"))
+            joiningDropDown.listItems.clear()
+            for item in getJoinOptions(keyboardObject.frame):
+                joiningDropDown.listItems.add(item, False, "")
+            joiningDropDown.listItems.item(0).isSelected = True
+
+        elif changedInput.id == "fitCheckerBox":
+            checkbox = adsk.core.BoolValueCommandInput.cast(inputs.itemById("fitCheckerBox"))
+            for id in ("fitCheckerFromValue", "fitCheckerToValue", "fitCheckerStepValue", "fitCheckerRowsValue"):
+                inputs.itemById(id).isVisible = checkbox.value
+
+        elif changedInput.id == "buildCacheBox":
+            inputs.itemById("cacheArchiveBox").isVisible = adsk.core.BoolValueCommandInput.cast(inputs.itemById("buildCacheBox")).value
 
         elif changedInput.id == "doubleSpaceSwitch":
             checkbox = adsk.core.BoolValueCommandInput.cast(inputs.itemById("doubleSpaceSwitch"))
@@ -332,6 +386,9 @@ class KCCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
             else:
                 controllerWarningText.isVisible = False
 
+        # every change can move cutouts, the plate is checked again
+        updateDesignRules(inputs)
+
 
 class KCDestroyHandler(adsk.core.CommandEventHandler):
     def __init__(self):
@@ -355,6 +412,18 @@ class KCCommandExecuteHandler(adsk.core.CommandEventHandler):
         super().__init__()
 
     def notify(self, args):
+        # UKC_TRACE=<file> writes a Chrome trace of the whole generation
+        tracing = Trace.startFromEnvironment()
+        try:
+            with Trace.span("KCCommandExecuteHandler.notify"):
+                self.execute(args)
+        finally:
+            if tracing:
+                Trace.stop()
+
+    def execute(self, args):
+        from . import BuildCache, FitChecker, Layout
+
         eventArgs = adsk.core.CommandEventArgs.cast(args)
 
         global keyboardObject
@@ -371,11 +440,13 @@ class KCCommandExecuteHandler(adsk.core.CommandEventHandler):
             progressDialog = ui.createProgressDialog()
             progressDialog.isBackgroundTranslucent = False
             progressDialog.isCancelButtonShown = False
+            global lastProgress
+            progress = ProgressReporter(progressDialog)
+            lastProgress = progress
+            progress.stage("parse")
             updateLayoutData(keyboardObject)
-            totalSteps = keyboardObject.keys * 3
-            if adsk.core.BoolValueCommandInput.cast(inputs.itemById("fitCheckerBox")).value is True:
-                totalSteps += 9 * 3
-            progressDialog.show("Keyboard creation in progress", "Percentage: %p, Current Value: %v, Total steps: %m", 0, totalSteps, 1)
+            if keyboardObject.frameModule is None:
+                loadFrameModule(keyboardObject)
 
             keyboardObject.printerWidth = adsk.core.ValueCommandInput.cast(inputs.itemById("printerWidthValue")).value
             keyboardObject.printerDepth = adsk.core.ValueCommandInput.cast(inputs.itemById("printerDepthValue")).value
@@ -383,149 +454,109 @@ class KCCommandExecuteHandler(adsk.core.CommandEventHandler):
             keyboardObject.switchDepth = adsk.core.ValueCommandInput.cast(inputs.itemById("switchDepth")).value
             keyboardObject.parametricModel = adsk.core.BoolValueCommandInput.cast(inputs.itemById("parametricBox")).value
             keyboardObject.fixedSketch = adsk.core.BoolValueCommandInput.cast(inputs.itemById("fixedSketchBox")).value
+            generationMode = adsk.core.DropDownCommandInput.cast(inputs.itemById("generationModeDropDown")).selectedItem.name
+            keyboardObject.generationMode = GenerationMode.PATTERN if generationMode == "Pattern Pockets" else GenerationMode.SKETCH
+            keyboardObject.fastSolid = adsk.core.BoolValueCommandInput.cast(inputs.itemById("fastSolidBox")).value
+            keyboardObject.buildCache = adsk.core.BoolValueCommandInput.cast(inputs.itemById("buildCacheBox")).value
+            keyboardObject.cacheArchive = adsk.core.BoolValueCommandInput.cast(inputs.itemById("cacheArchiveBox")).value
+            selectedJoinOption = adsk.core.DropDownCommandInput.cast(inputs.itemById("joiningDropDown")).selectedItem.name
+            keyboardObject.joinOption = selectedJoinOption
+            # frame models and frame modules without solid support are built in the timeline
+            buildSolid = keyboardObject.fastSolid and keyboardObject.frame.isModule and keyboardObject.frameModule.solidFrame
+
+            # --------------------------- REGENERATION ------------------------------------------
+            # an existing keyboard is only rebuilt from the first stage a changed parameter affects
+            occ = None
+            firstDirtyStage = Regeneration.stages[0]
+            if adsk.core.BoolValueCommandInput.cast(inputs.itemById("regenerateBox")).value is True:
+                occ = Regeneration.findKeyboardOccurrence(root)
+                if occ is not None:
+                    firstDirtyStage = Regeneration.firstDirtyStage(Regeneration.loadSnapshot(occ.component), Regeneration.snapshot(keyboardObject))
+                    if firstDirtyStage is None:
+                        progress.finish()
+                        ui.messageBox("Nothing changed since the keyboard was generated.", "Regenerate in place")
+                        return
+                    # the solid keyboard is one base feature, it is always built again as a whole
+                    if buildSolid:
+                        firstDirtyStage = "sketches"
+                    if not Regeneration.rollBack(design, occ.component, firstDirtyStage):
+                        occ = None
+                        firstDirtyStage = Regeneration.stages[0]
+
+            # --------------------------- BUILD CACHE -------------------------------------------
+            # a new keyboard with the same layout and settings as a cached one is imported or reuses the cached plan
+            cacheKey = None
+            cached = None
+            if occ is None and keyboardObject.buildCache:
+                cacheKey = BuildCache.cacheKey(keyboardObject, selectedJoinOption)
+                cached = BuildCache.lookup(cacheKey)
+            importCached = cached is not None and cached["archive"] is not None
+
+            # the progress steps of all stages that are going to run
+            createFitChecker = occ is None and adsk.core.BoolValueCommandInput.cast(inputs.itemById("fitCheckerBox")).value is True
+            if createFitChecker:
+                keyboardObject.fitCheckerToleranceFrom = adsk.core.ValueCommandInput.cast(inputs.itemById("fitCheckerFromValue")).value
+                keyboardObject.fitCheckerToleranceTo = adsk.core.ValueCommandInput.cast(inputs.itemById("fitCheckerToValue")).value
+                keyboardObject.fitCheckerToleranceStep = adsk.core.ValueCommandInput.cast(inputs.itemById("fitCheckerStepValue")).value
+                keyboardObject.fitCheckerRows = int(round(adsk.core.ValueCommandInput.cast(inputs.itemById("fitCheckerRowsValue")).value))
+            plan = {"fitchecker": FitChecker.progressSteps(keyboardObject) if createFitChecker else 0, "cache": 1 if cacheKey is not None else 0}
+            if not importCached and buildSolid:
+                plan.update({"extrude": 1, "frame": 1, "split": 1, "commit": 1})
+            elif not importCached:
+                layoutSteps = Layout.progressSteps(keyboardObject)
+                plan["sketch"] = layoutSteps["sketch"] if Regeneration.isDirty(firstDirtyStage, "sketches") else 0
+                plan["recompute"] = layoutSteps["recompute"] if Regeneration.isDirty(firstDirtyStage, "sketches") else 0
+                plan["extrude"] = layoutSteps["extrude"] if Regeneration.isDirty(firstDirtyStage, "extrudes") else 0
+                plan["frame"] = 1 if Regeneration.isDirty(firstDirtyStage, "frame") else 0
+                plan["split"] = 1 if Regeneration.isDirty(firstDirtyStage, "split") else 0
+            progress.show("Keyboard creation in progress", plan)
+
+            imported = False
+            if occ is None:
+                # --------------------------- FITCHECKER CREATION  --------------------------------
+                if createFitChecker:
+                    FitChecker.create(progress, root, keyboardObject)
+
+                if importCached:
+                    occ = BuildCache.importArchive(progress, root, cacheKey, cached)
+                    imported = occ is not None
+                if occ is None:
+                    # create new occurence in the root component for a new component
+                    trans = adsk.core.Matrix3D.create()
+                    occ = root.occurrences.addNewComponent(trans)
+                    occ.component.name = keyboardObject.layoutName + " Keyboard"
+            # get the component from the occurence
+            comp = occ.component
+            splitPlan = BuildCache.splitPlan(cached)
 
-            # --------------------------- FITCHECKER CREATION  ------------------------------------
-            if adsk.core.BoolValueCommandInput.cast(inputs.itemById("fitCheckerBox")).value is True:
-                FitChecker.create(progressDialog, root, keyboardObject)
+            # --------------------------- SOLID KEYBOARD -----------------------------------------
+            if buildSolid and not imported:
+                Regeneration.markStage(design, comp, "sketches")
+                splitPlan = buildSolidKeyboard(progress, comp, keyboardObject, selectedJoinOption, splitPlan)
+            buildTimeline = not buildSolid and not imported
 
             # --------------------------- LAYOUT CREATION  ----------------------------------------
-            # create new occurence in the root component for a new component
-            trans = adsk.core.Matrix3D.create()
-            occ = root.occurrences.addNewComponent(trans)
-
-            # get the component from the occurence
-            comp = occ.component
-            comp.name = keyboardObject.layoutName + " Keyboard"
-        
-            Layout.create(progressDialog, comp, keyboardObject)
+            if buildTimeline and Regeneration.isDirty(firstDirtyStage, "sketches"):
+                Regeneration.markStage(design, comp, "sketches")
+                Layout.createSketches(progress, comp, keyboardObject)
+            if buildTimeline and Regeneration.isDirty(firstDirtyStage, "extrudes"):
+                Regeneration.markStage(design, comp, "extrudes")
+                Layout.extrudeSketches(progress, comp, keyboardObject)
 
             # --------------------------- FRAME CREATION  -----------------------------------------
-            # frame is created by a python module
-            if keyboardObject.frame.isModule:
-                progressDialog.message = "Creating Frame"
-                selectedJoinOption = adsk.core.DropDownCommandInput.cast(inputs.itemById("joiningDropDown")).selectedItem.name
-                keyboardObject.frameModule.generateFrame(keyboardObject, comp, selectedJoinOption)
-            # frame is based on a master component
-            else:
-                app = adsk.core.Application.get()
-                design = adsk.fusion.Design.cast(app.activeProduct)
-                importManager = app.importManager
-                archiveFileName = os.path.dirname(__file__) + "/resources/models/frames/" + keyboardObject.frame.filePath
-                archiveOptions = importManager.createFusionArchiveImportOptions(archiveFileName)
-                success = importManager.importToTarget(archiveOptions, comp)
-                if success is not True:
-                    ui.messageBox("Importing of the frame was not successful, please check the model!", "Import Error")
-                
-                occ.isGrounded = True
-                proxy = comp.occurrences.itemByName(keyboardObject.frame.filename[:-4] + ":1").createForAssemblyContext(occ)
-                proxy.isGrounded = True
-
-                # setting the user Parameters with the right values
-                dimension = getKeyboardPlateSize(keyboardObject, comp)
-                param1 = design.userParameters.itemByName("LayoutWidth")
-                param2 = design.userParameters.itemByName("LayoutHeight")
-                param3 = design.userParameters.itemByName("PlateThickness")
-                param4 = design.userParameters.itemByName("InfillVoids")
-                if param1 is not None and param2 is not None and param3 is not None and param4 is not None:
-                    param1.value = dimension[0]
-                    param2.value = dimension[1]
-                    param3.value = keyboardObject.plateThickness
-                else:
-                    # TODO create messagebox -> Model does not fulfill requirements
-                    print("else")
-                
-                # create new sketch for the layout plate
-                infillVoids = True if design.userParameters.itemByName("InfillVoids").value >= 1 else False
-                if infillVoids is True:
-                    if design.userParameters.itemByName("VoidHeight") is None:
-                        # TODO create messagebox -> Model does not fulfill requirements
-                        print("else")
-                    else:
-                        voidHeight = design.userParameters.itemByName("VoidHeight").value
-            # --------------------------- COMBINE BODIES ------------------------------------------
-            # If the Frame is created by a Model, combining the Top-Frame and the layoutPlate is done
-                plate = comp.bRepBodies.itemByName("Layout Plate")
-                if plate is None:
-                    print("Plate not found...")
-                # topFrame = comp.allOccurrences.itemByName(keyboardObject.frame.filename[:-4]).component.bRepBodies.itemByName("Top")
-                topFrame = comp.allOccurrences.itemByName(keyboardObject.frame.filename[:-4] + ":1").bRepBodies.itemByName("Top")
-                if topFrame is not None:
-                    collection = adsk.core.ObjectCollection.create()
-                    collection.add(topFrame)
-                    combineFeatureInput = comp.features.combineFeatures.createInput(plate, collection)
-                    combineFeatureInput.isKeepToolBodies = True
-                    # combineFeatureInput.isNewComponent = False
-                    comp.features.combineFeatures.add(combineFeatureInput)
-                    topFrame.isLightBulbOn = False
-                    plate.name = "Top Frame"
-                else:
-                    print("Body not found!")
+            if buildTimeline and Regeneration.isDirty(firstDirtyStage, "frame"):
+                Regeneration.markStage(design, comp, "frame")
+                createFrame(progress, design, occ, keyboardObject, selectedJoinOption)
 
-                # occur: adsk.fusion.Occurrence
-                # for occur in comp.allOccurrences:
-                #     print(occur.name)
-                    
             # --------------------------- KEYBOARD SPLITTING --------------------------------------
-            # get overall dimension for the keyboard with frame, the height is not considered
-            # to be problematic
-
-            box = comp.bRepBodies.itemByName("Top Frame").boundingBox
-            # width = box.maxPoint.x - box.minPoint.x
-            # depth = box.maxPoint.y - box.minPoint.y
-            # leftBorderWidth = - box.minPoint.x
-            # lowerBorderWith = - box.minPoint.y
-            # max = width if width >= depth else depth
-            # min = width if width <= depth else depth
-            # maxPrinter = keyboardObject.printerDepth if keyboardObject.printerDepth >= keyboardObject.printerWidth else keyboardObject.printerWidth
-            # minPrinter = keyboardObject.printerDepth if keyboardObject.printerDepth <= keyboardObject.printerWidth else keyboardObject.printerWidth
-            # if max >= maxPrinter or min >= minPrinter:
-            #     # check how many splits and in wich direction are needed
-            #     longSplit = math.ceil(max / maxPrinter)
-            #     shortSplit = math.ceil(min / minPrinter)
-            #     print("long:" + str(longSplit))
-            #     print("short:" + str(shortSplit))
-
-            #     if longSplit > 1 or shortSplit > 1:
-            sketches = comp.sketches
-            xyPlane = comp.xYConstructionPlane
-            splitSketch = sketches.add(xyPlane)
-            splitSketch.name = "Split"
-            createSplit(splitSketch, box, keyboardObject)
-            
-            if keyboardObject.frame.isModule:
-                bottomFrame = comp.bRepBodies.itemByName("Bottom Frame")
-            else:
-                bottomFrameOriginal = comp.allOccurrences.itemByName(keyboardObject.frame.filename[:-4] + ":1").bRepBodies.itemByName("Bottom")
-                bottomFrameOriginal.isLightBulbOn = False
-                bottomFrame = bottomFrameOriginal.copyToComponent(occ)
-
-            bodiesToSplit = adsk.core.ObjectCollection.create()
-            bodiesToSplit.add(comp.bRepBodies.itemByName("Top Frame"))
-            if keyboardObject.splitBottomStraight is False:
-                bodiesToSplit.add(bottomFrame)
-            else:
-                straightSplitSketch = sketches.add(xyPlane)
-                straightSplitSketch.name = "Straight Split"
-                createSplitLine(straightSplitSketch, box, keyboardObject)
-                splittingTool = straightSplitSketch.sketchCurves.sketchLines.item(0)
-                splitBodyFeatureInput = comp.features.splitBodyFeatures.createInput(bottomFrame, splittingTool, True)
-                splitBodyFeature = comp.features.splitBodyFeatures.add(splitBodyFeatureInput)
-                i = 1
-                for body in splitBodyFeature.bodies:
-                    body.name = "Bottom Frame (Part " + str(i) + ")"
-                    i += 1
-            splittingTool = splitSketch.sketchCurves.sketchLines.item(0)
-            splitBodyFeatureInput = comp.features.splitBodyFeatures.createInput(bodiesToSplit, splittingTool, True)
-            splitBodyFeature = comp.features.splitBodyFeatures.add(splitBodyFeatureInput)
-            body: adsk.fusion.BRepBody
-            i = 1
-            for body in splitBodyFeature.bodies:
-                body.name = "Top Frame (Part " + str(i) + ")"
-                i += 1
-                    
-            # else:
-            #     # no split is needed
-            #     print("no split is needed")
+            if buildTimeline and Regeneration.isDirty(firstDirtyStage, "split"):
+                Regeneration.markStage(design, comp, "split")
+                splitPlan = splitKeyboard(progress, occ, keyboardObject, splitPlan)
+            Regeneration.recordStages(design, comp)
+            Regeneration.storeSnapshot(comp, keyboardObject)
+            if cacheKey is not None and not imported:
+                BuildCache.store(progress, design, comp, cacheKey, splitPlan, keyboardObject.cacheArchive)
+
             # --------------------------- KEYCAP CREATION -----------------------------------------
             # This is not part of the first Release-Version
 
@@ -536,7 +567,8 @@ class KCCommandExecuteHandler(adsk.core.CommandEventHandler):
             # archiveOptions = importManager.createFusionArchiveImportOptions(archiveFileName)
             # importManager.importToTarget(archiveOptions, root)
 
-            progressDialog.hide()
+            progress.finish()
+            Trace.logger.info("generation finished\n%s", progress.summary())
             camera = app.activeViewport.camera
             isPerspectiveCamera = adsk.core.BoolValueCommandInput.cast(inputs.itemById("perspectiveCamerBox")).value
             if isPerspectiveCamera:
@@ -562,6 +594,277 @@ class KCPreviewHandler(adsk.core.CommandEventHandler):
         eventArgs = adsk.core.CommandEventArgs.cast(args)
 
 
+# creates the frame around the layout plate, either by a frame module or by importing a frame model
+@Trace.traced
+def createFrame(progress: ProgressReporter, design: adsk.fusion.Design, occ: adsk.fusion.Occurrence, keyboardObject: KeyboardObject, selectedJoinOption: str):
+    from . import Layout
+
+    app = adsk.core.Application.get()
+    ui = app.userInterface
+    comp = occ.component
+
+    progress.stage("frame", "Creating Frame")
+    # frame is created by a python module
+    if keyboardObject.frame.isModule:
+        with Trace.span("generateFrame", frame=keyboardObject.frameName):
+            keyboardObject.frameModule.generateFrame(keyboardObject, comp, selectedJoinOption)
+    # frame is based on a master component
+    else:
+        importManager = app.importManager
+        archiveFileName = os.path.dirname(__file__) + "/resources/models/frames/" + keyboardObject.frame.filePath
+        archiveOptions = importManager.createFusionArchiveImportOptions(archiveFileName)
+        success = importManager.importToTarget(archiveOptions, comp)
+        if success is not True:
+            ui.messageBox("Importing of the frame was not successful, please check the model!", "Import Error")
+
+        occ.isGrounded = True
+        proxy = comp.occurrences.itemByName(keyboardObject.frame.filename[:-4] + ":1").createForAssemblyContext(occ)
+        proxy.isGrounded = True
+
+        # setting the user Parameters with the right values
+        dimension = keyboardObject.plateSize()
+        param1 = design.userParameters.itemByName("LayoutWidth")
+        param2 = design.userParameters.itemByName("LayoutHeight")
+        param3 = design.userParameters.itemByName("PlateThickness")
+        param4 = design.userParameters.itemByName("InfillVoids")
+        if param1 is not None and param2 is not None and param3 is not None and param4 is not None:
+            param1.value = dimension[0]
+            param2.value = dimension[1]
+            param3.value = keyboardObject.plateThickness
+        else:
+            # TODO create messagebox -> Model does not fulfill requirements
+            print("else")
+
+        # create new sketch for the layout plate
+        infillVoids = True if design.userParameters.itemByName("InfillVoids").value >= 1 else False
+        if infillVoids is True:
+            if design.userParameters.itemByName("VoidHeight") is None:
+                # TODO create messagebox -> Model does not fulfill requirements
+                print("else")
+            else:
+                voidHeight = design.userParameters.itemByName("VoidHeight").value
+                Layout.createVoidInfill(comp, keyboardObject, voidHeight)
+        # --------------------------- COMBINE BODIES --------------------------------------
+        # If the Frame is created by a Model, combining the Top-Frame and the layoutPlate is done
+        plate = comp.bRepBodies.itemByName("Layout Plate")
+        if plate is None:
+            print("Plate not found...")
+        # topFrame = comp.allOccurrences.itemByName(keyboardObject.frame.filename[:-4]).component.bRepBodies.itemByName("Top")
+        topFrame = comp.allOccurrences.itemByName(keyboardObject.frame.filename[:-4] + ":1").bRepBodies.itemByName("Top")
+        if topFrame is not None:
+            collection = adsk.core.ObjectCollection.create()
+            collection.add(topFrame)
+            combineFeatureInput = comp.features.combineFeatures.createInput(plate, collection)
+            combineFeatureInput.isKeepToolBodies = True
+            # combineFeatureInput.isNewComponent = False
+            comp.features.combineFeatures.add(combineFeatureInput)
+            topFrame.isLightBulbOn = False
+            plate.name = "Top Frame"
+        else:
+            print("Body not found!")
+
+        # occur: adsk.fusion.Occurrence
+        # for occur in comp.allOccurrences:
+        #     print(occur.name)
+    progress.step()
+
+
+# splits the top and bottom frame into printable parts, returns the plan. A plan from the build cache is used as is.
+@Trace.traced
+def splitKeyboard(progress: ProgressReporter, occ: adsk.fusion.Occurrence, keyboardObject: KeyboardObject, plan: "SplitPlan" = None) -> "SplitPlan":
+    from .Sketch import createHorizontalSplit, createSplit, createSplitLine, createSplitSurface
+    from .SplitPlanner import planSplit
+
+    progress.stage("split", "Splitting Keyboard")
+    comp = occ.component
+
+    # get overall dimension for the keyboard with frame, the height is not considered to be problematic. The
+    # extents of module frames that declare their border are known, all other frames have to be measured
+    if keyboardObject.frame.isModule and keyboardObject.frameModule.frameBorder is not None:
+        box = keyboardObject.keyboardBox()
+    else:
+        box = footprint(comp.bRepBodies.itemByName("Top Frame"))
+    if plan is None:
+        with Trace.span("planSplit"):
+            plan = planSplit(keyboardObject, box)
+    for warning in plan.warnings:
+        Trace.logger.warning("split: %s", warning)
+    if not plan.needsSplit:
+        bodies = [comp.bRepBodies.itemByName("Top Frame"), comp.bRepBodies.itemByName("Bottom Frame")]
+        packPrintPlates(comp, [body for body in bodies if body is not None], keyboardObject)
+        progress.step()
+        return plan
+    Trace.logger.debug("splitting into %d parts%s", plan.partCount, " (rotated)" if plan.rotated else "")
+
+    sketches = comp.sketches
+    xyPlane = comp.xYConstructionPlane
+    splitSketch = sketches.add(xyPlane)
+    splitSketch.name = "Split"
+
+    if keyboardObject.frame.isModule:
+        bottomFrame = comp.bRepBodies.itemByName("Bottom Frame")
+    else:
+        bottomFrameOriginal = comp.allOccurrences.itemByName(keyboardObject.frame.filename[:-4] + ":1").bRepBodies.itemByName("Bottom")
+        bottomFrameOriginal.isLightBulbOn = False
+        bottomFrame = bottomFrameOriginal.copyToComponent(occ)
+
+    splitBodyFeatures = comp.features.splitBodyFeatures
+    topBodies = [comp.bRepBodies.itemByName("Top Frame")]
+    bottomBodies = [bottomFrame]
+
+    # the straight cuts between the bands go through the top and the bottom, only the bodies crossing a cut are split
+    with Trace.span("createSplit"):
+        horizontalLines = createHorizontalSplit(splitSketch, plan)
+    for y, line in zip(plan.horizontalCuts, horizontalLines):
+        for bodies in (topBodies, bottomBodies):
+            crossing = [body for body in bodies if body.boundingBox.minPoint.y < y < body.boundingBox.maxPoint.y]
+            if crossing:
+                with Trace.span("splitBodyFeatures.add", bodies="Horizontal"):
+                    pieces = splitBodyFeatures.add(splitBodyFeatures.createInput(toCollection(crossing), line, True)).bodies
+                bodies[:] = [body for body in bodies if body not in crossing] + list(pieces)
+
+    # the surfaces of the vertical cuts reach over the bodies above and below
+    surfaceHeight = keyboardObject.unit + max(max(abs(body.boundingBox.minPoint.z), abs(body.boundingBox.maxPoint.z)) for body in topBodies + bottomBodies)
+
+    straightSplitSketch = None
+    if keyboardObject.splitBottomStraight:
+        straightSplitSketch = sketches.add(xyPlane)
+        straightSplitSketch.name = "Straight Split"
+    topParts = []
+    bottomParts = []
+    for band in plan.bands:
+        bandTop = bodiesInBand(topBodies, band)
+        bandBottom = bodiesInBand(bottomBodies, band)
+        with Trace.span("createSplit"):
+            cuts = [createSplitSurface(comp, cut, surfaceHeight) for cut in createSplit(splitSketch, band, keyboardObject.unit)]
+        if straightSplitSketch is None:
+            bandTop += bandBottom
+        else:
+            lines = [createSplitSurface(comp, line, surfaceHeight) for line in createSplitLine(straightSplitSketch, band, keyboardObject.unit)]
+            bottomParts += splitFromLeft(splitBodyFeatures, bandBottom, lines, ([band.straightCut(i)] for i in range(len(lines))), "Bottom Frame")
+        topParts += splitFromLeft(splitBodyFeatures, bandTop, cuts, band.cuts, "Top Frame")
+    splitSketch.isLightBulbOn = False
+    if straightSplitSketch is not None:
+        straightSplitSketch.isLightBulbOn = False
+
+    body: adsk.fusion.BRepBody
+    for i, body in enumerate(topParts):
+        body.name = "Top Frame (Part " + str(i + 1) + ")"
+    for i, body in enumerate(bottomParts):
+        body.name = "Bottom Frame (Part " + str(i + 1) + ")"
+    packPrintPlates(comp, topParts + bottomParts, keyboardObject)
+    progress.step()
+    return plan
+
+
+# builds the plate, frame and printable parts as temporary bodies and adds them in one base feature
+@Trace.traced
+def buildSolidKeyboard(progress: ProgressReporter, comp: adsk.fusion.Component, keyboardObject: KeyboardObject, selectedJoinOption: str,
+                       plan: "SplitPlan" = None) -> "SplitPlan":
+    from . import Solids
+    from .Geometry import compilePlate
+    from .SplitPlanner import planSplit
+
+    progress.stage("extrude", "Building the Layout Plate")
+    plate = Solids.plateBody(compilePlate(keyboardObject), keyboardObject)
+    progress.step()
+
+    progress.stage("frame", "Building the Frame")
+    with Trace.span("generateFrameBodies", frame=keyboardObject.frameName):
+        bodies = keyboardObject.frameModule.generateFrameBodies(keyboardObject, selectedJoinOption)
+    # the plate is joined into the top frame like the frame extrude of the timeline does it
+    Solids.union([bodies["Top Frame"], plate])
+    progress.step()
+
+    progress.stage("split", "Splitting Keyboard")
+    if plan is None:
+        box = keyboardObject.keyboardBox() if keyboardObject.frameModule.frameBorder is not None else footprint(bodies["Top Frame"])
+        plan = planSplit(keyboardObject, box)
+    for warning in plan.warnings:
+        Trace.logger.warning("split: %s", warning)
+    with Trace.span("splitBodies", parts=plan.partCount):
+        bodies = Solids.splitBodies(plan, bodies, keyboardObject)
+    progress.step()
+
+    progress.stage("commit", "Adding the Bodies")
+    committed = Solids.commitBodies(comp, bodies)
+    packPrintPlates(comp, committed, keyboardObject)
+    progress.step()
+    return plan
+
+
+# packs the parts onto print plates and stores the plate plan as JSON on the component
+@Trace.traced
+def packPrintPlates(comp: adsk.fusion.Component, bodies: list, keyboardObject: KeyboardObject):
+    from .Packing import packParts
+
+    parts = []
+    for body in bodies:
+        box = body.boundingBox
+        parts.append((body.name, box.maxPoint.x - box.minPoint.x, box.maxPoint.y - box.minPoint.y))
+    plates = packParts(parts, keyboardObject.printerWidth, keyboardObject.printerDepth, keyboardObject.partSpacing)
+    for name in plates.unplaced:
+        Trace.logger.warning("%s does not fit on the printer", name)
+    Trace.logger.debug("%d parts on %d print plates", len(parts), len(plates.plates))
+    comp.attributes.add(Regeneration.attributeGroup, "printPlates", plates.toJson())
+
+
+# the box (minX, minY, maxX, maxY) of the body seen from above
+def footprint(body: adsk.fusion.BRepBody) -> tuple:
+    box = body.boundingBox
+    return (box.minPoint.x, box.minPoint.y, box.maxPoint.x, box.maxPoint.y)
+
+
+def toCollection(bodies: list) -> adsk.core.ObjectCollection:
+    collection = adsk.core.ObjectCollection.create()
+    for body in bodies:
+        collection.add(body)
+    return collection
+
+
+# the bodies that have their center inside the band
+def bodiesInBand(bodies: list, band: "SplitBand") -> list:
+    result = []
+    for body in bodies:
+        box = body.boundingBox
+        if band.minY <= (box.minPoint.y + box.maxPoint.y) / 2 < band.maxY:
+            result.append(body)
+    return result
+
+
+# splits the bodies with the tools from left to right, every tool only splits what is right of the previous one.
+# positions holds the x positions of every tool, returns the parts from left to right.
+def splitFromLeft(splitBodyFeatures: adsk.fusion.SplitBodyFeatures, bodies: list, tools: list, positions, name: str) -> list:
+    parts = []
+    for tool, xs in zip(tools, positions):
+        if not bodies:
+            break
+        with Trace.span("splitBodyFeatures.add", bodies=name):
+            pieces = splitBodyFeatures.add(splitBodyFeatures.createInput(toCollection(bodies), tool, False)).bodies
+        middle = (min(xs) + max(xs)) / 2
+        bodies = []
+        for piece in pieces:
+            box = piece.boundingBox
+            (parts if (box.minPoint.x + box.maxPoint.x) / 2 < middle else bodies).append(piece)
+    return parts + bodies
+
+
+# checks the plate with the current inputs and shows the problems in the dialog
+def updateDesignRules(inputs: adsk.core.CommandInputs):
+    keyboardObject.switchWidth = adsk.core.ValueCommandInput.cast(inputs.itemById("switchWidth")).value
+    keyboardObject.switchDepth = adsk.core.ValueCommandInput.cast(inputs.itemById("switchDepth")).value
+    updateLayoutData(keyboardObject)
+    with Trace.span("checkDesignRules"):
+        violations = DesignRules.checkDesignRules(keyboardObject)
+    designRuleText = adsk.core.TextBoxCommandInput.cast(inputs.itemById("designRuleText"))
+    text = DesignRules.summary(violations, keyboardObject.minBridgeWidth)
+    if text:
+        designRuleText.formattedText = '<font color="red"><b>Notice:</b> ' + text.replace("\n", ", ") + '</font>'
+        designRuleText.isVisible = True
+    else:
+        designRuleText.isVisible = False
+
+
 def openFile():
     try:
         app = adsk.core.Application.get()
@@ -589,12 +892,7 @@ def pinsToMaxSupportedKeys(pins: float) -> float:
 
 def loadFrameModule(keyboardObject: KeyboardObject):
     if keyboardObject.frame.isModule:
-        framename = keyboardObject.frame.filename
-        if framename.endswith("_"):
-            cls = getattr(importlib.import_module(".modules.frames." + framename, __name__), "Frame")
-        else:
-            cls = getattr(importlib.import_module(".modules.frames." + framename, __name__), framename)
-        keyboardObject.frameModule: AbstractFrame = cls()
+        keyboardObject.frameModule: "AbstractFrame" = frameClass(keyboardObject.frame)()
     else:
         # nothing to do at this moment
         print("load fusion file")
@@ -1,34 +1,43 @@
+from array import array
+from itertools import accumulate
+
 from .KeyboardData import KeyboardObject
-from .Types import KeyboardKey, SupportDirection
+from .Types import SupportDirection
 
 # keyboardObjecttype
 # 0 = normal switch
 # 1 = stabalizer foot
 
 
+# sets multi switch and support flags and the switch and support positions for all keys column by column
 def updateLayoutData(keyboardObject: KeyboardObject):
-    keys = 0
-    for row in keyboardObject.layoutData:
-        key: KeyboardKey
-        for key in row:
-            keys += 1
-            if keyboardObject.doubleSwitchForSpace and key.width >= 4:
-                key.isMultiSwitch = True
-                key.switches.clear()
-                key.switches.append((key.x - (key.width / 4), key.y))
-                key.switches.append((key.x + (key.width / 4), key.y))
-                keys += 1
-            elif key.height >= keyboardObject.supportKeySize:
-                key.support = SupportDirection.VERTICAL
-                key.supports.clear()
-                key.supports.append((key.x, key.y - keyboardObject.supportSizes[key.height]))
-                key.supports.append((key.x, key.y + keyboardObject.supportSizes[key.height]))
-            elif key.width >= keyboardObject.supportKeySize:
-                key.support = SupportDirection.HORIZONTAL
-                key.supports.clear()
-                key.supports.append((key.x - keyboardObject.supportSizes[key.width], key.y))
-                key.supports.append((key.x + keyboardObject.supportSizes[key.width], key.y))
-            else:
-                key.isMultiSwitch = False
-                key.support = SupportDirection.NONE
-                None
+    layout = keyboardObject.layout
+    supportKeySize = keyboardObject.supportKeySize
+    supportSizes = keyboardObject.supportSizes
+
+    multiSwitch = [keyboardObject.doubleSwitchForSpace and width >= 4 for width in layout.width]
+    vertical = [not multi and height >= supportKeySize for multi, height in zip(multiSwitch, layout.height)]
+    horizontal = [not multi and not vert and width >= supportKeySize for multi, vert, width in zip(multiSwitch, vertical, layout.width)]
+    layout.multiSwitch = array("b", multiSwitch)
+    layout.support = array("b", [SupportDirection.VERTICAL.value if vert else SupportDirection.HORIZONTAL.value if hor else SupportDirection.NONE.value
+                                 for vert, hor in zip(vertical, horizontal)])
+
+    # multi switch keys get two switches, each at a quarter of the key width from the center
+    layout.switchOffsets = array("i", accumulate((2 if multi else 0 for multi in multiSwitch), initial=0))
+    layout.switchX = array("d", [switch for x, width, multi in zip(layout.x, layout.width, multiSwitch) if multi for switch in (x - width / 4, x + width / 4)])
+    layout.switchY = array("d", [switch for y, multi in zip(layout.y, multiSwitch) if multi for switch in (y, y)])
+
+    # supported keys get two support positions, left and right or above and below the center
+    supported = [vert or hor for vert, hor in zip(vertical, horizontal)]
+    layout.supportOffsets = array("i", accumulate((2 if support else 0 for support in supported), initial=0))
+    supportX = []
+    supportY = []
+    for x, y, width, height, vert, hor in zip(layout.x, layout.y, layout.width, layout.height, vertical, horizontal):
+        if vert:
+            supportX += (x, x)
+            supportY += (y - supportSizes[height], y + supportSizes[height])
+        elif hor:
+            supportX += (x - supportSizes[width], x + supportSizes[width])
+            supportY += (y, y)
+    layout.supportX = array("d", supportX)
+    layout.supportY = array("d", supportY)
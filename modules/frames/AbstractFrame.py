@@ -4,7 +4,7 @@ import adsk.core
 import adsk.fusion
 
 from ...KeyboardData import KeyboardObject
-from ...Frame import getKeyboardPlateSize
+from ...Frame import defaultJoinOptions, getPossibleSupportLocations
 from ... import Sketch
 
 from abc import ABC, abstractmethod
@@ -16,6 +16,16 @@ Point = adsk.core.Point3D.create
 class AbstractFrame(ABC):
 
     baseSketch: adsk.fusion.Sketch
+    # how far the frame reaches over the layout plate on every side, used for splitting without asking Fusion. Frames
+    # that leave it None are measured after they are generated
+    frameBorder: float = None
+    # radius of the supports under the layout plate and the distance between them
+    supportRadius: float = 0.2
+    supportSpacing: float = 7.62
+    # listed in the frame catalog without importing the module, keep it a literal list in subclasses
+    joinOptions: list = defaultJoinOptions
+    # set by frames that implement generateFrameBodies
+    solidFrame: bool = False
 
     @abstractmethod
     def generateFrame(self, keyboardObject: KeyboardObject, component: adsk.fusion.Component, joinOption: str):
@@ -25,7 +35,7 @@ class AbstractFrame(ABC):
         
         # getting the size of the generated keyboard plate, we can generate bodies outside of this without having to
         # worry about collisions of the bodies, thus blocking holes and such
-        plateSize = getKeyboardPlateSize(keyboardObject, component)
+        plateSize = keyboardObject.plateSize()
         # typing for rect and line
         rect: adsk.fusion.SketchLineList
         line: adsk.fusion.SketchLine
@@ -35,10 +45,15 @@ class AbstractFrame(ABC):
         for line in rect:
             line.isConstruction = True
 
+    # the frame as temporary bodies by name for the fast solid mode, "Top Frame" gets the layout plate joined. Only
+    # used if solidFrame is set, other frames are always built in the timeline.
+    def generateFrameBodies(self, keyboardObject: KeyboardObject, joinOption: str) -> dict:
+        return None
+
     @abstractmethod
     def getSupportedJoinOptions(self) -> list:
         # sorry, that standatization-thing is because I am german...
-        return ["M3x10 ISO 4762", "M4x10 ISO 4762", "#6-32 3/8\"", "Other", "Glue"]
+        return self.joinOptions
 
     @abstractmethod
     def _addMicrocontrollerFrame(self, x: float, y: float, keyboardObject: KeyboardObject, component: adsk.fusion.Component):
@@ -50,6 +65,11 @@ class AbstractFrame(ABC):
         # TODO add method body
         print("adding LayoutPlateSupport")
 
+    # adds a support at every free spot of the layout plate, the spots are found without asking Fusion
+    def _addLayoutPlateSupports(self, keyboardObject: KeyboardObject, component: adsk.fusion.Component):
+        for x, y in getPossibleSupportLocations(keyboardObject, self.supportRadius, self.supportSpacing):
+            self._addLayoutPlateSupport(x, y, keyboardObject, component)
+
     # just return true if your Frame doesn't require a specific split location
     # the default split function will be used
     @abstractmethod
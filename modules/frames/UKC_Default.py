@@ -2,12 +2,20 @@ import adsk.core
 import adsk.fusion
 
 from ...KeyboardData import KeyboardObject
-from ...Frame import getKeyboardPlateSize
 from ... import Sketch
+from ... import Solids
+from ...Frame import getPossibleSupportLocations
 from .AbstractFrame import AbstractFrame
 
 
 class UKC_Default(AbstractFrame):
+    frameBorder = 0.45
+    # fillet of the plate corners, height of the bottom frame walls and thickness of its floor
+    cornerRadius = 0.25
+    bottomHeight = 0.7
+    bottomThickness = 0.3
+    solidFrame = True
+    joinOptions = ["M3x10 ISO 4762", "M4x10 ISO 4762", "#6-32 1/2\" flat head", "Other Screw", "Glue"]
 
     def generateFrame(self, keyboardObject: KeyboardObject, component: adsk.fusion.Component, joinOption: str):
         # super().generateFrame(keyboardObject, component)
@@ -20,7 +28,7 @@ class UKC_Default(AbstractFrame):
         
         # getting the size of the generated keyboard plate, we can generate bodies outside of this without having to
         # worry about collisions of the bodies, thus blocking holes and such
-        plateSize = getKeyboardPlateSize(keyboardObject, component)
+        plateSize = keyboardObject.plateSize()
         # typing for rect and line
         rect: adsk.fusion.SketchLineList
         line: adsk.fusion.SketchLine
@@ -28,11 +36,11 @@ class UKC_Default(AbstractFrame):
         rect = Sketch.rectangle(baseSketch, 0, 0, plateSize[0], plateSize[1], keyboardObject)
         for i in range(0, 4):
             j = i + 1 if i < 3 else 0
-            baseSketch.sketchCurves.sketchArcs.addFillet(rect.item(i), rect.item(i).endSketchPoint.geometry, rect.item(j), rect.item(j).startSketchPoint.geometry, 0.25)
+            baseSketch.sketchCurves.sketchArcs.addFillet(rect.item(i), rect.item(i).endSketchPoint.geometry, rect.item(j), rect.item(j).startSketchPoint.geometry, self.cornerRadius)
 
         curves = baseSketch.findConnectedCurves(rect.item(0))
         dirPoint = adsk.core.Point3D.create(0, 0.0, 0)
-        offsetCurves = baseSketch.offset(curves, dirPoint, 0.45)
+        offsetCurves = baseSketch.offset(curves, dirPoint, self.frameBorder)
 
         profile: adsk.fusion.Profile
         outerProfile: adsk.fusion.Profile
@@ -50,7 +58,7 @@ class UKC_Default(AbstractFrame):
         
         # Sidewalls for bottom Frame
         extInput = component.features.extrudeFeatures.createInput(outerProfile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-        distance = adsk.core.ValueInput.createByReal(-0.7)
+        distance = adsk.core.ValueInput.createByReal(-self.bottomHeight)
         extInput.setDistanceExtent(False, distance)
         extrude = component.features.extrudeFeatures.add(extInput)
         extrude.bodies.item(0).name = "Bottom Frame"
@@ -58,7 +66,7 @@ class UKC_Default(AbstractFrame):
         # Closing bottom Frame
         extInput = component.features.extrudeFeatures.createInput(allProfiles, adsk.fusion.FeatureOperations.JoinFeatureOperation)
         offsetDistance = distance
-        distance = adsk.core.ValueInput.createByReal(-0.3)
+        distance = adsk.core.ValueInput.createByReal(-self.bottomThickness)
         extent = adsk.fusion.DistanceExtentDefinition.create(distance)
         startFrom = adsk.fusion.FromEntityStartDefinition.create(baseSketch.referencePlane, offsetDistance)
         extInput.setOneSideExtent(extent, adsk.fusion.ExtentDirections.PositiveExtentDirection)
@@ -66,13 +74,37 @@ class UKC_Default(AbstractFrame):
         extrude = component.features.extrudeFeatures.add(extInput)
         self._addMicrocontrollerFrame(1, 1, keyboardObject, component)
 
-        # adding Supports
-        # supportLocations = getPossibleSupportLocations
-        # for support in supportLocations:
-        #     self._addLayoutPlateSupport(support[0], support[1], keyboardObject, component)
+        # adding Supports, every support is a circle in the "Supports" sketch, all of them are extruded at once
+        self._addLayoutPlateSupports(keyboardObject, component)
+        supportSketch = component.sketches.itemByName("Supports")
+        if supportSketch is not None:
+            supports = adsk.core.ObjectCollection.create()
+            for profile in supportSketch.profiles:
+                supports.add(profile)
+            extInput = component.features.extrudeFeatures.createInput(supports, adsk.fusion.FeatureOperations.JoinFeatureOperation)
+            extInput.setDistanceExtent(False, offsetDistance)
+            extInput.participantBodies = [component.bRepBodies.itemByName("Bottom Frame")]
+            component.features.extrudeFeatures.add(extInput)
+            supportSketch.isLightBulbOn = False
+
+    # the same frame from boxes and cylinders, the offset of the filleted plate outline has the border added to the radius
+    def generateFrameBodies(self, keyboardObject: KeyboardObject, joinOption: str) -> dict:
+        width, height = keyboardObject.plateSize()
+        border = self.frameBorder
+        outerRadius = self.cornerRadius + border
+
+        top = Solids.roundedBox(-border, -border, 0, width + border, height + border, keyboardObject.plateThickness, outerRadius)
+        Solids.subtract(top, Solids.roundedBox(0, 0, -Solids.overlap, width, height, keyboardObject.plateThickness + Solids.overlap, self.cornerRadius))
+
+        walls = Solids.roundedBox(-border, -border, -self.bottomHeight, width + border, height + border, 0, outerRadius)
+        Solids.subtract(walls, Solids.roundedBox(0, 0, -self.bottomHeight - Solids.overlap, width, height, Solids.overlap, self.cornerRadius))
+        floor = Solids.roundedBox(-border, -border, -self.bottomHeight - self.bottomThickness, width + border, height + border, -self.bottomHeight, outerRadius)
+        supports = [Solids.cylinder(x, y, -self.bottomHeight, 0, self.supportRadius)
+                    for x, y in getPossibleSupportLocations(keyboardObject, self.supportRadius, self.supportSpacing)]
+        return {"Top Frame": top, "Bottom Frame": Solids.union([walls, floor] + supports)}
 
     def getSupportedJoinOptions(self) -> list:
-        return ["M3x10 ISO 4762", "M4x10 ISO 4762", "#6-32 1/2\" flat head", "Other Screw", "Glue"]
+        return self.joinOptions
 
     def _addMicrocontrollerFrame(self, x: float, y: float, keyboardObject: KeyboardObject, component: adsk.fusion.Component):
         # here I dont need a specific implementation, I am happy with the default implementation but if you want to
@@ -80,8 +112,11 @@ class UKC_Default(AbstractFrame):
         super()._addMicrocontrollerFrame(x, y, keyboardObject, component)
 
     def _addLayoutPlateSupport(self, x: float, y: float, keyboardObject: KeyboardObject, component: adsk.fusion.Component):
-        # TODO add method body
-        print("adding LayoutPlateSupport")
+        supportSketch = component.sketches.itemByName("Supports")
+        if supportSketch is None:
+            supportSketch = component.sketches.add(component.xYConstructionPlane)
+            supportSketch.name = "Supports"
+        supportSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(x, y, 0), self.supportRadius)
     
     def splitFrame() -> bool:
         return True
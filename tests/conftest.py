@@ -0,0 +1,32 @@
+# The tests load the add-in like the tools do, with the recording adsk stand-in of tools/stubs in place of Fusion 360.
+# Only the headless engines are tested, the layouts are the default layouts.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+import headless  # noqa: E402
+
+headless.loadAddIn()
+
+
+def loadKeyboard(filename: str):
+    import contextlib
+    import io
+    FileParser = headless.module("FileParser")
+    KeyboardData = headless.module("KeyboardData")
+    Utils = headless.module("Utils")
+    keyboardObject = KeyboardData.KeyboardObject()
+    with contextlib.redirect_stdout(io.StringIO()):
+        FileParser.parseLayoutFile(filename, keyboardObject)
+    Utils.updateLayoutData(keyboardObject)
+    return keyboardObject
+
+
+# a freshly parsed keyboard per default layout, the tests may change its settings
+@pytest.fixture(params=headless.defaultLayouts(), ids=os.path.basename)
+def keyboardObject(request):
+    return loadKeyboard(request.param)
@@ -0,0 +1,31 @@
+import pytest
+
+import headless
+
+Mesh = headless.module("Mesh")
+Geometry = headless.module("Geometry")
+
+
+# the volume of the plate summed up cell by cell, a pocket cell only has material above the pocket floor
+def cellVolume(plate, thickness: float, pocketDepth: float) -> float:
+    xEdges, yEdges, cells = Mesh.plateCells(plate)
+    height = {Mesh.SOLID: thickness, Mesh.POCKET: thickness - pocketDepth, Mesh.THROUGH: 0.0}
+    return sum((xEdges[column + 1] - xEdges[column]) * (yEdges[row + 1] - yEdges[row]) * height[state]
+               for row, states in enumerate(cells) for column, state in enumerate(states))
+
+
+def test_plateMeshIsWatertight(keyboardObject):
+    assert Mesh.keyboardMesh(keyboardObject).isWatertight()
+
+
+def test_plateMeshVolume(keyboardObject):
+    mesh = Mesh.keyboardMesh(keyboardObject)
+    expected = cellVolume(Geometry.compilePlate(keyboardObject), keyboardObject.plateThickness,
+                          keyboardObject.plateThickness - keyboardObject.switchHookHeight)
+    assert mesh.volume() == pytest.approx(expected, rel=1e-9)
+
+
+def test_pocketsRemoveMaterial(keyboardObject):
+    plate = Geometry.compilePlate(keyboardObject)
+    solid = plate.width * plate.height * keyboardObject.plateThickness
+    assert 0 < Mesh.keyboardMesh(keyboardObject).volume() < solid
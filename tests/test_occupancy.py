@@ -0,0 +1,32 @@
+import math
+
+import pytest
+
+import headless
+
+Occupancy = headless.module("Occupancy")
+Geometry = headless.module("Geometry")
+
+resolution = 0.05
+
+
+# the distance of a point to a rectangle (x, y, width, height), zero inside of it
+def distance(x: float, y: float, rectangle) -> float:
+    left, bottom, width, height = rectangle
+    dx = max(left - x, 0.0, x - left - width)
+    dy = max(bottom - y, 0.0, y - bottom - height)
+    return math.hypot(dx, dy)
+
+
+@pytest.mark.parametrize("radius, spacing", [(0.3, 2.0), (0.6, 4.0)])
+def test_supportsKeepTheRadius(keyboardObject, radius, spacing):
+    plate = Geometry.compilePlate(keyboardObject)
+    rectangles = [rectangle for rectangleList in plate.throughCuts() + plate.pocketCuts() for rectangle in rectangleList]
+    locations = Occupancy.supportLocations(keyboardObject, radius, spacing, resolution)
+    assert locations
+    for x, y in locations:
+        # the grid cells allow the support to be off by one cell
+        assert min(x, y, plate.width - x, plate.height - y) >= radius - resolution
+        assert all(distance(x, y, rectangle) >= radius - resolution for rectangle in rectangles)
+    for i, (x, y) in enumerate(locations):
+        assert all(math.hypot(x - otherX, y - otherY) >= spacing - 1e-9 for otherX, otherY in locations[i + 1:])
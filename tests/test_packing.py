@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+import headless
+
+Packing = headless.module("Packing")
+SplitPlanner = headless.module("SplitPlanner")
+
+
+def checkPlan(plan, parts, spacing: float):
+    sizes = {name: (width, depth) for name, width, depth in parts}
+    placed = [placement for plate in plan.plates for placement in plate.placements]
+    # every part is placed once or reported as too large
+    assert sorted([placement.name for placement in placed] + plan.unplaced) == sorted(sizes)
+    for plate in plan.plates:
+        assert plate.placements
+        for placement in plate.placements:
+            width, depth = sizes[placement.name]
+            if placement.rotated:
+                width, depth = depth, width
+            assert (placement.width, placement.depth) == pytest.approx((width, depth))
+            # on the bed
+            assert placement.x >= -1e-9 and placement.y >= -1e-9
+            assert placement.x + placement.width <= plan.printerWidth + 1e-6
+            assert placement.y + placement.depth <= plan.printerDepth + 1e-6
+        # no overlap and at least the spacing between the parts
+        for i, first in enumerate(plate.placements):
+            for second in plate.placements[i + 1:]:
+                assert (first.x + first.width + spacing <= second.x + 1e-6 or second.x + second.width + spacing <= first.x + 1e-6
+                        or first.y + first.depth + spacing <= second.y + 1e-6 or second.y + second.depth + spacing <= first.y + 1e-6)
+    for name in plan.unplaced:
+        width, depth = sizes[name]
+        assert min(width, depth) > min(plan.printerWidth, plan.printerDepth) or max(width, depth) > max(plan.printerWidth, plan.printerDepth)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("spacing", [0.0, 0.5])
+def test_randomParts(seed, spacing):
+    generator = random.Random(seed)
+    parts = [("part{}".format(i), generator.uniform(1, 24), generator.uniform(1, 18)) for i in range(25)]
+    checkPlan(Packing.packParts(parts, 22.0, 20.0, spacing), parts, spacing)
+
+
+def test_tooLargePart():
+    parts = [("small", 5.0, 5.0), ("large", 30.0, 5.0)]
+    plan = Packing.packParts(parts, 20.0, 20.0)
+    assert plan.unplaced == ["large"]
+    checkPlan(plan, parts, 0.0)
+
+
+def test_splitParts(keyboardObject):
+    keyboardObject.printerWidth = keyboardObject.printerDepth = 20.0
+    width, height = keyboardObject.plateSize()
+    splitPlan = SplitPlanner.planSplit(keyboardObject, (-0.45, -0.45, width + 0.45, height + 0.45))
+    parts = [("part{}".format(i), maxX - minX, maxY - minY) for i, (minX, minY, maxX, maxY) in enumerate(splitPlan.parts())]
+    plan = Packing.packParts(parts, 20.0, 20.0, 0.3)
+    assert not plan.unplaced
+    checkPlan(plan, parts, 0.3)
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+import headless
+
+Polygons = headless.module("Polygons")
+Geometry = headless.module("Geometry")
+
+
+# the area covered by the boxes, counted on the grid of all box edges
+def unionArea(boxes) -> float:
+    xs = sorted({x for box in boxes for x in (box[0], box[2])})
+    ys = sorted({y for box in boxes for y in (box[1], box[3])})
+    area = 0.0
+    for x0, x1 in zip(xs, xs[1:]):
+        for y0, y1 in zip(ys, ys[1:]):
+            if any(box[0] <= x0 and x1 <= box[2] and box[1] <= y0 and y1 <= box[3] for box in boxes):
+                area += (x1 - x0) * (y1 - y0)
+    return area
+
+
+def loopArea(loops) -> float:
+    return sum(Polygons.signedArea(loop) for loop in loops)
+
+
+def test_plateCutouts(keyboardObject):
+    plate = Geometry.compilePlate(keyboardObject)
+    for rectangleLists in (plate.throughCuts(), plate.pocketCuts()):
+        boxes = [(x, y, x + width, y + height) for rectangles in rectangleLists for x, y, width, height in rectangles]
+        assert loopArea(Polygons.unionBoxes(boxes)) == pytest.approx(unionArea(boxes), rel=1e-9)
+
+
+def test_ringHasHole():
+    boxes = [(0, 0, 3, 1), (0, 2, 3, 3), (0, 1, 1, 2), (2, 1, 3, 2)]
+    loops = Polygons.unionBoxes(boxes)
+    assert sorted(Polygons.signedArea(loop) for loop in loops) == [-1.0, 9.0]
+
+
+def test_cornersDontJoin():
+    loops = Polygons.unionBoxes([(0, 0, 1, 1), (1, 1, 2, 2)])
+    assert len(loops) == 2 and loopArea(loops) == 2.0
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_randomBoxes(seed):
+    generator = random.Random(seed)
+    boxes = []
+    for i in range(30):
+        x, y = generator.randint(0, 20), generator.randint(0, 20)
+        boxes.append((x, y, x + generator.randint(1, 6), y + generator.randint(1, 6)))
+    assert loopArea(Polygons.unionBoxes(boxes)) == pytest.approx(unionArea(boxes))
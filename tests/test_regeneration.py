@@ -0,0 +1,35 @@
+import pytest
+
+import headless
+
+Regeneration = headless.module("Regeneration")
+Types = headless.module("Types")
+
+
+def test_sameKeyboardIsClean(keyboardObject):
+    assert Regeneration.firstDirtyStage(Regeneration.snapshot(keyboardObject), Regeneration.snapshot(keyboardObject)) is None
+
+
+@pytest.mark.parametrize("column", ["support", "multiSwitch"])
+def test_layoutColumnMakesLayoutDirty(keyboardObject, column):
+    old = Regeneration.snapshot(keyboardObject)
+    values = getattr(keyboardObject.layout, column)
+    values[0] = 1 if values[0] == 0 else 0
+    assert Regeneration.firstDirtyStage(old, Regeneration.snapshot(keyboardObject)) == "layout"
+
+
+def test_stabilizerDirectionMakesLayoutDirty(keyboardObject):
+    layout = keyboardObject.layout
+    supported = [i for i, support in enumerate(layout.support) if Types.SupportDirection(support).isSupported()]
+    if not supported:
+        pytest.skip("no supported keys")
+    old = Regeneration.snapshot(keyboardObject)
+    horizontal, vertical = Types.SupportDirection.HORIZONTAL.value, Types.SupportDirection.VERTICAL.value
+    layout.support[supported[0]] = vertical if layout.support[supported[0]] == horizontal else horizontal
+    assert Regeneration.firstDirtyStage(old, Regeneration.snapshot(keyboardObject)) == "layout"
+
+
+def test_settingMakesItsStageDirty(keyboardObject):
+    old = Regeneration.snapshot(keyboardObject)
+    keyboardObject.printerWidth += 1
+    assert Regeneration.firstDirtyStage(old, Regeneration.snapshot(keyboardObject)) == "split"
@@ -0,0 +1,40 @@
+import pytest
+
+import headless
+
+SplitPlanner = headless.module("SplitPlanner")
+
+# the border of the default frame around the plate
+frameBorder = 0.45
+printers = [(20.0, 20.0), (25.0, 21.0), (15.0, 12.0), (12.0, 25.0)]
+
+
+def planFor(keyboardObject, printerWidth: float, printerDepth: float):
+    keyboardObject.printerWidth = printerWidth
+    keyboardObject.printerDepth = printerDepth
+    width, height = keyboardObject.plateSize()
+    box = (-frameBorder, -frameBorder, width + frameBorder, height + frameBorder)
+    return box, SplitPlanner.planSplit(keyboardObject, box)
+
+
+@pytest.mark.parametrize("printer", printers, ids=lambda printer: "{:g}x{:g}".format(*printer))
+def test_partsFitThePrinter(keyboardObject, printer):
+    box, plan = planFor(keyboardObject, *printer)
+    assert sorted((plan.partWidth, plan.partDepth)) == sorted(printer)
+    for minX, minY, maxX, maxY in plan.parts():
+        assert maxX - minX <= plan.partWidth + 1e-9
+        assert maxY - minY <= plan.partDepth + 1e-9
+
+
+@pytest.mark.parametrize("printer", printers, ids=lambda printer: "{:g}x{:g}".format(*printer))
+def test_bandsCoverTheKeyboard(keyboardObject, printer):
+    box, plan = planFor(keyboardObject, *printer)
+    bands = sorted((band.minY, band.maxY) for band in plan.bands)
+    assert bands[0][0] == pytest.approx(box[1]) and bands[-1][1] == pytest.approx(box[3])
+    assert all(upper[0] == pytest.approx(lower[1]) for lower, upper in zip(bands, bands[1:]))
+    assert plan.partCount == len(plan.parts())
+
+
+def test_noSplitIfTheKeyboardFits(keyboardObject):
+    box, plan = planFor(keyboardObject, 100.0, 100.0)
+    assert not plan.needsSplit
@@ -0,0 +1,197 @@
+# Runs layouts and parameter sweeps through the headless geometry pipeline (parse, plate, design rules, split plan and
+# print plate packing) in a process pool. Every combination gets its own output folder, a summary of all of them is
+# printed and written as summary.csv.
+#
+#   python tools/batch.py [layout.json | folder ...] [--switch-width 1.4 1.39] [--switch-depth 1.4] [--plate-thickness 0.4]
+#                         [--printer 20 25x21] [--mesh] [--output batch] [--jobs 4]
+#
+# Sizes are in cm like everywhere in the UKC, a printer is given as one size for a square bed or as WIDTHxDEPTH.
+
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import headless
+
+summaryColumns = ["layout", "switchWidth", "switchDepth", "plateThickness", "printer", "keys", "plateWidth", "plateHeight",
+                  "parts", "printPlates", "violations", "milliseconds"]
+
+
+# layout files given directly or all json layouts of the given folders
+def collectLayouts(paths: list) -> list:
+    layouts = []
+    for path in paths:
+        if os.path.isdir(path):
+            layouts += sorted(os.path.join(path, filename) for filename in os.listdir(path)
+                              if filename.lower().endswith(".json") and not filename.startswith("."))
+        else:
+            layouts.append(path)
+    return layouts
+
+
+def parsePrinter(value: str) -> tuple:
+    width, _, depth = value.lower().partition("x")
+    return (float(width), float(depth or width))
+
+
+# one folder name per combination, the parameters are part of the name so sweeps never overwrite each other
+def bundleName(job: dict) -> str:
+    stem = os.path.basename(job["layout"]).rpartition(".")[0]
+    return "{}_sw{:.3f}_sd{:.3f}_pt{:.3f}_p{:g}x{:g}".format(stem, job["switchWidth"], job["switchDepth"], job["plateThickness"],
+                                                              job["printerWidth"], job["printerDepth"])
+
+
+def initWorker():
+    headless.loadAddIn()
+
+
+def runJob(job: dict) -> dict:
+    import adsk.core
+    adsk.core.Application._reset()
+
+    main = headless.module("UltimateKeyboardCreator")
+    FileParser = headless.module("FileParser")
+    Types = headless.module("Types")
+    KeyboardData = headless.module("KeyboardData")
+    Utils = headless.module("Utils")
+    Geometry = headless.module("Geometry")
+    DesignRules = headless.module("DesignRules")
+    SplitPlanner = headless.module("SplitPlanner")
+    Packing = headless.module("Packing")
+    Export = headless.module("Export")
+    Mesh = headless.module("Mesh")
+
+    result = {"layout": os.path.basename(job["layout"]), "bundle": bundleName(job), "switchWidth": job["switchWidth"],
+              "switchDepth": job["switchDepth"], "plateThickness": job["plateThickness"],
+              "printer": "{:g}x{:g}".format(job["printerWidth"], job["printerDepth"]), "errors": []}
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            keyboardObject = KeyboardData.KeyboardObject()
+            FileParser.parseLayoutFile(job["layout"], keyboardObject)
+            keyboardObject.switchWidth = job["switchWidth"]
+            keyboardObject.switchDepth = job["switchDepth"]
+            keyboardObject.plateThickness = job["plateThickness"]
+            keyboardObject.printerWidth = job["printerWidth"]
+            keyboardObject.printerDepth = job["printerDepth"]
+            keyboardObject.frame = Types.Frame()
+            keyboardObject.frame.isModule = True
+            keyboardObject.frame.filename = job["frame"]
+            main.loadFrameModule(keyboardObject)
+            Utils.updateLayoutData(keyboardObject)
+
+            plate = Geometry.compilePlate(keyboardObject)
+            violations = DesignRules.checkDesignRules(keyboardObject)
+            plan = SplitPlanner.planSplit(keyboardObject, keyboardObject.keyboardBox())
+            parts = []
+            for name in ("Top Frame", "Bottom Frame"):
+                for i, (minX, minY, maxX, maxY) in enumerate(plan.parts()):
+                    parts.append(("{} (Part {})".format(name, i + 1) if plan.needsSplit else name, maxX - minX, maxY - minY))
+            plates = Packing.packParts(parts, keyboardObject.printerWidth, keyboardObject.printerDepth, keyboardObject.partSpacing)
+        result.update({"keys": keyboardObject.keys, "plateWidth": plate.width, "plateHeight": plate.height, "parts": plan.partCount,
+                       "printPlates": len(plates.plates), "violations": len(violations)})
+        result["errors"] += plan.warnings + ["{} does not fit on the printer".format(name) for name in plates.unplaced]
+        result["errors"] += adsk.core.Application.get().userInterface._messages
+
+        bundle = os.path.join(job["output"], result["bundle"])
+        os.makedirs(bundle, exist_ok=True)
+        with open(os.path.join(bundle, "plate.svg"), "w") as file:
+            file.writelines(Export.svgElements(plate))
+        with open(os.path.join(bundle, "plate.dxf"), "w") as file:
+            file.writelines(Export.dxfEntities(plate))
+        with open(os.path.join(bundle, "split.json"), "w") as file:
+            json.dump({"box": [plan.minX, plan.minY, plan.maxX, plan.maxY], "rotated": plan.rotated,
+                       "horizontalCuts": list(plan.horizontalCuts),
+                       "bands": [{"minY": band.minY, "maxY": band.maxY, "cuts": [band.polyline(cut) for cut in range(len(band.cuts))]}
+                                 for band in plan.bands],
+                       "parts": plan.parts(), "warnings": plan.warnings}, file, indent=1)
+        plates.save(os.path.join(bundle, "printPlates.json"))
+        if job["mesh"]:
+            mesh = Mesh.meshPlate(plate, keyboardObject.plateThickness, keyboardObject.plateThickness - keyboardObject.switchHookHeight)
+            with open(os.path.join(bundle, "plate.stl"), "wb") as file:
+                Mesh.writeStl(mesh, file)
+            Mesh.write3mf(mesh, os.path.join(bundle, "plate.3mf"))
+        with open(os.path.join(bundle, "designRules.json"), "w") as file:
+            json.dump([{"kind": violation.kind, "keys": violation.keys, "x": violation.x, "y": violation.y, "width": violation.width}
+                       for violation in violations], file, indent=1)
+    except Exception:
+        result["errors"].append(traceback.format_exc())
+    result["milliseconds"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def printSummary(results: list):
+    header = "{:<22}{:>8}{:>8}{:>8}{:>10}{:>6}{:>18}{:>7}{:>8}{:>6}{:>10}".format(
+        "layout", "switchW", "switchD", "plate", "printer", "keys", "plate size", "parts", "plates", "drc", "runtime")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        if "keys" not in result:
+            print("{:<22}{:>8.3f}{:>8.3f}{:>8.3f}{:>10}  failed".format(result["layout"][:21], result["switchWidth"], result["switchDepth"],
+                                                                        result["plateThickness"], result["printer"]))
+        else:
+            print("{:<22}{:>8.3f}{:>8.3f}{:>8.3f}{:>10}{:>6}{:>18}{:>7}{:>8}{:>6}{:>8.1f}ms".format(
+                result["layout"][:21], result["switchWidth"], result["switchDepth"], result["plateThickness"], result["printer"], result["keys"],
+                "{:.2f}x{:.2f}".format(result["plateWidth"], result["plateHeight"]), result["parts"], result["printPlates"],
+                result["violations"], result["milliseconds"]))
+        for error in result["errors"]:
+            print("  " + error.strip().replace("\n", "\n  "))
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="batch generation of layouts and parameter sweeps for the UltimateKeyboardCreator")
+    parser.add_argument("layouts", nargs="*", help="layout files or folders, defaults to resources/defaultLayouts")
+    parser.add_argument("--switch-width", type=float, nargs="+", default=[1.4], help="switch widths in cm")
+    parser.add_argument("--switch-depth", type=float, nargs="+", default=[1.4], help="switch depths in cm")
+    parser.add_argument("--plate-thickness", type=float, nargs="+", default=[0.4], help="plate thicknesses in cm")
+    parser.add_argument("--printer", type=parsePrinter, nargs="+", default=[(20.0, 20.0)], help="printer sizes in cm, SIZE or WIDTHxDEPTH")
+    parser.add_argument("--frame", default="UKC_Default", help="frame module used for the outline")
+    parser.add_argument("--mesh", action="store_true", help="also write the plate as STL and 3MF")
+    parser.add_argument("--output", default="batch", help="folder the bundles and summary.csv are written to")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    layouts = collectLayouts(args.layouts) if args.layouts else headless.defaultLayouts()
+    output = os.path.abspath(args.output)
+    jobs = [{"layout": os.path.abspath(layout), "switchWidth": switchWidth, "switchDepth": switchDepth, "plateThickness": plateThickness,
+             "printerWidth": printer[0], "printerDepth": printer[1], "frame": args.frame, "mesh": args.mesh,
+             "output": output}
+            for layout, switchWidth, switchDepth, plateThickness, printer
+            in itertools.product(layouts, args.switch_width, args.switch_depth, args.plate_thickness, args.printer)]
+
+    # every layout is compiled once up front, the workers then only read the compiled layouts
+    headless.loadAddIn()
+    FileParser = headless.module("FileParser")
+    KeyboardData = headless.module("KeyboardData")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for layout in layouts:
+            FileParser.parseLayoutFile(layout, KeyboardData.KeyboardObject())
+
+    start = time.perf_counter()
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=initWorker) as pool:
+            results = list(pool.map(runJob, jobs))
+    else:
+        results = [runJob(job) for job in jobs]
+    printSummary(results)
+    print("{} combinations in {:.2f}s".format(len(results), time.perf_counter() - start))
+
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, "summary.csv"), "w", newline="") as file:
+        writer = csv.DictWriter(file, summaryColumns + ["bundle", "errors"], extrasaction="ignore")
+        writer.writeheader()
+        for result in results:
+            writer.writerow(dict(result, errors=" | ".join(error.strip() for error in result["errors"])))
+    return 1 if any("keys" not in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
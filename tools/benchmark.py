@@ -0,0 +1,254 @@
+# Runs layouts through the full execute path against the recording adsk stand-in and reports the number of API
+# calls and the wall time per stage. With --check the totals are compared against benchmark_baseline.json.
+#
+#   python tools/benchmark.py [layout.json ...] [--no-fixed] [--no-parametric] [--pattern] [--compare-import] [--check] [--update]
+#
+# With --regenerate every layout is built once and then regenerated in place with a smaller printer, only the
+# regeneration is measured. With --cache every layout is built once into an empty build cache and only the second
+# build, that is imported from the cache, is measured.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import headless
+
+baselinePath = os.path.join(headless.toolsPath, "benchmark_baseline.json")
+stageNames = ["parse", "fitchecker", "layout", "frame", "split", "cache"]
+
+
+class StageRecorder:
+    def __init__(self):
+        import adsk
+        self.adsk = adsk
+        self.calls: dict = {}
+        self.seconds: dict = {}
+
+    def add(self, name: str, calls: int, seconds: float):
+        self.calls[name] = self.calls.get(name, 0) + calls
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def measure(self, name: str, function):
+        def measured(*args, **kwargs):
+            calls = self.adsk.totalCalls()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(name, self.adsk.totalCalls() - calls, time.perf_counter() - start)
+        return measured
+
+
+# advances by the same time with every call, so the progress dialog is updated after the same steps in every run
+class StepClock:
+    def __init__(self, step: float = 0.001):
+        self.step: float = step
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+def commandInputs(options: dict):
+    import adsk.core
+    inputs = adsk.core.CommandInputs()
+    for id in ("fitCheckerBox", "parametricBox", "fixedSketchBox", "perspectiveCamerBox", "createFrameBox", "regenerateBox", "fastSolidBox",
+               "buildCacheBox", "cacheArchiveBox"):
+        inputs.addBoolValueInput(id, id, True, "", options.get(id, id not in ("regenerateBox", "fastSolidBox", "buildCacheBox")))
+    for id in ("printerWidthValue", "printerDepthValue", "switchWidth", "switchDepth"):
+        inputs.addValueInput(id, id, "mm", adsk.core.ValueInput.createByReal(options[id]))
+    # the FitChecker sweeps its default tolerances
+    for id, value in (("fitCheckerFromValue", -0.01), ("fitCheckerToValue", 0.01), ("fitCheckerStepValue", 0.002), ("fitCheckerRowsValue", 3)):
+        inputs.addValueInput(id, id, "mm", adsk.core.ValueInput.createByReal(value))
+    joining = inputs.addDropDownCommandInput("joiningDropDown", "Join with", 0)
+    joining.listItems.add("Glue", True, "")
+    generationMode = inputs.addDropDownCommandInput("generationModeDropDown", "Pocket Generation", 0)
+    generationMode.listItems.add("Sketch every Pocket", not options.get("pattern", False), "")
+    generationMode.listItems.add("Pattern Pockets", options.get("pattern", False), "")
+    return inputs
+
+
+def execute(main, options: dict):
+    import adsk.core
+    command = adsk.core.Command()
+    command._props["commandInputs"] = commandInputs(options)
+    main.KCCommandExecuteHandler().notify(adsk.core.CommandEventArgs(command=command))
+
+
+def runLayout(filename: str, options: dict, regenerate: bool = False) -> dict:
+    import adsk
+    import adsk.core
+    adsk.core.Application._reset()
+    adsk.resetCalls()
+
+    main = headless.module("UltimateKeyboardCreator")
+    FileParser = headless.module("FileParser")
+    Types = headless.module("Types")
+    KeyboardData = headless.module("KeyboardData")
+    FitChecker = headless.module("FitChecker")
+    Layout = headless.module("Layout")
+    Sketch = headless.module("Sketch")
+    Solids = headless.module("Solids")
+    BuildCache = headless.module("BuildCache")
+    Progress = headless.module("Progress")
+
+    recorder = StageRecorder()
+    # the stages are measured by wrapping the functions the execute handler calls, it imports them when it runs
+    originals = (FitChecker.create, Layout.createSketches, Layout.extrudeSketches, Sketch.createSplit, Solids.plateBody)
+    originalCache = (BuildCache.importArchive, BuildCache.store)
+    frameModule = headless.module("modules.frames.UKC_Default").UKC_Default
+    originalFrame = (frameModule.generateFrame, frameModule.generateFrameBodies)
+    originalClock = Progress.updateClock
+    Progress.updateClock = StepClock()
+    try:
+        keyboardObject = KeyboardData.KeyboardObject()
+        keyboardObject.importSketches = options.get("importSketches", True)
+        recorder.measure("parse", FileParser.parseLayoutFile)(filename, keyboardObject)
+        keyboardObject.frame = Types.Frame()
+        keyboardObject.frame.isModule = True
+        keyboardObject.frame.filename = "UKC_Default"
+        main.loadFrameModule(keyboardObject)
+        main.keyboardObject = keyboardObject
+        if regenerate:
+            execute(main, options)
+            options = dict(options, regenerateBox=True, printerWidthValue=options["printerWidthValue"] - 2.0)
+        elif options.get("buildCacheBox", False):
+            execute(main, options)
+
+        FitChecker.create = recorder.measure("fitchecker", originals[0])
+        Layout.createSketches = recorder.measure("layout", originals[1])
+        Layout.extrudeSketches = recorder.measure("layout", originals[2])
+        Sketch.createSplit = recorder.measure("split", originals[3])
+        Solids.plateBody = recorder.measure("layout", originals[4])
+        frameModule.generateFrame = recorder.measure("frame", originalFrame[0])
+        frameModule.generateFrameBodies = recorder.measure("frame", originalFrame[1])
+        BuildCache.importArchive = recorder.measure("cache", originalCache[0])
+        BuildCache.store = recorder.measure("cache", originalCache[1])
+        calls = adsk.totalCalls()
+        start = time.perf_counter()
+        execute(main, options)
+        executeSeconds = time.perf_counter() - start
+        executeCalls = adsk.totalCalls() - calls
+    finally:
+        FitChecker.create, Layout.createSketches, Layout.extrudeSketches, Sketch.createSplit, Solids.plateBody = originals
+        frameModule.generateFrame, frameModule.generateFrameBodies = originalFrame
+        BuildCache.importArchive, BuildCache.store = originalCache
+        Progress.updateClock = originalClock
+
+    # everything the handler does outside of the wrapped functions (mostly the split body features)
+    measured = [name for name in stageNames if name != "parse"]
+    recorder.add("split", executeCalls - sum(recorder.calls.get(name, 0) for name in measured),
+                 executeSeconds - sum(recorder.seconds.get(name, 0.0) for name in measured))
+    errors = adsk.core.Application.get().userInterface._messages
+    return {"layout": os.path.basename(filename), "keys": keyboardObject.keys, "calls": recorder.calls, "seconds": recorder.seconds,
+            "totalCalls": sum(recorder.calls.values()), "totalSeconds": sum(recorder.seconds.values()), "errors": errors}
+
+
+def printResults(results: list):
+    header = "{:<22}{:>6}".format("layout", "keys") + "".join("{:>18}".format(name) for name in stageNames) + "{:>18}".format("total")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        line = "{:<22}{:>6}".format(result["layout"][:21], result["keys"])
+        for name in stageNames:
+            line += "{:>10} {:>6.1f}ms".format(result["calls"].get(name, 0), result["seconds"].get(name, 0.0) * 1000)
+        line += "{:>10} {:>6.1f}ms".format(result["totalCalls"], result["totalSeconds"] * 1000)
+        print(line)
+        for error in result["errors"]:
+            print("  " + error.replace("\n", "\n  "))
+
+
+# runs every layout with the SVG import and with the per entity sketching and prints the layout stage of both
+def compareImport(filenames: list, options: dict, verbose: bool) -> int:
+    options = dict(options, parametricBox=False)
+    header = "{:<22}{:>6}{:>26}{:>26}{:>10}".format("layout", "keys", "per entity", "svg import", "speedup")
+    print(header)
+    print("-" * len(header))
+    failed = False
+    for filename in filenames:
+        with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+            entities = runLayout(filename, dict(options, importSketches=False))
+            imported = runLayout(filename, dict(options, importSketches=True))
+        line = "{:<22}{:>6}".format(entities["layout"][:21], entities["keys"])
+        for result in (entities, imported):
+            line += "{:>14} {:>9.1f}ms".format(result["calls"].get("layout", 0), result["seconds"].get("layout", 0.0) * 1000)
+        line += "{:>9.1f}x".format(entities["seconds"].get("layout", 0.0) / max(imported["seconds"].get("layout", 0.0), 1e-9))
+        print(line)
+        for error in entities["errors"] + imported["errors"]:
+            failed = True
+            print("  " + error.replace("\n", "\n  "))
+    return 1 if failed else 0
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="API call benchmark for the UltimateKeyboardCreator")
+    parser.add_argument("layouts", nargs="*", help="layout files, defaults to resources/defaultLayouts")
+    parser.add_argument("--no-fixed", action="store_true", help="disable fixedSketch")
+    parser.add_argument("--no-parametric", action="store_true", help="disable parametricModel")
+    parser.add_argument("--no-fitchecker", action="store_true", help="skip the FitChecker")
+    parser.add_argument("--pattern", action="store_true", help="pattern the pockets instead of sketching every pocket")
+    parser.add_argument("--compare-import", action="store_true", help="compare the SVG import with sketching every line")
+    parser.add_argument("--fast-solid", action="store_true", help="build temporary bodies and add them in one base feature")
+    parser.add_argument("--cache", action="store_true", help="measure a build that is imported from the build cache")
+    parser.add_argument("--regenerate", action="store_true", help="measure a regeneration in place after a printer change")
+    parser.add_argument("--printer", type=float, default=20.0, help="printer width and depth in cm")
+    parser.add_argument("--check", action="store_true", help="fail if the calls exceed the baseline")
+    parser.add_argument("--update", action="store_true", help="write the results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="allowed relative increase over the baseline")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--trace", help="write a Chrome trace of every layout into this folder")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the add-in")
+    args = parser.parse_args(argv)
+
+    headless.loadAddIn()
+    options = {"fixedSketchBox": not args.no_fixed, "parametricBox": not args.no_parametric, "fitCheckerBox": not args.no_fitchecker,
+               "pattern": args.pattern, "printerWidthValue": args.printer, "printerDepthValue": args.printer, "switchWidth": 1.4, "switchDepth": 1.4,
+               "fastSolidBox": args.fast_solid, "buildCacheBox": args.cache}
+    if args.cache:
+        cacheFolder = tempfile.TemporaryDirectory()
+        headless.module("BuildCache").cachePath = cacheFolder.name + "/"
+    if args.compare_import:
+        return compareImport(args.layouts or headless.defaultLayouts(), options, args.verbose)
+    results = []
+    for filename in args.layouts or headless.defaultLayouts():
+        if args.trace:
+            os.makedirs(args.trace, exist_ok=True)
+            os.environ["UKC_TRACE"] = os.path.join(args.trace, os.path.basename(filename).rpartition(".")[0] + ".trace.json")
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            results.append(runLayout(filename, options, args.regenerate))
+    printResults(results)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+
+    failed = any(result["errors"] for result in results)
+    # the baseline is only meaningful for the default configuration
+    if args.check or args.update:
+        if args.no_fixed or args.no_parametric or args.no_fitchecker or args.pattern or args.fast_solid or args.cache or args.regenerate or args.printer != 20.0:
+            print("the baseline is recorded with the default options only")
+            return 2
+    if args.update:
+        baseline = {result["layout"]: result["totalCalls"] for result in results}
+        with open(baselinePath, "w") as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+            file.write("\n")
+        print("baseline written to " + baselinePath)
+    elif args.check:
+        with open(baselinePath) as file:
+            baseline = json.load(file)
+        for result in results:
+            allowed = baseline.get(result["layout"])
+            if allowed is not None and result["totalCalls"] > allowed * (1 + args.tolerance):
+                print("REGRESSION: {} issues {} calls, baseline is {}".format(result["layout"], result["totalCalls"], allowed))
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
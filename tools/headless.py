@@ -0,0 +1,42 @@
+# Loads the UKC add-in outside of Fusion 360, the recording adsk stand-in in tools/stubs replaces the Fusion API
+
+import importlib
+import importlib.util
+import os
+import sys
+
+toolsPath = os.path.dirname(os.path.abspath(__file__))
+addInPath = os.path.dirname(toolsPath)
+packageName = "UltimateKeyboardCreator"
+
+
+# registers the add-in folder as package, like Fusion 360 the main script is the package itself
+# without stubs only the modules that don't use the Fusion API are importable
+def loadAddIn(stubs: bool = True):
+    if packageName in sys.modules:
+        return sys.modules[packageName]
+    if stubs:
+        if os.path.join(toolsPath, "stubs") not in sys.path:
+            sys.path.insert(0, os.path.join(toolsPath, "stubs"))
+        location = os.path.join(addInPath, packageName + ".py")
+    else:
+        location = os.path.join(addInPath, "__init__.py")
+    spec = importlib.util.spec_from_file_location(packageName, location, submodule_search_locations=[addInPath])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[packageName] = package
+    if stubs:
+        spec.loader.exec_module(package)
+    return package
+
+
+# imports a module of the add-in, loadAddIn has to be called first
+def module(name: str):
+    if name == packageName:
+        return sys.modules[packageName]
+    return importlib.import_module(packageName + "." + name)
+
+
+def defaultLayouts() -> list:
+    layoutPath = os.path.join(addInPath, "resources", "defaultLayouts")
+    return sorted(os.path.join(layoutPath, filename) for filename in os.listdir(layoutPath)
+                  if filename.lower().endswith(".json") and not filename.startswith("."))
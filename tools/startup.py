@@ -0,0 +1,108 @@
+# Measures the add-in startup against the recording adsk stand-in: the import of the add-in, run() until the command
+# dialog is ready and opening the dialog a second time. Every run is a fresh interpreter so nothing is cached in memory,
+# the layout and frame catalogs on disk are used like they are in Fusion.
+#
+#   python tools/startup.py [--runs 10] [--layouts 500] [--frames 50] [--check 100]
+#
+# --layouts and --frames fill temporary folders with copies of the default layouts and frame modules.
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import headless
+
+child = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {toolsPath!r})
+import headless
+main = headless.loadAddIn()
+imported = time.perf_counter()
+if {layoutPath!r}:
+    FileParser = headless.module("FileParser")
+    main.getDefaultLayouts = lambda: FileParser.getLayouts({layoutPath!r})
+if {framePath!r}:
+    headless.module("Frame").framesPath = {framePath!r}
+import adsk.core
+ready = time.perf_counter()
+main.run(None)
+dialog = time.perf_counter()
+main.KCCommandCreatedEventHandler().notify(adsk.core.CommandCreatedEventArgs(command=adsk.core.Command()))
+reopened = time.perf_counter()
+errors = adsk.core.Application.get().userInterface._messages
+print(json.dumps({{"import": imported - start, "run": dialog - ready, "reopen": reopened - dialog, "errors": errors,
+                  "modules": sorted(name for name in sys.modules if name.startswith("UltimateKeyboardCreator."))}}))
+"""
+
+
+def measure(layoutPath: str, framePath: str) -> dict:
+    code = child.format(toolsPath=headless.toolsPath, layoutPath=layoutPath, framePath=framePath)
+    output = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, universal_newlines=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+# copies the default layouts until there are count of them, every copy gets its own name
+def fillLayouts(path: str, count: int):
+    layouts = headless.defaultLayouts()
+    for i in range(count):
+        with open(layouts[i % len(layouts)]) as file:
+            data = json.load(file)
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            data[0] = dict(data[0], name="{} ({})".format(data[0].get("name", "Layout"), i))
+        else:
+            data = [{"name": "Layout {}".format(i)}] + data
+        with open(os.path.join(path, "layout{}.json".format(i)), "w") as file:
+            json.dump(data, file)
+
+
+# the default frame and count renamed copies of it, the copies are only listed and never imported
+def fillFrames(path: str, count: int):
+    source = os.path.join(headless.addInPath, "modules", "frames", "UKC_Default.py")
+    shutil.copy(source, os.path.join(path, "UKC_Default.py"))
+    with open(source) as file:
+        code = file.read()
+    for i in range(count):
+        with open(os.path.join(path, "Frame_{}.py".format(i)), "w") as file:
+            file.write(code.replace("class UKC_Default(", "class Frame_{}(".format(i)))
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="startup benchmark for the UltimateKeyboardCreator")
+    parser.add_argument("--runs", type=int, default=10, help="number of fresh interpreters")
+    parser.add_argument("--layouts", type=int, default=0, help="use this many layouts instead of the default layouts")
+    parser.add_argument("--frames", type=int, default=0, help="add this many frame modules to the default frame")
+    parser.add_argument("--check", type=float, help="fail if the median from run() to the ready dialog takes longer (ms)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as layoutPath, tempfile.TemporaryDirectory() as framePath:
+        if args.layouts:
+            fillLayouts(layoutPath, args.layouts)
+        if args.frames:
+            fillFrames(framePath, args.frames)
+        results = [measure(layoutPath + "/" if args.layouts else "", framePath + "/" if args.frames else "") for run in range(args.runs)]
+
+    print("{:<10}{:>12}{:>12}{:>12}".format("", "median", "min", "max"))
+    for name in ("import", "run", "reopen"):
+        values = [result[name] * 1000 for result in results]
+        print("{:<10}{:>10.1f}ms{:>10.1f}ms{:>10.1f}ms".format(name, statistics.median(values), min(values), max(values)))
+    print("modules loaded at the ready dialog: " + ", ".join(name.partition(".")[2] for name in results[-1]["modules"]))
+    failed = False
+    for error in results[-1]["errors"]:
+        failed = True
+        print("  " + error.replace("\n", "\n  "))
+    if args.check is not None:
+        median = statistics.median(result["run"] * 1000 for result in results)
+        if median > args.check:
+            print("SLOW: the dialog took {:.1f}ms, allowed are {:.1f}ms".format(median, args.check))
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,30 @@
+# Recording stand-in for the Fusion 360 API, only used by the headless tools in /tools
+# Every method call, property read, property write and collection item fetch counts as one API round-trip.
+
+from collections import Counter
+
+calls: Counter = Counter()
+
+
+def record(name: str):
+    calls[name] += 1
+
+
+def totalCalls() -> int:
+    return sum(calls.values())
+
+
+def resetCalls():
+    calls.clear()
+
+
+def autoTerminate(value: bool):
+    record("adsk.autoTerminate")
+
+
+def terminate():
+    record("adsk.terminate")
+
+
+def doEvents():
+    record("adsk.doEvents")
@@ -0,0 +1 @@
+# Recording stand-in for adsk.cam, the UKC does not use the CAM API
@@ -0,0 +1,451 @@
+# Recording stand-in for adsk.core
+# Only the parts of the API the UKC uses are modeled, geometry is tracked as bounding boxes.
+
+import functools
+
+from . import record
+
+
+def _recorded(name: str, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        owner = args[0] if isinstance(args[0], type) else type(args[0])
+        record(owner.__name__ + "." + name)
+        return function(*args, **kwargs)
+    return wrapper
+
+
+# base class for every API object, public methods, property reads and property writes are recorded
+class Base:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, value in list(cls.__dict__.items()):
+            if name.startswith("_"):
+                continue
+            if isinstance(value, classmethod):
+                setattr(cls, name, classmethod(_recorded(name, value.__func__)))
+            elif isinstance(value, staticmethod):
+                setattr(cls, name, staticmethod(_recorded(name, value.__func__)))
+            elif isinstance(value, property):
+                setattr(cls, name, property(_recorded(name, value.fget), value.fset))
+            elif callable(value) and not isinstance(value, type):
+                setattr(cls, name, _recorded(name, value))
+
+    def __init__(self, **props):
+        object.__setattr__(self, "_props", dict(props))
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        props = object.__getattribute__(self, "_props")
+        if name not in props:
+            raise AttributeError(type(self).__name__ + " has no attribute " + name)
+        record(type(self).__name__ + "." + name)
+        return props[name]
+
+    def __setattr__(self, name: str, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        record(type(self).__name__ + "." + name + "=")
+        self._props[name] = value
+        self._changed(name, value)
+
+    def _changed(self, name: str, value):
+        pass
+
+    @classmethod
+    def cast(cls, obj):
+        record(cls.__name__ + ".cast")
+        return obj
+
+
+# base class for every API collection, every fetched item is one round-trip
+class Collection(Base):
+    def __init__(self, items: list = None, **props):
+        super().__init__(**props)
+        self._items = items if items is not None else []
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    def item(self, index: int):
+        return self._items[index]
+
+    def itemByName(self, name: str):
+        for entry in self._items:
+            if entry._props.get("name") == name:
+                return entry
+        return None
+
+    def itemById(self, id: str):
+        for entry in self._items:
+            if entry._props.get("id") == id:
+                return entry
+        return None
+
+    def __iter__(self):
+        for entry in list(self._items):
+            record(type(self).__name__ + ".item")
+            yield entry
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class EventHandler:
+    def __init__(self):
+        pass
+
+
+class CommandCreatedEventHandler(EventHandler):
+    pass
+
+
+class CommandEventHandler(EventHandler):
+    pass
+
+
+class InputChangedEventHandler(EventHandler):
+    pass
+
+
+class Event(Base):
+    def __init__(self):
+        super().__init__()
+        self._handlers = []
+
+    def add(self, handler) -> bool:
+        self._handlers.append(handler)
+        return True
+
+    def remove(self, handler) -> bool:
+        self._handlers.remove(handler)
+        return True
+
+    def _fire(self, args):
+        for handler in self._handlers:
+            handler.notify(args)
+
+
+class Point3D(Base):
+    @classmethod
+    def create(cls, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        return cls(x=x, y=y, z=z)
+
+    def copy(self):
+        return Point3D.create(self._props["x"], self._props["y"], self._props["z"])
+
+    def distanceTo(self, point) -> float:
+        return ((self._props["x"] - point._props["x"]) ** 2 + (self._props["y"] - point._props["y"]) ** 2 + (self._props["z"] - point._props["z"]) ** 2) ** 0.5
+
+
+class Vector3D(Base):
+    @classmethod
+    def create(cls, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        return cls(x=x, y=y, z=z)
+
+
+class Matrix3D(Base):
+    @classmethod
+    def create(cls):
+        return cls(translation=Vector3D.create())
+
+    def setCell(self, row: int, column: int, value: float) -> bool:
+        if column == 3 and row < 3:
+            translation = self._props["translation"]
+            translation._props["xyz"[row]] = value
+        return True
+
+
+class BoundingBox3D(Base):
+    @classmethod
+    def create(cls, minPoint: Point3D, maxPoint: Point3D):
+        return cls(minPoint=minPoint, maxPoint=maxPoint)
+
+    def combine(self, box) -> bool:
+        for attribute, pick in (("minPoint", min), ("maxPoint", max)):
+            mine = self._props[attribute]._props
+            other = box._props[attribute]._props
+            for axis in "xyz":
+                mine[axis] = pick(mine[axis], other[axis])
+        return True
+
+
+class OrientedBoundingBox3D(Base):
+    @classmethod
+    def create(cls, centerPoint: Point3D, lengthDirection: Vector3D, widthDirection: Vector3D, length: float, width: float, height: float):
+        return cls(centerPoint=centerPoint, length=length, width=width, height=height)
+
+
+class ValueInput(Base):
+    @classmethod
+    def createByReal(cls, value: float):
+        return cls(realValue=value)
+
+    @classmethod
+    def createByString(cls, value: str):
+        return cls(stringValue=value)
+
+
+class ObjectCollection(Collection):
+    @classmethod
+    def create(cls):
+        return cls()
+
+    def add(self, entity) -> bool:
+        self._items.append(entity)
+        return True
+
+    def clear(self) -> bool:
+        self._items.clear()
+        return True
+
+
+class ProgressDialog(Base):
+    def __init__(self):
+        super().__init__(message="", progressValue=0, maximumValue=0, isBackgroundTranslucent=True, isCancelButtonShown=True, isShowing=False, wasCancelled=False, title="")
+
+    def show(self, title: str, message: str, minimumValue: int, maximumValue: int, delay: int = 0) -> bool:
+        self._props.update(title=title, message=message, progressValue=minimumValue, maximumValue=maximumValue, isShowing=True)
+        return True
+
+    def hide(self) -> bool:
+        self._props["isShowing"] = False
+        return True
+
+    def reset(self) -> bool:
+        self._props["progressValue"] = 0
+        return True
+
+
+class Camera(Base):
+    def __init__(self):
+        super().__init__(cameraType=0, viewOrientation=0, upVector=None, isFitView=False)
+
+
+class Viewport(Base):
+    def __init__(self):
+        super().__init__(camera=Camera())
+
+    def fit(self) -> bool:
+        return True
+
+    def refresh(self) -> bool:
+        return True
+
+
+class FileDialog(Base):
+    def __init__(self):
+        super().__init__(title="", filter="", filename="", isMultiSelectEnabled=False)
+
+    def showOpen(self) -> int:
+        return DialogResults.DialogCancel
+
+
+class UserInterface(Base):
+    def __init__(self):
+        super().__init__(commandDefinitions=CommandDefinitions())
+        self._messages = []
+
+    def messageBox(self, text: str, title: str = "", buttons: int = 0, icon: int = 0) -> int:
+        self._messages.append(text)
+        return DialogResults.DialogOK
+
+    def createProgressDialog(self) -> ProgressDialog:
+        return ProgressDialog()
+
+    def createFileDialog(self) -> FileDialog:
+        return FileDialog()
+
+
+class Application(Base):
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        if Application._instance is None:
+            from . import fusion
+            Application._instance = Application(userInterface=UserInterface(), activeProduct=fusion.Design(), activeViewport=Viewport(), importManager=fusion.ImportManager())
+        return Application._instance
+
+    @classmethod
+    def _reset(cls):
+        Application._instance = None
+
+
+# ---------------------------------- COMMANDS --------------------------------------------------
+
+class CommandInput(Base):
+    def __init__(self, id: str, name: str, **props):
+        props.setdefault("isVisible", True)
+        props.setdefault("isEnabled", True)
+        props.setdefault("tooltip", "")
+        props.setdefault("tooltipDescription", "")
+        super().__init__(id=id, name=name, **props)
+
+
+class ValueCommandInput(CommandInput):
+    pass
+
+
+class BoolValueCommandInput(CommandInput):
+    pass
+
+
+class TextBoxCommandInput(CommandInput):
+    pass
+
+
+class ListItem(Base):
+    def _changed(self, name: str, value):
+        # only one item of a dropdown can be selected
+        if name == "isSelected" and value:
+            for other in self._props["parent"]._items:
+                if other is not self:
+                    other._props["isSelected"] = False
+
+
+class ListItems(Collection):
+    def add(self, name: str, isSelected: bool, icon: str = "", beforeIndex: int = -1) -> ListItem:
+        listItem = ListItem(name=name, isSelected=False, icon=icon, parent=self, index=len(self._items))
+        self._items.append(listItem)
+        if isSelected:
+            listItem.isSelected = True
+        return listItem
+
+    def clear(self) -> bool:
+        self._items.clear()
+        return True
+
+
+class DropDownCommandInput(CommandInput):
+    def __init__(self, id: str, name: str, **props):
+        super().__init__(id, name, listItems=ListItems(), **props)
+
+    @property
+    def selectedItem(self) -> ListItem:
+        for listItem in self._props["listItems"]._items:
+            if listItem._props["isSelected"]:
+                return listItem
+        return None
+
+
+class CommandInputs(Collection):
+    def __init__(self, command=None, registry: list = None):
+        super().__init__()
+        self._command = command
+        # all inputs of a command, regardless of their group or tab
+        self._registry = registry if registry is not None else []
+
+    def _add(self, commandInput: CommandInput) -> CommandInput:
+        self._items.append(commandInput)
+        self._registry.append(commandInput)
+        return commandInput
+
+    def itemById(self, id: str):
+        for commandInput in self._registry:
+            if commandInput._props["id"] == id:
+                return commandInput
+        return None
+
+    def addTabCommandInput(self, id: str, name: str, resourceFolder: str = "") -> CommandInput:
+        return self._add(CommandInput(id, name, children=CommandInputs(self._command, self._registry)))
+
+    def addGroupCommandInput(self, id: str, name: str) -> CommandInput:
+        return self._add(CommandInput(id, name, isExpanded=True, children=CommandInputs(self._command, self._registry)))
+
+    def addBoolValueInput(self, id: str, name: str, isCheckBox: bool, resourceFolder: str = "", initialValue: bool = False) -> BoolValueCommandInput:
+        return self._add(BoolValueCommandInput(id, name, value=initialValue))
+
+    def addValueInput(self, id: str, name: str, unitType: str, initialValue: ValueInput) -> ValueCommandInput:
+        value = initialValue._props.get("realValue", 0.0)
+        return self._add(ValueCommandInput(id, name, value=value, unitType=unitType))
+
+    def addDropDownCommandInput(self, id: str, name: str, dropDownStyle: int) -> DropDownCommandInput:
+        return self._add(DropDownCommandInput(id, name))
+
+    def addTextBoxCommandInput(self, id: str, name: str, formattedText: str, numRows: int, isReadOnly: bool) -> TextBoxCommandInput:
+        return self._add(TextBoxCommandInput(id, name, formattedText=formattedText, numRows=numRows, isReadOnly=isReadOnly))
+
+
+class Command(Base):
+    def __init__(self):
+        super().__init__(okButtonText="OK", commandCreated=None, execute=Event(), inputChanged=Event(), executePreview=Event(), destroy=Event())
+        self._props["commandInputs"] = CommandInputs(self)
+
+    def setDialogInitialSize(self, width: int, height: int) -> bool:
+        return True
+
+    def setDialogMinimumSize(self, width: int, height: int) -> bool:
+        return True
+
+
+class CommandCreatedEventArgs(Base):
+    pass
+
+
+class CommandEventArgs(Base):
+    pass
+
+
+class InputChangedEventArgs(Base):
+    pass
+
+
+class CommandDefinition(Base):
+    def __init__(self, id: str, name: str, tooltip: str):
+        super().__init__(id=id, name=name, tooltip=tooltip, commandCreated=Event())
+
+    def execute(self) -> bool:
+        command = Command()
+        self._props["commandCreated"]._fire(CommandCreatedEventArgs(command=command))
+        return True
+
+    def deleteMe(self) -> bool:
+        return True
+
+
+class CommandDefinitions(Collection):
+    def addButtonDefinition(self, id: str, name: str, tooltip: str, resourceFolder: str = "") -> CommandDefinition:
+        definition = CommandDefinition(id, name, tooltip)
+        self._items.append(definition)
+        return definition
+
+
+# ---------------------------------- ENUMS -----------------------------------------------------
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+    DialogYes = 2
+    DialogNo = 3
+    DialogError = -1
+
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    CheckBoxDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+class CameraTypes:
+    OrthographicCameraType = 0
+    PerspectiveCameraType = 1
+
+
+class ViewOrientations:
+    IsoTopRightViewOrientation = 7
+
+
+class HorizontalAlignments:
+    LeftHorizontalAlignment = 0
+    CenterHorizontalAlignment = 1
+    RightHorizontalAlignment = 2
+
+
+class VerticalAlignments:
+    TopVerticalAlignment = 0
+    MiddleVerticalAlignment = 1
+    BottomVerticalAlignment = 2
@@ -0,0 +1,855 @@
+# Recording stand-in for adsk.fusion
+# Closed sketch loops, profiles and bodies are tracked as axis aligned bounding boxes, that is enough to run
+# the UKC generation code and to count its API round-trips, it is not a geometry kernel.
+
+import json
+import re
+
+from . import record
+from .core import Base, Collection, ObjectCollection, Point3D, BoundingBox3D
+
+
+def _box(minX: float, minY: float, minZ: float, maxX: float, maxY: float, maxZ: float) -> BoundingBox3D:
+    return BoundingBox3D(minPoint=Point3D(x=minX, y=minY, z=minZ), maxPoint=Point3D(x=maxX, y=maxY, z=maxZ))
+
+
+# every created sketch, feature and component is added to the timeline of the active design together with a
+# function that removes it again when the timeline is rolled back or the entity is deleted
+def _addToTimeline(name: str, undo, entity=None):
+    from .core import Application
+    Application.get()._props["activeProduct"]._props["timeline"]._add(name, undo, entity)
+
+
+def _coordinates(point) -> tuple:
+    if isinstance(point, SketchPoint):
+        point = point._props["geometry"]
+    return (point._props["x"], point._props["y"])
+
+
+# ---------------------------------- ENUMS -----------------------------------------------------
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+class DimensionOrientations:
+    AlignedDimensionOrientation = 0
+    HorizontalDimensionOrientation = 1
+    VerticalDimensionOrientation = 2
+
+
+class BooleanTypes:
+    DifferenceBooleanType = 0
+    IntersectionBooleanType = 1
+    UnionBooleanType = 2
+
+
+class ExtentDirections:
+    PositiveExtentDirection = 0
+    NegativeExtentDirection = 1
+    SymmetricExtentDirection = 2
+
+
+class PatternDistanceType:
+    ExtentPatternDistanceType = 0
+    SpacingPatternDistanceType = 1
+
+
+class PatternComputeOptions:
+    OptimizedPatternCompute = 0
+    IdenticalPatternCompute = 1
+    AdjustPatternCompute = 2
+
+
+# ---------------------------------- SKETCHES --------------------------------------------------
+
+class SketchPoint(Base):
+    def __init__(self, sketch, geometry: Point3D):
+        super().__init__(geometry=geometry, parentSketch=sketch, isFixed=False)
+
+
+class SketchLine(Base):
+    def __init__(self, sketch, start: SketchPoint, end: SketchPoint):
+        super().__init__(startSketchPoint=start, endSketchPoint=end, parentSketch=sketch, isFixed=False, isConstruction=False)
+
+    def deleteMe(self) -> bool:
+        sketch = self._props["parentSketch"]
+        sketch._props["sketchCurves"]._props["sketchLines"]._items.remove(self)
+        sketch._loops = [loop for loop in sketch._loops if self not in loop[4]]
+        return True
+
+
+class SketchArc(Base):
+    def __init__(self, sketch):
+        super().__init__(parentSketch=sketch, isFixed=False, isConstruction=False)
+
+
+class SketchLineList(Collection):
+    pass
+
+
+class SketchPoints(Collection):
+    def add(self, point: Point3D) -> SketchPoint:
+        return self._props["sketch"]._point(point)
+
+
+class SketchLines(Collection):
+    def addTwoPointRectangle(self, pointOne: Point3D, pointTwo: Point3D) -> SketchLineList:
+        sketch = self._props["sketch"]
+        x1, y1 = _coordinates(pointOne)
+        x2, y2 = _coordinates(pointTwo)
+        corners = [sketch._point(Point3D(x=x, y=y, z=0.0)) for x, y in ((x1, y1), (x2, y1), (x2, y2), (x1, y2))]
+        lines = [sketch._line(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+        sketch._addLoop(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2), lines)
+        return SketchLineList(lines)
+
+    def addByTwoPoints(self, startPoint, endPoint) -> SketchLine:
+        sketch = self._props["sketch"]
+        start = startPoint if isinstance(startPoint, SketchPoint) else sketch._point(startPoint)
+        end = endPoint if isinstance(endPoint, SketchPoint) else sketch._point(endPoint)
+        line = sketch._line(start, end)
+        sketch._chainLine(line)
+        return line
+
+
+class SketchArcs(Collection):
+    def addFillet(self, firstEntity, firstEntityPoint: Point3D, secondEntity, secondEntityPoint: Point3D, radius: float) -> SketchArc:
+        arc = SketchArc(self._props["sketch"])
+        self._items.append(arc)
+        return arc
+
+
+class SketchCircle(Base):
+    def __init__(self, sketch, center: SketchPoint, radius: float):
+        super().__init__(centerSketchPoint=center, radius=radius, parentSketch=sketch, isFixed=False, isConstruction=False)
+
+
+class SketchCircles(Collection):
+    def addByCenterRadius(self, centerPoint, radius: float) -> SketchCircle:
+        sketch = self._props["sketch"]
+        center = centerPoint if isinstance(centerPoint, SketchPoint) else sketch._point(centerPoint)
+        circle = SketchCircle(sketch, center, radius)
+        self._items.append(circle)
+        x, y = _coordinates(center)
+        sketch._addLoop(x - radius, y - radius, x + radius, y + radius, [circle])
+        return circle
+
+
+class SketchCurves(Base):
+    def __init__(self, sketch):
+        super().__init__(sketchLines=SketchLines(sketch=sketch), sketchArcs=SketchArcs(sketch=sketch), sketchCircles=SketchCircles(sketch=sketch))
+
+
+class SketchDimension(Base):
+    pass
+
+
+class SketchDimensions(Collection):
+    def addDistanceDimension(self, pointOne, pointTwo, orientation: int, textPoint: Point3D, isDriving: bool = True) -> SketchDimension:
+        dimension = SketchDimension(parameter=None)
+        self._items.append(dimension)
+        return dimension
+
+
+class GeometricConstraint(Base):
+    pass
+
+
+class GeometricConstraints(Collection):
+    def _constraint(self) -> GeometricConstraint:
+        constraint = GeometricConstraint()
+        self._items.append(constraint)
+        return constraint
+
+    def addHorizontal(self, line: SketchLine) -> GeometricConstraint:
+        return self._constraint()
+
+    def addVertical(self, line: SketchLine) -> GeometricConstraint:
+        return self._constraint()
+
+    def addCoincident(self, point, entity) -> GeometricConstraint:
+        return self._constraint()
+
+
+class SketchTextInput(Base):
+    def __init__(self, text: str, height: float):
+        super().__init__(text=text, height=height)
+
+    def setAsMultiLine(self, cornerPoint: Point3D, diagonalPoint: Point3D, horizontalAlignment: int, verticalAlignment: int, characterSpacing: float) -> bool:
+        return True
+
+
+class SketchText(Base):
+    pass
+
+
+# texts are no closed loops, they never become profiles
+class SketchTexts(Collection):
+    def createInput2(self, formattedText: str, height: float) -> SketchTextInput:
+        return SketchTextInput(formattedText, height)
+
+    def add(self, input: SketchTextInput) -> SketchText:
+        text = SketchText(text=input._props["text"], height=input._props["height"])
+        self._items.append(text)
+        return text
+
+
+class ProfileLoops(Collection):
+    pass
+
+
+class Profile(Base):
+    def __init__(self, sketch, index: int):
+        super().__init__(parentSketch=sketch)
+        self._index = index
+
+    def _extent(self) -> tuple:
+        return self._props["parentSketch"]._loops[self._index][:4]
+
+    @property
+    def boundingBox(self) -> BoundingBox3D:
+        minX, minY, maxX, maxY, lines = self._props["parentSketch"]._loops[self._index]
+        return _box(minX, minY, 0.0, maxX, maxY, 0.0)
+
+    @property
+    def profileLoops(self) -> ProfileLoops:
+        # an outer loop and every loop directly inside of it
+        loops = self._props["parentSketch"]._loops
+        minX, minY, maxX, maxY, lines = loops[self._index]
+        inner = [loop for i, loop in enumerate(loops) if i != self._index and loop[0] > minX and loop[1] > minY and loop[2] < maxX and loop[3] < maxY]
+        return ProfileLoops([None] * (1 + len(inner)))
+
+
+class Profiles(Collection):
+    pass
+
+
+# the open profile of connected curves, only its extent is tracked
+class OpenProfile(Profile):
+    def __init__(self, curves):
+        lines = curves._items if isinstance(curves, Collection) else [curves]
+        points = [_coordinates(line._props[name]) for line in lines for name in ("startSketchPoint", "endSketchPoint")]
+        super().__init__(lines[0]._props["parentSketch"], -1)
+        self._box = (min(x for x, y in points), min(y for x, y in points), max(x for x, y in points), max(y for x, y in points))
+
+    def _extent(self) -> tuple:
+        return self._box
+
+
+class ConstructionPlane(Base):
+    pass
+
+
+class ConstructionAxis(Base):
+    pass
+
+
+class Sketch(Base):
+    def __init__(self, component, plane: ConstructionPlane):
+        super().__init__(name="", isComputeDeferred=False, isLightBulbOn=True, isVisible=True, referencePlane=plane, parentComponent=component)
+        self._loops = []
+        self._chain = []
+        self._props["sketchCurves"] = SketchCurves(self)
+        self._props["sketchPoints"] = SketchPoints(sketch=self)
+        self._props["sketchDimensions"] = SketchDimensions()
+        self._props["sketchTexts"] = SketchTexts()
+        self._props["geometricConstraints"] = GeometricConstraints()
+        self._props["originPoint"] = SketchPoint(self, Point3D(x=0.0, y=0.0, z=0.0))
+
+    def _point(self, geometry: Point3D) -> SketchPoint:
+        point = SketchPoint(self, Point3D(x=geometry._props["x"], y=geometry._props["y"], z=geometry._props.get("z", 0.0)))
+        self._props["sketchPoints"]._items.append(point)
+        return point
+
+    def _line(self, start: SketchPoint, end: SketchPoint) -> SketchLine:
+        line = SketchLine(self, start, end)
+        self._props["sketchCurves"]._props["sketchLines"]._items.append(line)
+        return line
+
+    def _addLoop(self, minX: float, minY: float, maxX: float, maxY: float, lines: list):
+        self._loops.append((minX, minY, maxX, maxY, lines))
+
+    # connected lines added with addByTwoPoints become a loop once they end where they started
+    def _chainLine(self, line: SketchLine):
+        start = _coordinates(line._props["startSketchPoint"])
+        if self._chain and _coordinates(self._chain[-1]._props["endSketchPoint"]) != start:
+            self._chain = []
+        self._chain.append(line)
+        if _coordinates(line._props["endSketchPoint"]) == _coordinates(self._chain[0]._props["startSketchPoint"]):
+            points = [_coordinates(entry._props["startSketchPoint"]) for entry in self._chain]
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            self._addLoop(min(xs), min(ys), max(xs), max(ys), self._chain)
+            self._chain = []
+
+    @property
+    def profiles(self) -> Profiles:
+        return Profiles([Profile(self, i) for i in range(len(self._loops))])
+
+    def findConnectedCurves(self, curve) -> ObjectCollection:
+        for loop in self._loops:
+            if curve in loop[4]:
+                return ObjectCollection(list(loop[4]))
+        return ObjectCollection([curve])
+
+    def offset(self, curves: ObjectCollection, directionPoint: Point3D, offset: float) -> ObjectCollection:
+        for loop in self._loops:
+            if curves._items and curves._items[0] in loop[4]:
+                minX, minY, maxX, maxY = loop[0] - offset, loop[1] - offset, loop[2] + offset, loop[3] + offset
+                lines = [SketchLine(self, None, None) for i in range(4)]
+                self._addLoop(minX, minY, maxX, maxY, lines)
+                return ObjectCollection(lines)
+        return ObjectCollection()
+
+    def deleteMe(self) -> bool:
+        if "timelineObject" in self._props:
+            return self._props["timelineObject"]._delete()
+        self._props["parentComponent"]._props["sketches"]._items.remove(self)
+        return True
+
+    @property
+    def boundingBox(self) -> BoundingBox3D:
+        if not self._loops:
+            return _box(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return _box(min(loop[0] for loop in self._loops), min(loop[1] for loop in self._loops), 0.0,
+                    max(loop[2] for loop in self._loops), max(loop[3] for loop in self._loops), 0.0)
+
+    # only <rect> elements and <path> elements made of straight lines are understood, the lower left corner of the
+    # SVG ends up at the given position
+    def importSVG(self, fullFilename: str, xPosition: float, yPosition: float, scale: float) -> bool:
+        with open(fullFilename) as file:
+            svg = file.read()
+        height = float(re.search(r'viewBox="[^ ]+ [^ ]+ [^ ]+ ([^"]+)"', svg).group(1))
+        for match in re.finditer(r'<rect x="([^"]+)" y="([^"]+)" width="([^"]+)" height="([^"]+)"', svg):
+            x, y, w, h = (float(value) * scale for value in match.groups())
+            x += xPosition
+            y = height * scale - y - h + yPosition
+            corners = [self._point(Point3D(x=px, y=py, z=0.0)) for px, py in ((x, y), (x + w, y), (x + w, y + h), (x, y + h))]
+            self._addLoop(x, y, x + w, y + h, [self._line(corners[i], corners[(i + 1) % 4]) for i in range(4)])
+        for match in re.finditer(r'<path d="M([^"Z]+)Z"', svg):
+            points = [tuple(float(value) * scale for value in point.split()) for point in match.group(1).split("L")]
+            points = [(x + xPosition, height * scale - y + yPosition) for x, y in points]
+            corners = [self._point(Point3D(x=x, y=y, z=0.0)) for x, y in points]
+            lines = [self._line(corners[i], corners[(i + 1) % len(corners)]) for i in range(len(corners))]
+            self._addLoop(min(x for x, y in points), min(y for x, y in points), max(x for x, y in points), max(y for x, y in points), lines)
+        return True
+
+    def move(self, sketchEntities: ObjectCollection, transform) -> bool:
+        translation = transform._props["translation"]._props
+        moved = set(id(entity) for entity in sketchEntities._items)
+        self._loops = [(loop[0] + translation["x"], loop[1] + translation["y"], loop[2] + translation["x"], loop[3] + translation["y"], loop[4])
+                       if any(id(line) in moved for line in loop[4]) else loop for loop in self._loops]
+        return True
+
+
+class Sketches(Collection):
+    def add(self, planarEntity: ConstructionPlane, occurrenceForCreation=None) -> Sketch:
+        sketch = Sketch(self._props["component"], planarEntity)
+        self._items.append(sketch)
+        _addToTimeline("Sketch", lambda: self._items.remove(sketch), sketch)
+        return sketch
+
+
+# ---------------------------------- BODIES ----------------------------------------------------
+
+class BRepBody(Base):
+    def __init__(self, component, box: tuple, name: str = ""):
+        super().__init__(name=name, isLightBulbOn=True, isVisible=True, parentComponent=component)
+        self._box = list(box)
+
+    @property
+    def boundingBox(self) -> BoundingBox3D:
+        return _box(*self._box)
+
+    def copyToComponent(self, target) -> "BRepBody":
+        component = target._props["component"] if isinstance(target, Occurrence) else target
+        return component._props["bRepBodies"]._new(self._box, self._props["name"])
+
+    def createForAssemblyContext(self, occurrence) -> "BRepBody":
+        return self
+
+    def deleteMe(self) -> bool:
+        self._props["parentComponent"]._props["bRepBodies"]._items.remove(self)
+        return True
+
+    # returns a function that restores the current shape and name of the body
+    def _restorer(self):
+        box = list(self._box)
+        name = self._props["name"]
+
+        def restore():
+            self._box = box
+            self._props["name"] = name
+        return restore
+
+
+class BRepBodies(Collection):
+    def _new(self, box, name: str = "") -> BRepBody:
+        body = BRepBody(self._props["component"], box, name)
+        self._items.append(body)
+        return body
+
+    # adds a temporary body, parametric designs need a base feature in edit mode
+    def add(self, body: BRepBody, baseFeature=None) -> BRepBody:
+        if baseFeature is not None and not baseFeature._isEditing:
+            raise RuntimeError("the base feature is not in edit mode")
+        return self._new(body._box, body._props["name"])
+
+
+# temporary bodies have no component and are not part of the timeline
+class TemporaryBRepManager(Base):
+    _instance = None
+
+    @classmethod
+    def get(cls) -> "TemporaryBRepManager":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def copy(self, body: BRepBody) -> BRepBody:
+        return BRepBody(None, body._box, body._props["name"])
+
+    def createBox(self, box) -> BRepBody:
+        center = box._props["centerPoint"]._props
+        size = (box._props["length"] / 2, box._props["width"] / 2, box._props["height"] / 2)
+        return BRepBody(None, (center["x"] - size[0], center["y"] - size[1], center["z"] - size[2],
+                               center["x"] + size[0], center["y"] + size[1], center["z"] + size[2]))
+
+    def createCylinderOrCone(self, pointOne, pointOneRadius: float, pointTwo, pointTwoRadius: float) -> BRepBody:
+        radius = max(pointOneRadius, pointTwoRadius)
+        one, two = pointOne._props, pointTwo._props
+        return BRepBody(None, (min(one["x"], two["x"]) - radius, min(one["y"], two["y"]) - radius, min(one["z"], two["z"]),
+                               max(one["x"], two["x"]) + radius, max(one["y"], two["y"]) + radius, max(one["z"], two["z"])))
+
+    def transform(self, body: BRepBody, transform) -> bool:
+        translation = transform._props["translation"]._props
+        offset = (translation["x"], translation["y"], translation["z"])
+        body._box = [value + offset[i % 3] for i, value in enumerate(body._box)]
+        return True
+
+    def booleanOperation(self, targetBody: BRepBody, toolBody: BRepBody, booleanType: int) -> bool:
+        if booleanType == BooleanTypes.UnionBooleanType:
+            targetBody._box = [min(targetBody._box[i], toolBody._box[i]) for i in range(3)] + [max(targetBody._box[i], toolBody._box[i]) for i in range(3, 6)]
+        elif booleanType == BooleanTypes.IntersectionBooleanType:
+            targetBody._box = [max(targetBody._box[i], toolBody._box[i]) for i in range(3)] + [min(targetBody._box[i], toolBody._box[i]) for i in range(3, 6)]
+        return True
+
+
+class BodyList(Collection):
+    pass
+
+
+# ---------------------------------- FEATURES --------------------------------------------------
+
+class DistanceExtentDefinition(Base):
+    @classmethod
+    def create(cls, distance):
+        return cls(distance=distance)
+
+
+class FromEntityStartDefinition(Base):
+    @classmethod
+    def create(cls, entity, offset):
+        return cls(entity=entity, offset=offset)
+
+
+class ExtrudeFeatureInput(Base):
+    def __init__(self, profile, operation: int):
+        super().__init__(profile=profile, operation=operation, startExtent=None, participantBodies=[], isSolid=True)
+        self._distance = 0.0
+        self._isSymmetric = False
+
+    def setDistanceExtent(self, isSymmetric: bool, distance) -> bool:
+        self._distance = distance._props["realValue"]
+        self._isSymmetric = isSymmetric
+        return True
+
+    def setOneSideExtent(self, extent: DistanceExtentDefinition, direction: int, taperAngle=None) -> bool:
+        self._distance = extent._props["distance"]._props["realValue"]
+        return True
+
+    def setSymmetricExtent(self, distance, isFullLength: bool) -> bool:
+        self._distance = distance._props["realValue"] / 2 if isFullLength else distance._props["realValue"]
+        self._isSymmetric = True
+        return True
+
+    def setAllExtent(self, direction: int) -> bool:
+        self._distance = 10.0
+        self._isSymmetric = True
+        return True
+
+
+# features are deleted through their timeline object, that undoes what they did to the bodies
+class Feature(Base):
+    def deleteMe(self) -> bool:
+        return self._props["timelineObject"]._delete()
+
+
+class ExtrudeFeature(Feature):
+    pass
+
+
+class ExtrudeFeatures(Collection):
+    def createInput(self, profile, operation: int) -> ExtrudeFeatureInput:
+        return ExtrudeFeatureInput(profile, operation)
+
+    def add(self, input: ExtrudeFeatureInput) -> ExtrudeFeature:
+        component = self._props["component"]
+        profiles = input._props["profile"]
+        profiles = profiles._items if isinstance(profiles, Collection) else [profiles]
+        boxes = [profile._extent() for profile in profiles if isinstance(profile, Profile)]
+        start = 0.0
+        if input._props["startExtent"] is not None:
+            start = input._props["startExtent"]._props["offset"]._props["realValue"]
+        end = start + input._distance
+        if input._isSymmetric:
+            start, end = -abs(input._distance), abs(input._distance)
+        minZ, maxZ = min(start, end), max(start, end)
+        bodies = []
+        if boxes:
+            box = (min(b[0] for b in boxes), min(b[1] for b in boxes), minZ, max(b[2] for b in boxes), max(b[3] for b in boxes), maxZ)
+        else:
+            box = (0.0, 0.0, minZ, 0.0, 0.0, maxZ)
+        operation = input._props["operation"]
+        undo = None
+        if operation == FeatureOperations.NewBodyFeatureOperation or not input._props["isSolid"]:
+            body = component._props["bRepBodies"]._new(box)
+            bodies.append(body)
+            undo = body.deleteMe
+        elif operation == FeatureOperations.JoinFeatureOperation:
+            target = input._props["participantBodies"][0] if input._props["participantBodies"] else None
+            for body in component._props["bRepBodies"]._items if target is None else []:
+                if body._box[0] <= box[3] and box[0] <= body._box[3] and body._box[1] <= box[4] and box[1] <= body._box[4] and body._box[2] <= box[5] and box[2] <= body._box[5]:
+                    target = body
+            if target is None:
+                target = component._props["bRepBodies"]._new(box)
+                undo = target.deleteMe
+            else:
+                undo = target._restorer()
+                target._box = [min(target._box[i], box[i]) for i in range(3)] + [max(target._box[i], box[i]) for i in range(3, 6)]
+            bodies.append(target)
+        feature = ExtrudeFeature(bodies=BodyList(bodies), parentComponent=component)
+        self._items.append(feature)
+        _addToTimeline("Extrude", lambda: (self._items.remove(feature), undo and undo()), feature)
+        return feature
+
+
+class CombineFeatureInput(Base):
+    def __init__(self, targetBody: BRepBody, toolBodies: ObjectCollection):
+        super().__init__(targetBody=targetBody, toolBodies=toolBodies, isKeepToolBodies=False, isNewComponent=False, operation=FeatureOperations.JoinFeatureOperation)
+
+
+class CombineFeature(Feature):
+    pass
+
+
+class CombineFeatures(Collection):
+    def createInput(self, targetBody: BRepBody, toolBodies: ObjectCollection) -> CombineFeatureInput:
+        return CombineFeatureInput(targetBody, toolBodies)
+
+    def add(self, input: CombineFeatureInput) -> CombineFeature:
+        target = input._props["targetBody"]
+        undo = [target._restorer()]
+        for tool in input._props["toolBodies"]._items:
+            if input._props["operation"] == FeatureOperations.JoinFeatureOperation:
+                target._box = [min(target._box[i], tool._box[i]) for i in range(3)] + [max(target._box[i], tool._box[i]) for i in range(3, 6)]
+            if not input._props["isKeepToolBodies"] and tool in tool._props["parentComponent"]._props["bRepBodies"]._items:
+                tool._props["parentComponent"]._props["bRepBodies"]._items.remove(tool)
+                undo.append(lambda tool=tool: tool._props["parentComponent"]._props["bRepBodies"]._items.append(tool))
+        feature = CombineFeature(bodies=BodyList([target]), parentComponent=self._props["component"])
+        self._items.append(feature)
+        _addToTimeline("Combine", lambda: (self._items.remove(feature), [function() for function in undo]), feature)
+        return feature
+
+
+class SplitBodyFeatureInput(Base):
+    def __init__(self, splitBodies, splittingTool, isSplittingToolExtended: bool):
+        super().__init__(splitBodies=splitBodies, splittingTool=splittingTool, isSplittingToolExtended=isSplittingToolExtended)
+
+
+class SplitBodyFeature(Feature):
+    pass
+
+
+class SplitBodyFeatures(Collection):
+    def createInput(self, splitBodies, splittingTool, isSplittingToolExtended: bool) -> SplitBodyFeatureInput:
+        return SplitBodyFeatureInput(splitBodies, splittingTool, isSplittingToolExtended)
+
+    def add(self, input: SplitBodyFeatureInput) -> SplitBodyFeature:
+        bodies = input._props["splitBodies"]
+        bodies = bodies._items if isinstance(bodies, Collection) else [bodies]
+        tool = input._props["splittingTool"]
+        if isinstance(tool, Collection):
+            raise RuntimeError("the splitting tool is a single body, construction plane, profile or face")
+        # a horizontal line splits along y, a vertical line along x, a surface along x at its leftmost and rightmost position
+        axis, low, high = 0, None, None
+        if isinstance(tool, BRepBody):
+            low, high = tool._box[0], tool._box[3]
+        elif isinstance(tool, SketchLine) and tool._props["startSketchPoint"] is not None:
+            (x1, y1), (x2, y2) = [_coordinates(point) for point in (tool._props["startSketchPoint"], tool._props["endSketchPoint"])]
+            if y1 == y2:
+                axis, low, high = 1, y1, y1
+            elif x1 == x2:
+                low, high = x1, x1
+        result = []
+        undo = []
+        for body in bodies:
+            minimum, maximum = body._box[axis], body._box[axis + 3]
+            cutLow = (minimum + maximum) / 2 if low is None else low
+            cutHigh = (minimum + maximum) / 2 if high is None else high
+            bodyList = body._props["parentComponent"]._props["bRepBodies"]
+            if minimum < cutLow and cutHigh < maximum:
+                bodyList._items.remove(body)
+                lower, upper = list(body._box), list(body._box)
+                lower[axis + 3] = cutHigh
+                upper[axis] = cutLow
+                parts = [bodyList._new(lower, body._props["name"]), bodyList._new(upper, body._props["name"])]
+                result += parts
+                undo.append(lambda bodyList=bodyList, body=body, parts=parts: ([bodyList._items.remove(part) for part in parts], bodyList._items.append(body)))
+            else:
+                result.append(body)
+        feature = SplitBodyFeature(bodies=BodyList(result), parentComponent=self._props["component"])
+        self._items.append(feature)
+        _addToTimeline("Split", lambda: (self._items.remove(feature), [function() for function in undo]), feature)
+        return feature
+
+
+class BaseFeature(Feature):
+    def __init__(self, component):
+        super().__init__(name="", parentComponent=component)
+        self._isEditing = False
+
+    def startEdit(self) -> bool:
+        self._isEditing = True
+        return True
+
+    def finishEdit(self) -> bool:
+        self._isEditing = False
+        return True
+
+
+class BaseFeatures(Collection):
+    def add(self) -> BaseFeature:
+        component = self._props["component"]
+        feature = BaseFeature(component)
+        self._items.append(feature)
+        bodies = list(component._props["bRepBodies"]._items)
+        _addToTimeline("BaseFeature", lambda: (self._items.remove(feature), component._props["bRepBodies"]._items.__setitem__(slice(None), bodies)), feature)
+        return feature
+
+
+class RectangularPatternFeatureInput(Base):
+    def __init__(self, inputEntities: ObjectCollection, directionOneEntity, quantityOne, distanceOne, patternDistanceType: int):
+        super().__init__(inputEntities=inputEntities, directionOneEntity=directionOneEntity, quantityOne=quantityOne, distanceOne=distanceOne,
+                         patternDistanceType=patternDistanceType, patternComputeOption=PatternComputeOptions.OptimizedPatternCompute)
+
+
+class RectangularPatternFeature(Feature):
+    pass
+
+
+# the copies of patterned cuts are not tracked, bodies only keep their bounding box
+class RectangularPatternFeatures(Collection):
+    def createInput(self, inputEntities: ObjectCollection, directionOneEntity, quantityOne, distanceOne, patternDistanceType: int) -> RectangularPatternFeatureInput:
+        return RectangularPatternFeatureInput(inputEntities, directionOneEntity, quantityOne, distanceOne, patternDistanceType)
+
+    def add(self, input: RectangularPatternFeatureInput) -> RectangularPatternFeature:
+        feature = RectangularPatternFeature(parentComponent=self._props["component"])
+        self._items.append(feature)
+        _addToTimeline("RectangularPattern", lambda: self._items.remove(feature), feature)
+        return feature
+
+
+class Features(Base):
+    def __init__(self, component):
+        super().__init__(extrudeFeatures=ExtrudeFeatures(component=component), combineFeatures=CombineFeatures(component=component),
+                         splitBodyFeatures=SplitBodyFeatures(component=component), baseFeatures=BaseFeatures(component=component),
+                         rectangularPatternFeatures=RectangularPatternFeatures(component=component))
+
+
+# ---------------------------------- COMPONENTS ------------------------------------------------
+
+class Attribute(Base):
+    def deleteMe(self) -> bool:
+        self._props["parent"]._items.remove(self)
+        return True
+
+
+class Attributes(Collection):
+    def add(self, groupName: str, name: str, value: str) -> Attribute:
+        existing = self.itemByName(groupName, name)
+        if existing is not None:
+            existing._props["value"] = value
+            return existing
+        attribute = Attribute(groupName=groupName, name=name, value=value, parent=self)
+        self._items.append(attribute)
+        return attribute
+
+    def itemByName(self, groupName: str, name: str) -> Attribute:
+        for attribute in self._items:
+            if attribute._props["groupName"] == groupName and attribute._props["name"] == name:
+                return attribute
+        return None
+
+
+class Component(Base):
+    def __init__(self, name: str = ""):
+        super().__init__(name=name, xYConstructionPlane=ConstructionPlane(name="XY"), xConstructionAxis=ConstructionAxis(name="X"),
+                         yConstructionAxis=ConstructionAxis(name="Y"), attributes=Attributes())
+        self._props["sketches"] = Sketches(component=self)
+        self._props["bRepBodies"] = BRepBodies(component=self)
+        self._props["features"] = Features(self)
+        self._props["occurrences"] = Occurrences(component=self)
+        self._props["allOccurrences"] = Occurrences(component=self)
+
+    def createOpenProfile(self, curves, chainCurves: bool = True) -> Profile:
+        return OpenProfile(curves)
+
+    @property
+    def parentDesign(self) -> "Design":
+        from .core import Application
+        return Application.get()._props["activeProduct"]
+
+
+class Occurrence(Base):
+    def __init__(self, component: Component, transform, name: str, sourceComponent: Component = None):
+        super().__init__(component=component, transform=transform, name=name, isLightBulbOn=True, isGrounded=False, bRepBodies=component._props["bRepBodies"],
+                         sourceComponent=sourceComponent)
+
+    def createForAssemblyContext(self, occurrence) -> "Occurrence":
+        return self
+
+    def deleteMe(self) -> bool:
+        return self._props["timelineObject"]._delete()
+
+
+class Occurrences(Collection):
+    def addNewComponent(self, transform) -> Occurrence:
+        component = Component("Component" + str(len(self._items) + 1))
+        owner = self._props["component"]
+        occurrence = Occurrence(component, transform, component._props["name"] + ":1", owner)
+        self._items.append(occurrence)
+        if self is owner._props["occurrences"]:
+            owner._props["allOccurrences"]._items.append(occurrence)
+        _addToTimeline("Occurrence", lambda: [collection._items.remove(occurrence) for collection in (self, owner._props["allOccurrences"]) if occurrence in collection._items], occurrence)
+        return occurrence
+
+
+class UserParameters(Collection):
+    pass
+
+
+class TimelineObject(Base):
+    def __init__(self, timeline, index: int, name: str, undo, entity):
+        super().__init__(index=index, name=name, parentTimeline=timeline, entity=entity)
+        self._undo = undo
+
+    # undoes the object wherever it is in the timeline, the objects after it move up
+    def _delete(self) -> bool:
+        timeline = self._props["parentTimeline"]
+        index = self._props["index"]
+        self._undo()
+        del timeline._items[index]
+        for timelineObject in timeline._items[index:]:
+            timelineObject._props["index"] -= 1
+        if timeline._props["markerPosition"] > index:
+            timeline._props["markerPosition"] -= 1
+        return True
+
+    def rollTo(self, rollBefore: bool) -> bool:
+        timeline = self._props["parentTimeline"]
+        timeline._props["markerPosition"] = self._props["index"] if rollBefore else self._props["index"] + 1
+        return True
+
+
+class Timeline(Collection):
+    def __init__(self):
+        super().__init__(markerPosition=0)
+        self._created = 0
+
+    # entities get a token that stays the same when other objects are added or deleted
+    def _add(self, name: str, undo, entity):
+        timelineObject = TimelineObject(self, len(self._items), name, undo, entity)
+        self._items.append(timelineObject)
+        self._props["markerPosition"] = len(self._items)
+        self._created += 1
+        if entity is not None:
+            entity._props["entityToken"] = "{}:{}".format(name, self._created)
+            entity._props["timelineObject"] = timelineObject
+
+    def deleteAllAfterMarker(self) -> bool:
+        marker = self._props["markerPosition"]
+        for timelineObject in reversed(self._items[marker:]):
+            timelineObject._undo()
+        del self._items[marker:]
+        return True
+
+    def moveToEnd(self) -> bool:
+        self._props["markerPosition"] = len(self._items)
+        return True
+
+
+class Design(Base):
+    def __init__(self):
+        super().__init__(designType=DesignTypes.ParametricDesignType, rootComponent=Component("Root"), userParameters=UserParameters(),
+                         timeline=Timeline(), attributes=Attributes(), exportManager=ExportManager())
+
+    def findEntityByToken(self, entityToken: str) -> list:
+        return [timelineObject._props["entity"] for timelineObject in self._props["timeline"]._items
+                if timelineObject._props["entity"] is not None and timelineObject._props["entity"]._props["entityToken"] == entityToken]
+
+
+class FusionArchiveExportOptions(Base):
+    pass
+
+
+# the archives of the stand-in are json files with the name, the bodies and the attributes of the component
+class ExportManager(Base):
+    def createFusionArchiveExportOptions(self, filename: str, geometry) -> FusionArchiveExportOptions:
+        return FusionArchiveExportOptions(filename=filename, geometry=geometry)
+
+    def execute(self, exportOptions) -> bool:
+        component = exportOptions._props["geometry"]
+        archive = {"component": component._props["name"],
+                   "bodies": [[body._props["name"], body._box] for body in component._props["bRepBodies"]._items],
+                   "attributes": [[attribute._props["groupName"], attribute._props["name"], attribute._props["value"]]
+                                  for attribute in component._props["attributes"]._items]}
+        with open(exportOptions._props["filename"], "w") as file:
+            json.dump(archive, file)
+        return True
+
+
+class FusionArchiveImportOptions(Base):
+    pass
+
+
+class ImportManager(Base):
+    def createFusionArchiveImportOptions(self, filename: str) -> FusionArchiveImportOptions:
+        return FusionArchiveImportOptions(filename=filename)
+
+    # archives written by the ExportManager are added as new occurrence, other files are accepted without content
+    def importToTarget(self, importOptions, target) -> bool:
+        try:
+            with open(importOptions._props["filename"]) as file:
+                archive = json.load(file)
+        except (OSError, ValueError):
+            return True
+        if not isinstance(archive, dict) or "component" not in archive:
+            return True
+        occurrence = target._props["occurrences"].addNewComponent(None)
+        component = occurrence._props["component"]
+        component._props["name"] = archive["component"]
+        for name, box in archive["bodies"]:
+            component._props["bRepBodies"]._new(box, name)
+        for groupName, name, value in archive["attributes"]:
+            component._props["attributes"].add(groupName, name, value)
+        return True